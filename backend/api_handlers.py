@@ -0,0 +1,260 @@
+import time
+from models.latency import LatencyBudget
+from models.metrics import count, observe, server_timing_requested
+from models.precompute import is_refreshing, precomputed_results, subreddit_popularity
+from models.singleflight import COMPUTED, analysis_flights
+from models.timeseries_store import MAX_TIMESTAMP, valid_timestamp
+from model_registry import get_model
+
+# Handlers shared by the Flask app (app.py) and the ASGI app (asgi.py).
+# Each takes the request JSON and a LatencyBudget and returns a JSON-able result.
+
+class InvalidRequest(ValueError):
+    """A request with missing or malformed parameters, answered with 400"""
+
+def require_string(data, name):
+    """
+    Return a required non-empty string parameter of the request JSON
+
+    Raises:
+        InvalidRequest: When the parameter is missing, empty or not a string
+    """
+    value = data.get(name)
+    if not isinstance(value, str) or not value.strip():
+        raise InvalidRequest(f"'{name}' must be a non-empty string")
+    return value.strip()
+
+def choice_param(data, name, choices, default):
+    """
+    Return an optional parameter of the request JSON that must be one of a fixed set of values
+
+    Raises:
+        InvalidRequest: When the parameter is given but is not one of choices
+    """
+    value = data.get(name, default)
+    if value not in choices:
+        raise InvalidRequest(f"'{name}' must be one of {', '.join(choices)}")
+    return value
+
+def int_param(data, name, default, minimum, maximum):
+    """
+    Return an optional integer parameter of the request JSON, within [minimum, maximum]
+
+    Integers sent as strings ("10") are accepted, so equal values build equal coalescing keys.
+
+    Raises:
+        InvalidRequest: When the parameter is not an integer or is out of range
+    """
+    value = data.get(name, default)
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool) or not minimum <= value <= maximum:
+        raise InvalidRequest(f"'{name}' must be an integer from {minimum} to {maximum}")
+    return value
+
+def get_latency_budget(data):
+    """
+    Build the latency budget for a request, honouring an optional deadlineMs override
+
+    Raises:
+        InvalidRequest: When deadlineMs is not a positive number
+    """
+    deadline_ms = data.get('deadlineMs')
+    if deadline_ms is not None:
+        if not isinstance(deadline_ms, (int, float)) or isinstance(deadline_ms, bool) or not 0 < deadline_ms < float('inf'):
+            raise InvalidRequest("'deadlineMs' must be a positive number")
+        return LatencyBudget('deadline-ms', deadline_ms)
+    return LatencyBudget.from_config()
+
+def latency_headers(budget):
+    """Response headers reporting the time actually spent on a request"""
+    headers = {
+        'X-Elapsed-Ms': f"{budget.elapsed_ms():.1f}",
+        'X-Latency-Mode': budget.mode
+    }
+    if budget.partial:
+        headers['X-Partial-Result'] = 'true'
+    if budget.computed_at is not None:
+        headers['X-Computed-At'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(budget.computed_at))
+        headers['Age'] = str(max(int(time.time() - budget.computed_at), 0))
+    return headers
+
+def timing_headers(timings, budget, requested=None):
+    """
+    Server-Timing header with the per-stage breakdown of a request, if asked for
+
+    Args:
+        timings (RequestTimings): The stage timings collected for the request
+        budget (LatencyBudget): The request's budget, whose clock gives the total
+        requested (str): The request's X-Server-Timing header
+
+    Returns:
+        dict: The header, or nothing when the breakdown was not requested
+    """
+    if not server_timing_requested(requested):
+        return {}
+    return {'Server-Timing': timings.server_timing(budget.elapsed_ms())}
+
+def record_request(route, status, budget):
+    """Count a served API request and observe its latency"""
+    count('trendlens_requests_total', route=route, status=str(status))
+    observe('trendlens_request_seconds', budget.elapsed_ms() / 1000, route=route)
+
+# Upper bounds of the numeric request parameters; Reddit serves at most 1000 posts per listing
+MAX_TOP_K = 100
+MAX_POST_LIMIT = 1000
+MAX_MONTHS = 120
+
+def subreddit_param(data):
+    """
+    Return the required subreddit of the request JSON, stripped and lowercased
+
+    Subreddit names are case-insensitive, so every spelling shares one
+    coalescing key and the analysis runs on the normalized name.
+
+    Raises:
+        InvalidRequest: When the subreddit is missing, empty or not a string
+    """
+    return require_string(data, 'subreddit').lower()
+
+def coalesce(route, params, budget, compute, top_k=None):
+    """
+    Serve a subreddit analysis precomputed in the background, or run it once for all identical concurrent requests
+
+    A stored result is served whatever the request's deadline, since it is
+    complete, and a stored ranking also serves any smaller topK by slicing.
+    Otherwise requests with the same route, normalized params, topK and
+    deadline share one run and its briefly cached result. Partial results
+    (cut short by a latency budget) are shared with the requests waiting on
+    them but not cached. Background refreshes (see models.precompute) always
+    run the analysis and store full results for later requests.
+
+    Args:
+        route (str): The API route
+        params (tuple): The normalized request params that determine the result, subreddit first,
+            without topK or the deadline
+        budget (LatencyBudget): This request's budget, flagged partial if the shared result is
+        compute (callable): Runs the analysis under this request's budget
+        top_k (int): Number of entries asked for, for routes returning a ranking
+
+    Returns:
+        The analysis result
+    """
+    key = (route, params)
+    if not is_refreshing():
+        subreddit_popularity.record(params[0])
+        precomputed = precomputed_results.get(key)
+        if precomputed is not None:
+            (stored_k, result), computed_at = precomputed
+            if top_k is None or top_k <= stored_k:
+                count('trendlens_precomputed_served_total', route=route)
+                budget.computed_at = computed_at
+                return result if top_k is None else result[:top_k]
+
+    def run():
+        return compute(), budget.partial
+
+    flight_key = (route, params, top_k, budget.deadline_ms)
+    (result, partial), how = analysis_flights.do(flight_key, run, cache_if=lambda value: not value[1])
+    if how != COMPUTED:
+        count('trendlens_coalesced_requests_total', route=route, source=how)
+        budget.partial = budget.partial or partial
+    if is_refreshing() and not budget.partial:
+        precomputed_results.put(key, [top_k, result])
+    return result
+
+# Bot Detection Handlers
+def analyze_bot_user(data, budget):
+    username = require_string(data, 'username')
+    return get_model('bot').analyze_user(username, budget)
+
+def get_subreddit_bots(data, budget):
+    subreddit = subreddit_param(data)
+    top_k = int_param(data, 'topK', 10, 1, MAX_TOP_K)
+    post_limit = int_param(data, 'postLimit', 100, 1, MAX_POST_LIMIT)
+    return coalesce('/api/bot/subreddit', (subreddit, post_limit), budget,
+                    lambda: get_model('bot').get_subreddit_bots(subreddit, budget, top_k, post_limit), top_k)
+
+# Influencer Detection Handlers
+def analyze_influencer(data, budget):
+    username = require_string(data, 'username')
+    return get_model('influencer').analyze_user(username, budget)
+
+def get_subreddit_influencers(data, budget):
+    subreddit = subreddit_param(data)
+    top_k = int_param(data, 'topK', 10, 1, MAX_TOP_K)
+    post_limit = int_param(data, 'postLimit', 50, 1, MAX_POST_LIMIT)
+    return coalesce('/api/influencer/subreddit', (subreddit, post_limit), budget,
+                    lambda: get_model('influencer').get_subreddit_influencers(subreddit, budget, top_k, post_limit),
+                    top_k)
+
+# Sentiment Analysis Handlers
+def analyze_subreddit_sentiment(data, budget):
+    subreddit = subreddit_param(data)
+    return coalesce('/api/sentiment/subreddit', (subreddit,), budget,
+                    lambda: get_model('sentiment').analyze_subreddit(subreddit, budget))
+
+def get_sentiment_summary(data, budget):
+    subreddit = subreddit_param(data)
+    return get_model('sentiment').get_summary(subreddit, budget)
+
+# Trend Forecasting Handlers
+def get_trend_data(data, budget):
+    subreddit = subreddit_param(data)
+    history_months = int_param(data, 'historyMonths', 8, 1, MAX_MONTHS)
+    forecast_months = int_param(data, 'forecastMonths', 4, 1, MAX_MONTHS)
+    from models.forecasting import FORECAST_METHODS
+    method = choice_param(data, 'forecastModel', FORECAST_METHODS, 'linear')
+    params = (subreddit, history_months, forecast_months, method)
+    return coalesce('/api/trend/data', params, budget,
+                    lambda: get_model('trend').get_trend_data(subreddit, history_months, forecast_months, budget, method))
+
+def get_activity_data(data, budget):
+    from models.timeseries_store import RESOLUTIONS
+    subreddit = subreddit_param(data)
+    months = int_param(data, 'months', 8, 1, MAX_MONTHS)
+    resolution = choice_param(data, 'resolution', RESOLUTIONS, 'month')
+    return get_model('trend').get_activity_data(subreddit, months, budget, resolution)
+
+def _activity_events(data, name):
+    """
+    Return a list of {'id', 'created_utc'} events of the request JSON, defaulting to none
+
+    Raises:
+        InvalidRequest: When the list or any of its events is malformed
+    """
+    events = data.get(name, [])
+    if not isinstance(events, list):
+        raise InvalidRequest(f"'{name}' must be a list of {{id, created_utc}} objects")
+    for event in events:
+        if not isinstance(event, dict):
+            raise InvalidRequest(f"'{name}' must be a list of {{id, created_utc}} objects")
+        if not isinstance(event.get('id'), (str, int)) or not valid_timestamp(event.get('created_utc')):
+            raise InvalidRequest(f"Every entry of '{name}' must have a string or integer 'id' and a 'created_utc' "
+                                 f"Unix timestamp from 0 to {MAX_TIMESTAMP}")
+    return events
+
+def ingest_activity(data, budget):
+    subreddit = require_string(data, 'subreddit')
+    posts = _activity_events(data, 'posts')
+    comments = _activity_events(data, 'comments')
+    return get_model('trend').ingest_activity(subreddit, posts, comments)
+
+# Routes refreshed in the background for watched subreddits (see models.precompute)
+PRECOMPUTED_ROUTES = ('/api/sentiment/subreddit', '/api/influencer/subreddit', '/api/bot/subreddit', '/api/trend/data')
+
+# Routes that write to the persistent stores, only served with the admin token
+ADMIN_ROUTES = ('/api/trend/ingest',)
+
+# Route path -> (simulated latency operation, handler)
+API_HANDLERS = {
+    '/api/bot/analyze': ('bot.analyze_user', analyze_bot_user),
+    '/api/bot/subreddit': ('bot.get_subreddit_bots', get_subreddit_bots),
+    '/api/influencer/analyze': ('influencer.analyze_user', analyze_influencer),
+    '/api/influencer/subreddit': (None, get_subreddit_influencers),
+    '/api/sentiment/subreddit': ('sentiment.analyze_subreddit', analyze_subreddit_sentiment),
+    '/api/sentiment/summary': (None, get_sentiment_summary),
+    '/api/trend/data': ('trend.get_trend_data', get_trend_data),
+    '/api/trend/activity': ('trend.get_activity_data', get_activity_data),
+    '/api/trend/ingest': (None, ingest_activity),
+}
@@ -1,69 +1,257 @@
+import logging
+import os
+import time
 
-from flask import Flask, jsonify, request
+_app_import_started = time.perf_counter()
+
+from models.logging_setup import configure_logging
+
+# Before the model imports below, so their startup messages are logged
+configure_logging()
+
+from flask import Flask, Response, g, jsonify, request, send_file, stream_with_context
 from flask_cors import CORS
-from models.bot_detection import BotDetectionModel
-from models.influencer_detection import InfluencerDetectionModel
-from models.sentiment_analysis import SentimentAnalysisModel
-from models.trend_forecasting import TrendForecastingModel
+import api_handlers
+import batch
+from api_handlers import API_HANDLERS, PRECOMPUTED_ROUTES, InvalidRequest, get_latency_budget, latency_headers, record_request, timing_headers
+from model_registry import MODEL_REGISTRY, startup_report, warm_up_in_background
+from models.ingestion import get_ingestion_worker, start_ingestion_from_config
+from models.latency import check_latency_config
+from models.metrics import metrics, timed, track_request
+from models.precompute import get_precompute_scheduler, start_precompute_from_config
+from models.profiling import RequestProfiler, get_profile_store, is_admin, profiling_requested
+
+logger = logging.getLogger(__name__)
+
+# A bad TRENDLENS_LATENCY_MODE or TRENDLENS_DEADLINE_MS stops startup
+# rather than failing every request
+check_latency_config()
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['X-Elapsed-Ms', 'X-Latency-Mode', 'X-Partial-Result', 'Server-Timing', 'X-Profile-Id', 'X-Computed-At', 'Age'])
+
+def get_warm_up_models():
+    """Models to warm up at startup from TRENDLENS_WARMUP ('all', 'none' or a comma-separated list)"""
+    setting = os.environ.get('TRENDLENS_WARMUP', 'sentiment').strip().lower()
+    if setting in ('', '0', 'none'):
+        return []
+    if setting == 'all':
+        return list(MODEL_REGISTRY)
+    return [name.strip() for name in setting.split(',') if name.strip() in MODEL_REGISTRY]
+
+# Scoring pool workers are spawned and re-import the main module as
+# __mp_main__ when the app is run with `python app.py`; only the server
+# process starts the background work below
+if __name__ != '__mp_main__':
+    # Models load lazily on first use of their routes; warm-up runs in the
+    # background so the worker accepts requests without waiting for it
+    warm_up_in_background(get_warm_up_models())
+
+    # Follow the subreddits in TRENDLENS_INGEST_SUBREDDITS (or replay
+    # TRENDLENS_INGEST_REPLAY) so their reads come from live aggregates
+    start_ingestion_from_config()
+
+    # Refresh the subreddits in TRENDLENS_PRECOMPUTE_SUBREDDITS (or the
+    # TRENDLENS_PRECOMPUTE_WATCHLIST file) in the background
+    start_precompute_from_config({route: API_HANDLERS[route][1] for route in PRECOMPUTED_ROUTES})
+
+def admin_denied():
+    """A 403 response unless the request carries the admin token in X-Admin-Token"""
+    if is_admin(request.headers.get('X-Admin-Token')):
+        return None
+    return jsonify({'error': 'A valid X-Admin-Token is required'}), 403
+
+@app.before_request
+def start_profiling():
+    """Profile an /api/* request sent with ?profile=1 or X-Profile: 1 and the admin token"""
+    if not request.path.startswith('/api/') or request.path.startswith('/api/admin/'):
+        return None
+    if not profiling_requested(request.args.get('profile'), request.headers.get('X-Profile')):
+        return None
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+    profiler = RequestProfiler(request.path)
+    if profiler.start():
+        g.profiler = profiler
+    return None
+
+@app.after_request
+def stop_profiling(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        response.headers['X-Profile-Id'] = profiler.profile_id
+        if response.is_streamed:
+            # A streamed body (/api/batch) is generated after this hook, so
+            # keep profiling until the server closes the response
+            status = response.status_code
+            response.call_on_close(lambda: profiler.stop(status))
+        else:
+            profiler.stop(response.status_code)
+    return response
+
+@app.teardown_request
+def discard_profiling(error=None):
+    # A request that failed before after_request still frees the profiler
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop(500)
+
+def budgeted_response(result, budget, timings=None):
+    """Serialize a model result and report the time actually spent on it"""
+    with timed("serialize"):
+        response = jsonify(result)
+    response.headers.update(latency_headers(budget))
+    if timings is not None:
+        response.headers.update(timing_headers(timings, budget, request.headers.get('X-Server-Timing')))
+    return response
+
+def handle(handler):
+    """Run a shared API handler on the request JSON under a latency budget, timing its stages"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    try:
+        budget = get_latency_budget(data)
+    except InvalidRequest as e:
+        return jsonify({'error': str(e)}), 400
+    with track_request() as timings:
+        try:
+            response = budgeted_response(handler(data, budget), budget, timings)
+        except InvalidRequest as e:
+            response = jsonify({'error': str(e)})
+            response.status_code = 400
+        except Exception:
+            record_request(request.path, 500, budget)
+            raise
+    record_request(request.path, response.status_code, budget)
+    return response
 
 # Bot Detection Routes
 @app.route('/api/bot/analyze', methods=['POST'])
 def analyze_bot_user():
-    data = request.get_json()
-    username = data.get('username')
-    result = BotDetectionModel.analyze_user(username)
-    return jsonify(result)
+    return handle(api_handlers.analyze_bot_user)
 
 @app.route('/api/bot/subreddit', methods=['POST'])
 def get_subreddit_bots():
-    data = request.get_json()
-    subreddit = data.get('subreddit')
-    result = BotDetectionModel.get_subreddit_bots(subreddit)
-    return jsonify(result)
+    return handle(api_handlers.get_subreddit_bots)
 
 # Influencer Detection Routes
 @app.route('/api/influencer/analyze', methods=['POST'])
 def analyze_influencer():
-    data = request.get_json()
-    username = data.get('username')
-    result = InfluencerDetectionModel.analyze_user(username)
-    return jsonify(result)
+    return handle(api_handlers.analyze_influencer)
 
 @app.route('/api/influencer/subreddit', methods=['POST'])
 def get_subreddit_influencers():
-    data = request.get_json()
-    subreddit = data.get('subreddit')
-    result = InfluencerDetectionModel.get_subreddit_influencers(subreddit)
-    return jsonify(result)
+    return handle(api_handlers.get_subreddit_influencers)
 
 # Sentiment Analysis Routes
 @app.route('/api/sentiment/subreddit', methods=['POST'])
 def analyze_subreddit_sentiment():
-    data = request.get_json()
-    subreddit = data.get('subreddit')
-    result = SentimentAnalysisModel.analyze_subreddit(subreddit)
-    return jsonify(result)
+    return handle(api_handlers.analyze_subreddit_sentiment)
+
+@app.route('/api/sentiment/summary', methods=['POST'])
+def get_sentiment_summary():
+    return handle(api_handlers.get_sentiment_summary)
+
+@app.route('/api/sentiment/cache', methods=['GET'])
+def get_sentiment_cache_stats():
+    from models.sentiment_cache import get_default_result_cache
+    return jsonify(get_default_result_cache().stats())
 
 # Trend Forecasting Routes
 @app.route('/api/trend/data', methods=['POST'])
 def get_trend_data():
-    data = request.get_json()
-    subreddit = data.get('subreddit')
-    history_months = data.get('historyMonths', 8)
-    forecast_months = data.get('forecastMonths', 4)
-    result = TrendForecastingModel.get_trend_data(subreddit, history_months, forecast_months)
-    return jsonify(result)
+    return handle(api_handlers.get_trend_data)
 
 @app.route('/api/trend/activity', methods=['POST'])
 def get_activity_data():
-    data = request.get_json()
-    subreddit = data.get('subreddit')
-    months = data.get('months', 8)
-    result = TrendForecastingModel.get_activity_data(subreddit, months)
-    return jsonify(result)
+    return handle(api_handlers.get_activity_data)
+
+@app.route('/api/trend/ingest', methods=['POST'])
+def ingest_activity():
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+    return handle(api_handlers.ingest_activity)
+
+# Batch Routes
+@app.route('/api/batch', methods=['POST'])
+def run_batch():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    try:
+        tasks = batch.plan_batch(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    lines = (app.json.dumps(line) + '\n' for line in batch.run_batch(data, tasks))
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
+# Reddit Client Routes
+@app.route('/api/reddit/cache', methods=['GET'])
+def get_reddit_cache_stats():
+    from models.reddit_client import RedditClient
+    from models.author_cache import author_profiles
+    return jsonify({
+        'responses': RedditClient.cache_stats(),
+        'authorProfiles': author_profiles.stats()
+    })
+
+# Ingestion Routes
+@app.route('/api/ingestion', methods=['GET'])
+def get_ingestion_status():
+    worker = get_ingestion_worker()
+    return jsonify(worker.stats() if worker else {'running': False})
+
+# Precompute Routes
+@app.route('/api/precompute', methods=['GET'])
+def get_precompute_status():
+    scheduler = get_precompute_scheduler()
+    return jsonify(scheduler.stats() if scheduler else {'running': False})
+
+# Metrics Routes
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Profiling Routes
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+    return jsonify(get_profile_store().list())
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+    store = get_profile_store()
+    path = store.path(profile_id)
+    if path is None:
+        return jsonify({'error': f"No profile '{profile_id}'"}), 404
+    if request.args.get('format') == 'text':
+        try:
+            report = store.report(profile_id, request.args.get('sort', 'cumulative'), request.args.get('limit', 50, type=int))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if report is None:
+            return jsonify({'error': f"No profile '{profile_id}'"}), 404
+        return Response(report, mimetype='text/plain')
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=f"{profile_id}.prof")
+
+# Startup Routes
+@app.route('/api/startup', methods=['GET'])
+def get_startup_report():
+    report = startup_report()
+    report['appImportMs'] = app_import_ms
+    return jsonify(report)
+
+app_import_ms = round((time.perf_counter() - _app_import_started) * 1000, 1)
+logger.info("Imported app in %s ms", app_import_ms)
 
 if __name__ == '__main__':
     app.run(debug=True)
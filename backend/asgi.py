@@ -0,0 +1,151 @@
+"""
+Async (ASGI) serving mode for the TrendLens API
+
+The /api/* model routes are served natively: simulated latency is awaited
+on the event loop and blocking model and Reddit work runs on a bounded
+thread pool, so slow requests do not tie up a server worker. Every other
+route falls through to the Flask app.
+
+    cd backend
+    uvicorn asgi:application --port 5000
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+from asgiref.wsgi import WsgiToAsgi
+from app import app as flask_app
+from api_handlers import ADMIN_ROUTES, API_HANDLERS, InvalidRequest, get_latency_budget, latency_headers, record_request, timing_headers
+from models.metrics import timed, track_request
+from models.profiling import RequestProfiler, is_admin, profiling_requested
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("TRENDLENS_ASYNC_THREADS", 32)),
+    thread_name_prefix="api-worker"
+)
+_flask_asgi = WsgiToAsgi(flask_app)
+
+_CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Expose-Headers': 'X-Elapsed-Ms, X-Latency-Mode, X-Partial-Result, Server-Timing, X-Profile-Id, X-Computed-At, Age'
+}
+
+async def _read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body', False):
+            return body
+
+def _encode(payload):
+    with timed("serialize"):
+        return flask_app.json.dumps(payload).encode('utf-8') + b'\n'
+
+async def _send_json(send, status, payload, headers=None):
+    await _send_body(send, status, _encode(payload), headers)
+
+async def _send_body(send, status, body, headers=None):
+    response_headers = {'Content-Type': 'application/json', 'Content-Length': str(len(body))}
+    response_headers.update(_CORS_HEADERS)
+    response_headers.update(headers or {})
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response_headers.items()]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+def _call(handler, data, budget, profiler):
+    """Run a handler on an executor thread, under the profiler if one was requested"""
+    if profiler is None or not profiler.start():
+        return handler(data, budget)
+    status = 500
+    try:
+        result = handler(data, budget)
+        status = 200
+        return result
+    finally:
+        profiler.stop(status)
+
+async def _handle_api(scope, receive, send, operation, handler):
+    path = scope['path']
+    request_headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope.get('headers', [])}
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+
+    if path in ADMIN_ROUTES and not is_admin(request_headers.get('x-admin-token')):
+        await _send_json(send, 403, {'error': 'A valid X-Admin-Token is required'})
+        return
+
+    # Profile with ?profile=1 or X-Profile: 1, admin only
+    profiler = None
+    if profiling_requested(query.get('profile', [None])[-1], request_headers.get('x-profile')):
+        if not is_admin(request_headers.get('x-admin-token')):
+            await _send_json(send, 403, {'error': 'A valid X-Admin-Token is required'})
+            return
+        profiler = RequestProfiler(path)
+
+    try:
+        data = json.loads(await _read_body(receive) or b'null')
+    except ValueError:
+        await _send_json(send, 400, {'error': 'Request body must be JSON'})
+        return
+    if not isinstance(data, dict):
+        await _send_json(send, 400, {'error': 'Request body must be a JSON object'})
+        return
+
+    try:
+        budget = get_latency_budget(data)
+    except InvalidRequest as e:
+        await _send_json(send, 400, {'error': str(e)})
+        return
+    with track_request() as timings:
+        if operation is not None:
+            await budget.simulate_async(operation)
+
+        try:
+            loop = asyncio.get_running_loop()
+            # A copy of the context carries the request's stage timings into the thread
+            result = await loop.run_in_executor(
+                _executor, contextvars.copy_context().run, _call, handler, data, budget, profiler
+            )
+        except InvalidRequest as e:
+            record_request(path, 400, budget)
+            await _send_json(send, 400, {'error': str(e)}, latency_headers(budget))
+            return
+        except Exception as e:
+            logger.exception("Error handling async request: %s", e)
+            record_request(path, 500, budget)
+            await _send_json(send, 500, {'error': str(e)}, latency_headers(budget))
+            return
+
+        body = _encode(result)
+    headers = latency_headers(budget)
+    headers.update(timing_headers(timings, budget, request_headers.get('x-server-timing')))
+    if profiler is not None and profiler.profile_id:
+        headers['X-Profile-Id'] = profiler.profile_id
+    record_request(path, 200, budget)
+    await _send_body(send, 200, body, headers)
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['method'] == 'POST' and scope['path'] in API_HANDLERS:
+        operation, handler = API_HANDLERS[scope['path']]
+        await _handle_api(scope, receive, send, operation, handler)
+        return
+
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                _executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    await _flask_asgi(scope, receive, send)
@@ -0,0 +1,153 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import api_handlers
+from api_handlers import get_latency_budget
+
+logger = logging.getLogger(__name__)
+
+# Batch analyses run the same shared handlers as the single-target routes,
+# in parallel. Each analysis reads its own subreddit listing; the bot and
+# influencer analyses of a subreddit look up many of the same authors, and
+# share those profiles through the author profile cache, whose concurrent
+# misses on the same author wait on a single fetch.
+
+# Analysis name -> API route whose handler runs it, per target type
+SUBREDDIT_ANALYSES = {
+    'bot': '/api/bot/subreddit',
+    'influencer': '/api/influencer/subreddit',
+    'sentiment': '/api/sentiment/subreddit',
+    'trend': '/api/trend/data',
+    'activity': '/api/trend/activity',
+}
+
+USER_ANALYSES = {
+    'bot': '/api/bot/analyze',
+    'influencer': '/api/influencer/analyze',
+}
+
+def get_batch_workers():
+    return int(os.environ.get('TRENDLENS_BATCH_WORKERS', 8))
+
+def get_batch_max_tasks():
+    return int(os.environ.get('TRENDLENS_BATCH_MAX_TASKS', 200))
+
+def _unique(data, key):
+    """
+    Read a list of names from the request, dropping empty and duplicate names and keeping the first spelling
+
+    A single name given as a string is read as a list of one.
+
+    Raises:
+        ValueError: If the value is neither a list nor a string
+    """
+    values = data.get(key)
+    if values is None:
+        return []
+    if isinstance(values, str):
+        values = [values]
+    if not isinstance(values, list):
+        raise ValueError(f"'{key}' must be a list of names")
+
+    seen = set()
+    names = []
+    for value in values:
+        name = str(value).strip()
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    return names
+
+def plan_batch(data):
+    """
+    Expand a batch request into one task per target and analysis
+
+    Args:
+        data (dict): Request JSON with 'subreddits' and/or 'users' lists (or single
+            names) and an 'analyses' list; other keys (historyMonths, topK, ...) are passed
+            through to every handler
+
+    Returns:
+        list: (target key, target name, analysis, route) tuples
+
+    Raises:
+        ValueError: If the request is empty or malformed, names an unknown analysis, is too large
+            or has an invalid deadlineMs
+    """
+    # Every task builds its own budget from the request, so check it once up front
+    get_latency_budget(data)
+    subreddits = _unique(data, 'subreddits')
+    users = _unique(data, 'users')
+    analyses = _unique(data, 'analyses') or list(SUBREDDIT_ANALYSES)
+
+    unknown = [name for name in analyses if name not in SUBREDDIT_ANALYSES]
+    if unknown:
+        raise ValueError(f"Unknown analyses: {', '.join(map(str, unknown))}")
+    if not subreddits and not users:
+        raise ValueError("Expected a non-empty 'subreddits' or 'users' list")
+
+    tasks = []
+    for subreddit in subreddits:
+        for analysis in analyses:
+            tasks.append(('subreddit', subreddit, analysis, SUBREDDIT_ANALYSES[analysis]))
+    for username in users:
+        for analysis in analyses:
+            if analysis in USER_ANALYSES:
+                tasks.append(('username', username, analysis, USER_ANALYSES[analysis]))
+
+    if not tasks:
+        raise ValueError("None of the requested analyses apply to users: use 'bot' or 'influencer'")
+    if len(tasks) > get_batch_max_tasks():
+        raise ValueError(f"Batch of {len(tasks)} analyses exceeds the limit of {get_batch_max_tasks()}")
+    return tasks
+
+def _run_task(data, task):
+    """Run one analysis under its own latency budget and build its result line"""
+    key, name, analysis, route = task
+    operation, handler = api_handlers.API_HANDLERS[route]
+    budget = get_latency_budget(data)
+
+    line = {key: name, 'analysis': analysis}
+    try:
+        if operation:
+            budget.simulate(operation)
+        line['result'] = handler(dict(data, **{key: name}), budget)
+    except Exception as e:
+        logger.warning("Batch %s analysis of %s failed: %s", analysis, name, e)
+        line['error'] = str(e)
+
+    line['elapsedMs'] = round(budget.elapsed_ms(), 1)
+    if budget.partial:
+        line['partial'] = True
+    return line
+
+def run_batch(data, tasks=None):
+    """
+    Run a batch of analyses in parallel, yielding result lines as they finish
+
+    Args:
+        data (dict): Batch request JSON, see plan_batch
+        tasks (list): Tasks from plan_batch, planned from data if omitted
+
+    Yields:
+        dict: One line per task in completion order, then a summary line
+    """
+    started = time.perf_counter()
+    tasks = plan_batch(data) if tasks is None else tasks
+    errors = 0
+
+    with ThreadPoolExecutor(max_workers=min(get_batch_workers(), len(tasks))) as pool:
+        futures = [pool.submit(_run_task, data, task) for task in tasks]
+        for future in as_completed(futures):
+            line = future.result()
+            errors += 'error' in line
+            yield line
+
+    yield {
+        'done': True,
+        'tasks': len(tasks),
+        'errors': errors,
+        'elapsedMs': round((time.perf_counter() - started) * 1000, 1)
+    }
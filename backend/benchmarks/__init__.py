@@ -0,0 +1 @@
+# TrendLens Benchmarks Package
@@ -0,0 +1,77 @@
+"""
+Compare two benchmark result files
+
+    cd backend
+    python -m benchmarks.compare baseline.json current.json --tolerance 0.1
+
+Prints the change of every benchmark present in both files and exits with
+status 1 if any got slower by more than the tolerance.
+"""
+import argparse
+import json
+import sys
+
+def _timings(results):
+    """Benchmark key -> time to compare (lower is better)"""
+    timings = {}
+    for result in results.get('micro', []):
+        timings[f"micro {result['name']} size={result['size']}"] = result['medianSeconds']
+    for result in results.get('routes', []):
+        key = f"route {result['route']} concurrency={result['concurrency']}"
+        timings[f"{key} p50"] = result['p50Ms']
+        timings[f"{key} p99"] = result['p99Ms']
+        timings[f"{key} per-request"] = 1 / result['throughputRps'] if result['throughputRps'] else None
+    return timings
+
+def compare(baseline, current, tolerance=0.1):
+    """
+    Relative change of every benchmark in both result sets
+
+    Args:
+        baseline (dict): Earlier results, as written by benchmarks.run
+        current (dict): New results
+        tolerance (float): Slowdown ratio above which a change counts as a regression
+
+    Returns:
+        list: {'benchmark', 'baseline', 'current', 'ratio', 'regression'} rows;
+            ratio is current / baseline, so above 1 is slower
+    """
+    before, after = _timings(baseline), _timings(current)
+    rows = []
+    for key in before:
+        if key not in after or not before[key] or after[key] is None:
+            continue
+        ratio = after[key] / before[key]
+        rows.append({
+            'benchmark': key,
+            'baseline': before[key],
+            'current': after[key],
+            'ratio': round(ratio, 3),
+            'regression': ratio > 1 + tolerance
+        })
+    return rows
+
+def print_comparison(rows):
+    for row in rows:
+        flag = "  REGRESSION" if row['regression'] else ""
+        print(f"{row['ratio']:>7.3f}x  {row['benchmark']}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--tolerance', type=float, default=0.1, help="Allowed slowdown, e.g. 0.1 for 10%%")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.tolerance)
+    print_comparison(rows)
+    if any(row['regression'] for row in rows):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
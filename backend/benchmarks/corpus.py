@@ -0,0 +1,225 @@
+"""
+Deterministic synthetic Reddit corpora
+
+Every post, comment and user history is generated from its index (or
+username) and the corpus seed alone. Corpora of a million items therefore
+cost no memory until items are read, and the same item always has the
+same content.
+"""
+import random
+import time
+import zlib
+
+POSITIVE_WORDS = [
+    "great", "love", "amazing", "excellent", "happy", "best", "awesome", "good", "wonderful",
+    "fantastic", "helpful", "beautiful", "impressive", "fun", "perfect", "nice", "brilliant",
+]
+NEGATIVE_WORDS = [
+    "terrible", "hate", "awful", "worst", "bad", "broken", "sad", "angry", "boring",
+    "disappointing", "useless", "ugly", "annoying", "slow", "horrible", "confusing", "scam",
+]
+NEUTRAL_WORDS = [
+    "update", "release", "game", "patch", "thread", "question", "guide", "server", "community",
+    "week", "team", "players", "price", "market", "news", "video", "build", "project", "feature",
+    "review", "discussion", "version", "support", "design", "story", "season", "rules", "post",
+    "library", "phone", "city", "music", "movie", "book", "recipe", "garden", "camera", "car",
+]
+FUNCTION_WORDS = ["the", "a", "this", "is", "was", "and", "it", "my", "for", "with", "to", "of", "in"]
+MODIFIERS = ["very", "really", "not", "never", "so", "but", "kind of", "extremely", "barely"]
+ENDINGS = ["", "", "", ".", "!", "?", "!!", " :)", " :("]
+
+# Near-identical messages posted over and over by the bot-like accounts
+BOT_TEMPLATES = [
+    "Check out my amazing crypto giveaway website today",
+    "Great post thanks for sharing follow me for more daily tips",
+    "Click the link in my profile for free gift cards",
+]
+
+# Day-aligned so a corpus is reproducible for a whole day but its activity stays recent
+DAY = 86400
+
+class SyntheticCorpus:
+    """
+    A deterministic, lazily generated set of subreddits, posts, comments and users
+
+    Post i belongs to subreddit i % subreddits; comment i belongs to post
+    i % posts, in that post's subreddit. Authors are drawn from a skewed
+    distribution, so a few authors write many posts as on real
+    subreddits. One author in ten is bot-like: a young account posting
+    near-identical messages at a high rate.
+    """
+
+    def __init__(self, posts=1000, comments=None, subreddits=None, authors=None, seed=1, now=None, span_days=365):
+        """
+        Args:
+            posts (int): Number of posts
+            comments (int): Number of comments, defaults to the number of posts
+            subreddits (int): Number of subreddits, defaults to one per 100 posts (1 to 100)
+            authors (int): Number of authors, defaults to one per 10 posts (at least 10)
+            seed (int): Seed every item is derived from
+            now (float): Newest creation time, defaults to the start of the current UTC day
+            span_days (int): Items are created over this many days before now
+        """
+        self.num_posts = posts
+        self.num_comments = posts if comments is None else comments
+        self.num_subreddits = subreddits or max(1, min(100, posts // 100))
+        self.num_authors = authors or max(10, posts // 10)
+        self.seed = seed
+        self.now = now if now is not None else time.time() // DAY * DAY
+        self.span = span_days * DAY
+
+    def _rng(self, kind, index):
+        return random.Random((self.seed * 1000003 + index) * 8 + kind)
+
+    # Names
+
+    def subreddit_name(self, index):
+        return f"bench{index % self.num_subreddits}"
+
+    def subreddit_index(self, name):
+        """Index of a subreddit name; names not from this corpus map to a stable index"""
+        name = name.lower()
+        if name.startswith("bench") and name[5:].isdigit():
+            return int(name[5:]) % self.num_subreddits
+        return zlib.crc32(name.encode('utf-8')) % self.num_subreddits
+
+    def author_name(self, index):
+        index %= self.num_authors
+        return f"bot_{index}" if index % 10 == 0 else f"user_{index}"
+
+    def author_index(self, name):
+        prefix, _, number = name.rpartition('_')
+        if prefix in ("bot", "user") and number.isdigit():
+            return int(number) % self.num_authors
+        return zlib.crc32(name.encode('utf-8')) % self.num_authors
+
+    @staticmethod
+    def is_bot(name):
+        return name.startswith("bot_")
+
+    def _pick_author(self, rng):
+        # Skewed toward low indices: a few prolific authors, a long tail of occasional ones
+        return self.author_name(int(self.num_authors * rng.random() ** 3))
+
+    # Text
+
+    @staticmethod
+    def _text(rng, min_words, max_words):
+        words = []
+        for _ in range(rng.randint(min_words, max_words)):
+            pick = rng.random()
+            if pick < 0.15:
+                words.append(rng.choice(POSITIVE_WORDS))
+            elif pick < 0.27:
+                words.append(rng.choice(NEGATIVE_WORDS))
+            elif pick < 0.35:
+                words.append(rng.choice(MODIFIERS))
+            elif pick < 0.6:
+                words.append(rng.choice(FUNCTION_WORDS))
+            else:
+                words.append(rng.choice(NEUTRAL_WORDS))
+        if rng.random() < 0.03:
+            words.append(f"https://example.com/{rng.choice(NEUTRAL_WORDS)}")
+        if rng.random() < 0.05:
+            words[0] = words[0].upper()
+        return " ".join(words).capitalize() + rng.choice(ENDINGS)
+
+    # Items
+
+    def post(self, index):
+        """Post dict in the shape RedditClient.get_posts returns, plus its subreddit"""
+        rng = self._rng(1, index)
+        author = self._pick_author(rng)
+        deleted = rng.random() < 0.02
+        return {
+            'id': f"p{index}",
+            'subreddit': self.subreddit_name(index),
+            'author': None if deleted else author,
+            'title': self._text(rng, 4, 14),
+            'score': int(rng.paretovariate(1.2) * 10),
+            'num_comments': int(rng.paretovariate(1.5) * 5),
+            'created_utc': self.now - rng.random() * self.span,
+            'awards': int(rng.random() < 0.05) * rng.randint(1, 5)
+        }
+
+    def comment(self, index):
+        """Comment dict in the ingestion event shape (without 'kind')"""
+        rng = self._rng(2, index)
+        post_index = index % self.num_posts if self.num_posts else 0
+        return {
+            'id': f"c{index}",
+            'subreddit': self.subreddit_name(post_index),
+            'author': self._pick_author(rng),
+            'body': self._text(rng, 5, 40),
+            'post_id': f"p{post_index}",
+            'created_utc': self.now - rng.random() * self.span,
+            'is_reply': rng.random() < 0.4
+        }
+
+    def posts(self, count=None):
+        return [self.post(i) for i in range(self.num_posts if count is None else min(count, self.num_posts))]
+
+    def comments(self, count=None):
+        return [self.comment(i) for i in range(self.num_comments if count is None else min(count, self.num_comments))]
+
+    def texts(self, count):
+        """Titles and comment bodies, alternating"""
+        return [self.post(i // 2)['title'] if i % 2 == 0 else self.comment(i // 2)['body'] for i in range(count)]
+
+    def subreddit_posts(self, name, limit):
+        """The first `limit` posts of a subreddit"""
+        first = self.subreddit_index(name)
+        return [self.post(i) for i in range(first, self.num_posts, self.num_subreddits)[:limit]]
+
+    def post_comments(self, post_id, limit):
+        """The first `limit` comments of a post"""
+        first = int(post_id[1:]) if post_id[1:].isdigit() else zlib.crc32(post_id.encode('utf-8'))
+        first %= max(self.num_posts, 1)
+        return [self.comment(i) for i in range(first, self.num_comments, max(self.num_posts, 1))[:limit]]
+
+    def profile(self, name):
+        """Karma and account creation time of a user"""
+        rng = self._rng(3, self.author_index(name))
+        age_days = rng.uniform(1, 30) if self.is_bot(name) else rng.uniform(30, 3650)
+        return {
+            'name': name,
+            'link_karma': int(rng.paretovariate(1.1) * 100),
+            'comment_karma': int(rng.paretovariate(1.1) * 300),
+            'created_utc': self.now - age_days * DAY
+        }
+
+    def user_history(self, name, limit=100):
+        """
+        A user's recent posts and comments, newest first
+
+        Returns:
+            dict: 'posts' and 'comments' in the shape RedditClient.get_user_history returns
+        """
+        rng = self._rng(4, self.author_index(name))
+        bot = self.is_bot(name)
+        home = self.subreddit_name(rng.randrange(self.num_subreddits))
+        # Bots post every few minutes, people every few days
+        interval = 600 if bot else 3 * DAY
+
+        def subreddit():
+            return home if bot or rng.random() < 0.3 else self.subreddit_name(rng.randrange(self.num_subreddits))
+
+        def text(min_words, max_words):
+            if bot:
+                return rng.choice(BOT_TEMPLATES) + rng.choice(ENDINGS)
+            return self._text(rng, min_words, max_words)
+
+        posts = [{
+            'id': f"h{self.author_index(name)}p{i}",
+            'subreddit': subreddit(),
+            'title': text(4, 14),
+            'created_utc': self.now - i * interval * 2
+        } for i in range(min(limit, 20 if bot else 5))]
+        comments = [{
+            'id': f"h{self.author_index(name)}c{i}",
+            'subreddit': subreddit(),
+            'body': text(5, 40),
+            'created_utc': self.now - i * interval,
+            'is_reply': not bot and rng.random() < 0.5
+        } for i in range(min(limit, 100 if bot else 30))]
+        return {'posts': posts, 'comments': comments}
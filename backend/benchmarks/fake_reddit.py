@@ -0,0 +1,157 @@
+"""
+Deterministic fake PRAW backend serving a SyntheticCorpus
+
+Implements the parts of praw.Reddit that RedditClient uses, so every
+model runs its real code path (no mock fallbacks) without network access.
+An optional per-call delay stands in for Reddit API latency.
+"""
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+def _author(name):
+    return SimpleNamespace(name=name) if name else None
+
+def _submission(post):
+    return SimpleNamespace(
+        id=post['id'],
+        author=_author(post['author']),
+        title=post['title'],
+        score=post['score'],
+        num_comments=post['num_comments'],
+        created_utc=post['created_utc'],
+        total_awards_received=post['awards'],
+        subreddit=SimpleNamespace(display_name=post['subreddit'])
+    )
+
+def _comment(comment):
+    return SimpleNamespace(
+        id=comment['id'],
+        author=_author(comment.get('author')),
+        body=comment['body'],
+        created_utc=comment['created_utc'],
+        subreddit=SimpleNamespace(display_name=comment['subreddit']),
+        link_id=f"t3_{comment.get('post_id', '')}",
+        parent_id="t1_parent" if comment.get('is_reply') else f"t3_{comment.get('post_id', '')}"
+    )
+
+class _CommentForest(list):
+    def replace_more(self, limit=32):
+        return []
+
+class _Listing:
+    def __init__(self, fetch):
+        self._fetch = fetch
+
+    def new(self, limit=100):
+        return self._fetch(limit)
+
+class FakeSubreddit:
+    def __init__(self, reddit, name):
+        self._reddit = reddit
+        self.display_name = name
+
+    def _listing(self, listing, limit):
+        self._reddit._call(f"subreddit.{listing}")
+        return [_submission(post) for post in self._reddit.corpus.subreddit_posts(self.display_name, limit or 100)]
+
+    def hot(self, limit=100):
+        return self._listing('hot', limit)
+
+    def top(self, limit=100, time_filter='all'):
+        return self._listing('top', limit)
+
+    def new(self, limit=100):
+        return self._listing('new', limit)
+
+class FakeRedditor:
+    def __init__(self, reddit, name):
+        reddit._call("redditor")
+        profile = reddit.corpus.profile(name)
+        self._reddit = reddit
+        self.name = name
+        self.link_karma = profile['link_karma']
+        self.comment_karma = profile['comment_karma']
+        self.created_utc = profile['created_utc']
+        self.submissions = _Listing(self._submissions)
+        self.comments = _Listing(self._comments)
+
+    def _history(self, limit):
+        return self._reddit.corpus.user_history(self.name, limit)
+
+    def _submissions(self, limit):
+        self._reddit._call("redditor.submissions")
+        return [
+            _submission(dict(post, author=self.name, score=1, num_comments=0, awards=0))
+            for post in self._history(limit)['posts']
+        ]
+
+    def _comments(self, limit):
+        self._reddit._call("redditor.comments")
+        return [_comment(dict(comment, author=self.name)) for comment in self._history(limit)['comments']]
+
+class FakeReddit:
+    """
+    Stand-in for praw.Reddit backed by a SyntheticCorpus
+
+    Counts calls per endpoint so benchmarks can report how many Reddit
+    requests a route made.
+    """
+
+    def __init__(self, corpus, latency_ms=0.0):
+        """
+        Args:
+            corpus (SyntheticCorpus): The content to serve
+            latency_ms (float): Delay added to every call, to stand in for the Reddit API
+        """
+        self.corpus = corpus
+        self.latency_ms = latency_ms
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def _call(self, endpoint):
+        with self._lock:
+            self.calls[endpoint] += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def subreddit(self, name):
+        return FakeSubreddit(self, name)
+
+    def redditor(self, name):
+        return FakeRedditor(self, name)
+
+    def submission(self, id):
+        self._call("submission.comments")
+        return SimpleNamespace(id=id, comments=_CommentForest(
+            _comment(comment) for comment in self.corpus.post_comments(id, 100)
+        ))
+
+def install(reddit):
+    """
+    Make every model use a fake backend and start from cold caches
+
+    Args:
+        reddit (FakeReddit): The backend RedditClient.get_instance() should return
+    """
+    from models.reddit_client import RedditClient
+
+    RedditClient.set_instance(reddit)
+    reset_caches()
+
+def reset_caches():
+    """Empty the Reddit response, author profile, bot feature, sentiment result, analysis result and precomputed result caches"""
+    from models.author_cache import author_profiles
+    from models.bot_detection import BotDetectionModel
+    from models.precompute import precomputed_results
+    from models.reddit_client import RedditClient
+    from models.sentiment_cache import get_default_result_cache
+    from models.singleflight import analysis_flights
+
+    RedditClient.clear_cache()
+    author_profiles.clear()
+    BotDetectionModel.clear_feature_cache()
+    get_default_result_cache().clear()
+    analysis_flights.clear()
+    precomputed_results.clear()
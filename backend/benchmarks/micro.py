@@ -0,0 +1,194 @@
+"""
+Micro-benchmarks of the model hot paths
+
+Each benchmark builds its input from a SyntheticCorpus outside the timed
+region and returns the work to time. Caches that would turn repeats into
+lookups are emptied before every run, so each run starts cold.
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+
+import numpy as np
+from benchmarks.fake_reddit import reset_caches
+
+def _new_store():
+    """An empty activity store in a fresh directory under the data directory"""
+    from models.timeseries_store import TimeSeriesStore, data_dir
+
+    return TimeSeriesStore(os.path.join(tempfile.mkdtemp(prefix="activity-", dir=data_dir()), 'activity.sqlite3'))
+
+def _by_subreddit(items):
+    grouped = defaultdict(list)
+    for item in items:
+        grouped[item['subreddit']].append(item)
+    return grouped
+
+def clean_text(corpus, size):
+    """TextCleaner on titles and comment bodies, one call per text"""
+    from models.sentiment_analysis import SentimentAnalysisModel
+
+    texts = corpus.texts(size)
+
+    def run():
+        for text in texts:
+            SentimentAnalysisModel._clean_text(text)
+    return {'run': run, 'items': len(texts)}
+
+def hybrid_sentiment(corpus, size):
+    """Full hybrid score of one text at a time, as analyze_post_sentiment does"""
+    from models.sentiment_analysis import SentimentAnalysisModel
+
+    texts = corpus.texts(size)
+
+    def run():
+        for text in texts:
+            SentimentAnalysisModel._hybrid_sentiment_analysis(text)
+    return {'run': run, 'items': len(texts), 'before': reset_caches}
+
+def score_texts(corpus, size):
+    """Hybrid scores of all texts in one batch, as analyze_subreddit does"""
+    from models.sentiment_analysis import SentimentAnalysisModel
+
+    texts = corpus.texts(size)
+    return {'run': lambda: SentimentAnalysisModel.score_texts(texts), 'items': len(texts), 'before': reset_caches}
+
+def comment_sentiment(corpus, size):
+    """Influencer comment sentiment breakdown over comment bodies"""
+    from models.influencer_detection import InfluencerDetectionModel
+
+    bodies = [comment['body'] for comment in corpus.comments(size)]
+    return {
+        'run': lambda: InfluencerDetectionModel.analyze_sentiment(bodies),
+        'items': len(bodies),
+        'before': reset_caches
+    }
+
+def detect_top_influencers(corpus, size):
+    """Aggregate and rank post authors, including the karma lookups of every author"""
+    from models.influencer_detection import InfluencerDetectionModel
+
+    posts = corpus.posts(size)
+    return {
+        'run': lambda: InfluencerDetectionModel.detect_top_influencers(posts, top_k=10),
+        'items': len(posts),
+        'before': reset_caches
+    }
+
+def bot_score_users(corpus, size):
+    """Fetch histories and score users for bot-like behaviour (one user per 100 items, 10 to 100)"""
+    from models.bot_detection import BotDetectionModel
+
+    usernames = [corpus.author_name(i) for i in range(min(max(size // 100, 10), 100))]
+    return {
+        'run': lambda: BotDetectionModel.score_users(usernames),
+        'items': len(usernames),
+        'before': reset_caches
+    }
+
+def trend_data(corpus, size):
+    """History and forecast of get_trend_data (one call per 10 items, at most 1000)"""
+    from models.trend_forecasting import TrendForecastingModel
+
+    subreddits = [corpus.subreddit_name(i) for i in range(min(max(size // 10, 1), 1000))]
+
+    def run():
+        for subreddit in subreddits:
+            TrendForecastingModel.get_trend_data(subreddit, 8, 4)
+    return {'run': run, 'items': len(subreddits)}
+
+def forecast_subreddits(corpus, size):
+    """Batched Holt-Winters forecasts of 24 monthly counts for one series per item"""
+    from models.trend_forecasting import TrendForecastingModel
+
+    rng = np.random.default_rng(corpus.seed)
+    months = np.arange(24)
+    counts = {
+        f"s{i}": (100 + 5 * months + 20 * np.sin(months / 12 * 2 * np.pi) + rng.normal(0, 10, 24)).tolist()
+        for i in range(size)
+    }
+    return {
+        'run': lambda: TrendForecastingModel.forecast_subreddits(counts, 4, "holt_winters"),
+        'items': len(counts)
+    }
+
+def activity_ingest(corpus, size):
+    """Append posts and comments to a fresh activity store"""
+    posts = _by_subreddit(corpus.posts(size))
+    comments = _by_subreddit(corpus.comments(size))
+    state = {}
+
+    def before():
+        state['store'] = _new_store()
+
+    def run():
+        store = state['store']
+        for subreddit, items in posts.items():
+            store.ingest_posts(subreddit, items)
+        for subreddit, items in comments.items():
+            store.ingest_comments(subreddit, items)
+    return {'run': run, 'items': sum(map(len, posts.values())) + sum(map(len, comments.values())), 'before': before}
+
+def activity_read(corpus, size):
+    """Daily activity of every subreddit over 8 months, from a store holding the corpus"""
+    store = _new_store()
+    for subreddit, items in _by_subreddit(corpus.posts(size)).items():
+        store.ingest_posts(subreddit, items)
+    for subreddit, items in _by_subreddit(corpus.comments(size)).items():
+        store.ingest_comments(subreddit, items)
+    subreddits = [corpus.subreddit_name(i) for i in range(corpus.num_subreddits)]
+
+    def run():
+        for subreddit in subreddits:
+            store.activity(subreddit, 8, "day")
+    return {'run': run, 'items': len(subreddits)}
+
+# Benchmark name -> setup function taking (corpus, size)
+MICRO_BENCHMARKS = {
+    'clean_text': clean_text,
+    'hybrid_sentiment': hybrid_sentiment,
+    'score_texts': score_texts,
+    'comment_sentiment': comment_sentiment,
+    'detect_top_influencers': detect_top_influencers,
+    'bot_score_users': bot_score_users,
+    'trend_data': trend_data,
+    'forecast_subreddits': forecast_subreddits,
+    'activity_ingest': activity_ingest,
+    'activity_read': activity_read,
+}
+
+def run_micro(name, corpus, size, repeat=3):
+    """
+    Time one micro-benchmark
+
+    Returns:
+        dict: Run times and per-item throughput
+    """
+    benchmark = MICRO_BENCHMARKS[name](corpus, size)
+    before = benchmark.get('before')
+    times = []
+    for _ in range(repeat):
+        if before:
+            before()
+        # Models fall back to random data in places; keep every run identical
+        random.seed(corpus.seed)
+        np.random.seed(corpus.seed)
+        started = time.perf_counter()
+        benchmark['run']()
+        times.append(time.perf_counter() - started)
+
+    median = statistics.median(times)
+    items = benchmark['items']
+    return {
+        'name': name,
+        'size': size,
+        'items': items,
+        'repeat': repeat,
+        'minSeconds': round(min(times), 6),
+        'medianSeconds': round(median, 6),
+        'itemsPerSecond': round(items / median, 1) if median else None,
+        'usPerItem': round(median / items * 1e6, 2) if items else None
+    }
@@ -0,0 +1,96 @@
+"""
+Throughput and latency of the Flask API routes against the fake backend
+
+Requests go through the Flask test client in-process, so a run measures
+routing, the models and JSON serialization without the network stack.
+Requests cycle through the corpus's subreddits and users, so the
+response caches see a realistic mix of cold and repeated keys.
+"""
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_reddit import reset_caches
+
+# Route -> request body of the i-th request
+ROUTE_PAYLOADS = {
+    '/api/bot/analyze': lambda corpus, i: {'username': corpus.author_name(i)},
+    '/api/bot/subreddit': lambda corpus, i: {'subreddit': corpus.subreddit_name(i)},
+    '/api/influencer/analyze': lambda corpus, i: {'username': corpus.author_name(i)},
+    '/api/influencer/subreddit': lambda corpus, i: {'subreddit': corpus.subreddit_name(i)},
+    '/api/sentiment/subreddit': lambda corpus, i: {'subreddit': corpus.subreddit_name(i)},
+    '/api/trend/data': lambda corpus, i: {'subreddit': corpus.subreddit_name(i)},
+    '/api/trend/activity': lambda corpus, i: {'subreddit': corpus.subreddit_name(i)},
+}
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return round(sorted_values[index], 2)
+
+def ingest_corpus_activity(corpus):
+    """Load the corpus's posts and comments into the activity store, so activity reads hit it"""
+    from models.timeseries_store import get_default_store
+
+    by_subreddit = defaultdict(lambda: ([], []))
+    for post in corpus.posts():
+        by_subreddit[post['subreddit']][0].append(post)
+    for comment in corpus.comments():
+        by_subreddit[comment['subreddit']][1].append(comment)
+
+    store = get_default_store()
+    for subreddit, (posts, comments) in by_subreddit.items():
+        store.ingest_posts(subreddit, posts)
+        store.ingest_comments(subreddit, comments)
+
+def run_route(app, reddit, route, requests=50, concurrency=4):
+    """
+    Fire requests at one route from `concurrency` threads
+
+    Args:
+        app (Flask): The application
+        reddit (FakeReddit): The installed backend, for counting Reddit calls
+        route (str): One of ROUTE_PAYLOADS
+        requests (int): Number of requests
+        concurrency (int): Number of client threads
+
+    Returns:
+        dict: Throughput, latency percentiles, errors and Reddit calls per request
+    """
+    reset_caches()
+    payloads = [ROUTE_PAYLOADS[route](reddit.corpus, i) for i in range(requests)]
+    local = threading.local()
+
+    def send(payload):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        started = time.perf_counter()
+        response = client.post(route, json=payload)
+        response.get_data()
+        return response.status_code == 200, (time.perf_counter() - started) * 1000
+
+    calls_before = sum(reddit.calls.values())
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, payloads))
+    elapsed = time.perf_counter() - started
+    reddit_calls = sum(reddit.calls.values()) - calls_before
+
+    latencies = sorted(ms for ok, ms in results if ok)
+    return {
+        'route': route,
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': sum(1 for ok, _ in results if not ok),
+        'seconds': round(elapsed, 4),
+        'throughputRps': round(requests / elapsed, 2) if elapsed else None,
+        'meanMs': round(sum(latencies) / len(latencies), 2) if latencies else None,
+        'p50Ms': _percentile(latencies, 0.5),
+        'p90Ms': _percentile(latencies, 0.9),
+        'p99Ms': _percentile(latencies, 0.99),
+        'maxMs': round(latencies[-1], 2) if latencies else None,
+        'redditCallsPerRequest': round(reddit_calls / requests, 2) if requests else None
+    }
@@ -0,0 +1,143 @@
+"""
+End-to-end benchmark suite: model micro-benchmarks and API route load
+
+Runs every model against a deterministic fake Reddit backend serving
+synthetic corpora, so timings measure the code rather than the network
+or random mock data, and writes the results to JSON:
+
+    cd backend
+    python -m benchmarks.run --sizes 100,1000,10000 --output results.json
+    python -m benchmarks.run --sizes 1000000 --micro clean_text,score_texts --routes none
+    python -m benchmarks.run --output new.json --baseline results.json
+
+With --baseline, exits with status 1 if any benchmark got slower by more
+than --tolerance (see benchmarks.compare).
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Isolated on-disk state, no startup warm-up, no per-request logging, no rate
+# limit against the fake backend, and no reuse of finished or precomputed
+# route results (identical concurrent requests are still coalesced)
+BENCHMARK_ENVIRONMENT = {
+    'TRENDLENS_WARMUP': 'none',
+    'TRENDLENS_LOG_LEVEL': 'WARNING',
+    'TRENDLENS_LATENCY_MODE': 'none',
+    'TRENDLENS_REDDIT_RPM': '0',
+    'TRENDLENS_COALESCE_TTL': '0',
+    'TRENDLENS_PRECOMPUTE_SUBREDDITS': '',
+    'TRENDLENS_PRECOMPUTE_WATCHLIST': '',
+}
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def _names(value, available):
+    if value == 'all':
+        return list(available)
+    if value == 'none':
+        return []
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise SystemExit(f"Unknown benchmarks: {', '.join(unknown)}; expected some of {', '.join(available)}")
+    return names
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the models and API routes against a fake Reddit backend")
+    parser.add_argument('--sizes', default='100,1000,10000', help="Comma-separated corpus sizes (posts and comments each)")
+    parser.add_argument('--micro', default='all', help="Comma-separated micro-benchmarks, 'all' or 'none'")
+    parser.add_argument('--routes', default='all', help="Comma-separated API routes, 'all' or 'none'")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per micro-benchmark; the median is reported")
+    parser.add_argument('--route-size', type=int, default=10000, help="Corpus size served to the route benchmarks")
+    parser.add_argument('--requests', type=int, default=50, help="Requests per route")
+    parser.add_argument('--concurrency', type=int, default=4, help="Concurrent clients per route")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Simulated Reddit API latency per call")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="Write the results to a JSON file")
+    parser.add_argument('--baseline', help="Earlier results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="Allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    data_dir = None
+    if 'TRENDLENS_DATA_DIR' not in os.environ:
+        data_dir = os.environ['TRENDLENS_DATA_DIR'] = tempfile.mkdtemp(prefix="trendlens-bench-")
+    for name, value in BENCHMARK_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+
+    # Imported after the environment is set, since models read it at import
+    from benchmarks.corpus import SyntheticCorpus
+    from benchmarks.fake_reddit import FakeReddit, install
+    from benchmarks.micro import MICRO_BENCHMARKS, run_micro
+    from benchmarks.routes import ROUTE_PAYLOADS, ingest_corpus_activity, run_route
+
+    micro_names = _names(args.micro, MICRO_BENCHMARKS)
+    route_names = _names(args.routes, ROUTE_PAYLOADS)
+    sizes = [int(float(size)) for size in args.sizes.split(',') if size.strip()]
+
+    results = {
+        'meta': {
+            'startedAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'gitCommit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpuCount': os.cpu_count(),
+            'seed': args.seed,
+            'latencyMs': args.latency_ms,
+        },
+        'micro': [],
+        'routes': [],
+    }
+
+    try:
+        for size in sizes if micro_names else []:
+            corpus = SyntheticCorpus(posts=size, seed=args.seed)
+            install(FakeReddit(corpus, args.latency_ms))
+            for name in micro_names:
+                result = run_micro(name, corpus, size, args.repeat)
+                results['micro'].append(result)
+                print(json.dumps(result), flush=True)
+
+        if route_names:
+            corpus = SyntheticCorpus(posts=args.route_size, seed=args.seed)
+            reddit = FakeReddit(corpus, args.latency_ms)
+            install(reddit)
+            ingest_corpus_activity(corpus)
+
+            from app import app
+            for route in route_names:
+                result = run_route(app, reddit, route, args.requests, args.concurrency)
+                result['corpusSize'] = args.route_size
+                results['routes'].append(result)
+                print(json.dumps(result), flush=True)
+    finally:
+        if data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        from benchmarks.compare import compare, print_comparison
+
+        with open(args.baseline) as f:
+            rows = compare(json.load(f), results, args.tolerance)
+        print_comparison(rows)
+        if any(row['regression'] for row in rows):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
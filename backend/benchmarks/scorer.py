@@ -0,0 +1,176 @@
+"""
+Benchmark and equivalence check of the single-pass hybrid sentiment scorer
+
+Scores a deterministic synthetic corpus with HybridScorer and with the
+three original analyzers run separately (TfidfVectorizer.transform plus
+the classifier, VADER's polarity_scores and TextBlob), checks that every
+score is identical for each component configuration, and reports the
+time both take:
+
+    cd backend
+    python -m benchmarks.scorer --texts 20000 --output scorer.json
+
+Exits with status 1 if any score differs.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+import numpy as np
+from textblob import TextBlob
+
+# Words the corpus is built from besides the VADER and pattern lexicons:
+# negations, boosters and the other words the analyzers treat specially
+SPECIAL_WORDS = [
+    "not", "never", "no", "least", "at", "very", "so", "this", "kind", "of", "but",
+    "really", "extremely", "barely", "sort", "quite", "totally", "without", "nothing",
+]
+FILLER_WORDS = [
+    "subreddit", "post", "thread", "update", "guide", "release", "game", "team", "week",
+    "people", "thing", "time", "question", "answer", "mod", "comment", "version", "a",
+]
+# Raw-text decorations; cleaning strips most of them, the rest exercise the fallback paths
+DECORATIONS = ["!", "!!", "?", "??", "...", ",", ":)", ":(", "<3", "n't", "'s", "café", "naïve", "2024", "#tag"]
+
+def build_corpus(count, seed=1):
+    """
+    Deterministic mix of post-like texts
+
+    Returns:
+        list: Raw texts; most are cleaned before scoring, as in production
+    """
+    from models.sentiment_analysis import SentimentAnalysisModel
+    from textblob.en import sentiment as pattern_sentiment
+
+    rng = random.Random(seed)
+    sid = SentimentAnalysisModel._get_sid()
+    "good" in pattern_sentiment  # loads the lexicon
+    lexicon_words = sorted(word for word in sid.lexicon if word.isalpha())
+    pattern_words = sorted(word for word in dict.keys(pattern_sentiment) if word.isalpha())
+
+    texts = []
+    for _ in range(count):
+        words = []
+        for _ in range(rng.randint(1, 20)):
+            pick = rng.random()
+            if pick < 0.25:
+                word = rng.choice(lexicon_words)
+            elif pick < 0.45:
+                word = rng.choice(pattern_words)
+            elif pick < 0.65:
+                word = rng.choice(SPECIAL_WORDS)
+            else:
+                word = rng.choice(FILLER_WORDS)
+            if rng.random() < 0.05:
+                word = word.upper()
+            if rng.random() < 0.1:
+                word += rng.choice(DECORATIONS)
+            words.append(word)
+        # Repeated words exercise VADER's first-position lookup
+        if rng.random() < 0.2:
+            words.append(rng.choice(words))
+        texts.append(" ".join(words))
+    return texts
+
+def reference_scores(texts, vectorizer, classifier, sid, components):
+    """The component scores computed the original way, one analyzer at a time"""
+    count = len(texts)
+    columns = {
+        'ml': np.zeros(count),
+        'vader': np.zeros(count),
+        'textblob': np.zeros(count),
+    }
+    if "ml" in components and vectorizer is not None and classifier is not None and count:
+        columns['ml'] = classifier.predict(vectorizer.transform(texts)).astype(float)
+    if "vader" in components:
+        columns['vader'] = np.array([sid.polarity_scores(text)['compound'] for text in texts], dtype=float)
+    if "textblob" in components:
+        columns['textblob'] = np.array([TextBlob(text).sentiment.polarity for text in texts], dtype=float)
+    return columns
+
+def legacy_combined(columns, ml_available):
+    """The combined score exactly as the three-analyzer implementation computed it"""
+    if ml_available:
+        return (0.4 * columns['ml']) + (0.3 * columns['vader']) + (0.3 * columns['textblob'])
+    return (0.5 * columns['vader']) + (0.5 * columns['textblob'])
+
+def _mismatches(expected, actual):
+    return int(np.count_nonzero(expected != actual))
+
+def run(texts, components, repeat=3):
+    """
+    Time and compare both implementations for one component configuration
+
+    Returns:
+        dict: Timings, speedup and the number of differing scores per column
+    """
+    from models.hybrid_scorer import HybridScorer
+    from models.sentiment_analysis import SentimentAnalysisModel
+
+    SentimentAnalysisModel._initialize_ml_model()
+    vectorizer, classifier = SentimentAnalysisModel._vectorizer, SentimentAnalysisModel._ml_model
+    sid = SentimentAnalysisModel._get_sid()
+    scorer = HybridScorer(vectorizer, classifier, sid, components)
+
+    reference_seconds = []
+    single_pass_seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        expected = reference_scores(texts, vectorizer, classifier, sid, scorer.components)
+        reference_seconds.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        actual, _ = scorer.score(texts)
+        single_pass_seconds.append(time.perf_counter() - started)
+
+    mismatches = {name: _mismatches(expected[name], actual[name]) for name in expected}
+    if set(scorer.components) >= {"vader", "textblob"}:
+        # Only these configurations existed before, so only they have a reference combined score
+        mismatches['sentimentScore'] = _mismatches(
+            legacy_combined(expected, scorer.ml_available), actual['sentimentScore']
+        )
+
+    reference, single_pass = min(reference_seconds), min(single_pass_seconds)
+    return {
+        'components': list(scorer.components),
+        'texts': len(texts),
+        'referenceSeconds': round(reference, 4),
+        'singlePassSeconds': round(single_pass, 4),
+        'speedup': round(reference / single_pass, 2) if single_pass else None,
+        'textsPerSecond': round(len(texts) / single_pass) if single_pass else None,
+        'mismatches': mismatches,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the single-pass sentiment scorer against the original analyzers")
+    parser.add_argument('--texts', type=int, default=5000, help="Corpus size")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per configuration; the fastest is reported")
+    parser.add_argument('--raw', action='store_true', help="Score the raw texts instead of cleaned ones")
+    parser.add_argument('--output', help="Write the results to a JSON file")
+    args = parser.parse_args()
+
+    from models.hybrid_scorer import COMPONENTS
+    from models.sentiment_analysis import SentimentAnalysisModel
+
+    texts = build_corpus(args.texts, args.seed)
+    if not args.raw:
+        texts = SentimentAnalysisModel._text_cleaner.clean_many(texts)
+
+    configurations = [COMPONENTS, ("vader", "textblob"), ("ml",), ("vader",), ("textblob",)]
+    results = [run(texts, components, args.repeat) for components in configurations]
+    for result in results:
+        print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if any(any(result['mismatches'].values()) for result in results):
+        print("Single-pass scores differ from the original analyzers", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Local load-test harness comparing the sync (Flask) and async (ASGI) serving modes
+
+Starts each server on a local port, fires concurrent requests at one API
+route and reports throughput and latency percentiles:
+
+    cd backend
+    TRENDLENS_LATENCY_MODE=simulated python loadtest.py --mode both --concurrency 32 --requests 200
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SERVER_COMMANDS = {
+    'sync': lambda port: [sys.executable, '-c', f"from app import app; app.run(port={port}, threaded=False)"],
+    'async': lambda port: [sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', str(port), '--log-level', 'warning'],
+}
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _wait_until_ready(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"{base_url}/api/startup", timeout=1)
+            return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become ready in {timeout}s")
+
+def _post(url, payload):
+    started = time.perf_counter()
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode('utf-8'), headers={'Content-Type': 'application/json'}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            response.read()
+            ok = response.status == 200
+    except (urllib.error.URLError, ConnectionError, OSError):
+        ok = False
+    return ok, (time.perf_counter() - started) * 1000
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return round(sorted_values[index], 1)
+
+def run_load(base_url, route, payload, concurrency, requests):
+    """
+    Fire requests at one route with a fixed number of concurrent clients
+
+    Returns:
+        dict: Throughput, error count and latency percentiles in milliseconds
+    """
+    url = f"{base_url}{route}"
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(lambda _: _post(url, payload), range(requests)))
+    wall_seconds = time.perf_counter() - started
+
+    latencies = sorted(latency for ok, latency in outcomes if ok)
+    return {
+        'route': route,
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': sum(1 for ok, _ in outcomes if not ok),
+        'wallSeconds': round(wall_seconds, 3),
+        'requestsPerSecond': round(len(latencies) / wall_seconds, 2) if wall_seconds else None,
+        'p50Ms': _percentile(latencies, 0.50),
+        'p95Ms': _percentile(latencies, 0.95),
+        'p99Ms': _percentile(latencies, 0.99),
+    }
+
+def run_mode(mode, args):
+    """Start a server in the given serving mode, load it and shut it down"""
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        SERVER_COMMANDS[mode](port), cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_until_ready(base_url)
+        # Warm the route so model loading is not measured
+        _post(f"{base_url}{args.route}", json.loads(args.payload))
+        result = run_load(base_url, args.route, json.loads(args.payload), args.concurrency, args.requests)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    result['mode'] = mode
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the sync and async serving modes under load")
+    parser.add_argument('--mode', choices=['sync', 'async', 'both'], default='both')
+    parser.add_argument('--url', help="Load an already running server instead of starting one")
+    parser.add_argument('--route', default='/api/trend/data')
+    parser.add_argument('--payload', default='{"subreddit": "python"}', help="JSON request body")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--output', help="Write the results to a JSON file")
+    args = parser.parse_args()
+
+    if args.url:
+        results = [run_load(args.url.rstrip('/'), args.route, json.loads(args.payload), args.concurrency, args.requests)]
+    else:
+        modes = ['sync', 'async'] if args.mode == 'both' else [args.mode]
+        results = [run_mode(mode, args) for mode in modes]
+
+    for result in results:
+        print(json.dumps(result))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Model name -> (module, class); modules are only imported on first use
+MODEL_REGISTRY = {
+    'bot': ('models.bot_detection', 'BotDetectionModel'),
+    'influencer': ('models.influencer_detection', 'InfluencerDetectionModel'),
+    'sentiment': ('models.sentiment_analysis', 'SentimentAnalysisModel'),
+    'trend': ('models.trend_forecasting', 'TrendForecastingModel'),
+}
+
+_loaded_models = {}
+_load_lock = threading.Lock()
+
+# Model name -> milliseconds spent importing and warming it up
+startup_times = {}
+
+def get_model(name):
+    """
+    Return a model class, importing its module and heavy dependencies on first use
+
+    Args:
+        name (str): One of the MODEL_REGISTRY keys
+
+    Returns:
+        type: The model class
+    """
+    model = _loaded_models.get(name)
+    if model is not None:
+        return model
+
+    with _load_lock:
+        model = _loaded_models.get(name)
+        if model is None:
+            module_name, class_name = MODEL_REGISTRY[name]
+            started = time.perf_counter()
+            model = getattr(importlib.import_module(module_name), class_name)
+            startup_times[name] = round((time.perf_counter() - started) * 1000, 1)
+            logger.info("Loaded %s in %s ms", module_name, startup_times[name])
+            _loaded_models[name] = model
+    return model
+
+def warm_up(names):
+    """Load the named models and run their warm-up hooks, timing each one"""
+    for name in names:
+        started = time.perf_counter()
+        model = get_model(name)
+        if hasattr(model, 'warm_up'):
+            model.warm_up()
+        startup_times[f'{name}.warm_up'] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info("Warmed up %s model in %s ms", name, startup_times[f'{name}.warm_up'])
+
+def warm_up_in_background(names):
+    """Warm up models on a daemon thread so the worker can accept requests immediately"""
+    thread = threading.Thread(target=warm_up, args=(names,), name="model-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def startup_report():
+    """Return per-model load times and which models are loaded"""
+    return {
+        'loaded': sorted(_loaded_models),
+        'timesMs': dict(startup_times)
+    }
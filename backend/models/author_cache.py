@@ -0,0 +1,110 @@
+import logging
+import os
+from models.cache import TTLCache
+from models.fetch_scheduler import get_default_scheduler
+from models.metrics import cache_samples, metrics
+from models.reddit_client import RedditClient
+
+logger = logging.getLogger(__name__)
+
+class AuthorProfileCache:
+    """
+    Cross-request cache of Reddit author profiles (karma and account age)
+
+    Successful lookups live for `ttl` seconds. Failed lookups are cached
+    for the shorter `negative_ttl` so a missing or suspended account is not
+    fetched again on every request.
+    """
+
+    _FAILED = object()
+
+    def __init__(self, fetch_profile=None, maxsize=None, ttl=None, negative_ttl=None, scheduler=None):
+        """
+        Args:
+            fetch_profile (callable): Fetches one profile by username, defaults to RedditClient.fetch_user_profile
+            maxsize (int): Maximum cached authors, defaults to TRENDLENS_AUTHOR_CACHE_SIZE or 10000
+            ttl (float): Profile lifetime in seconds, defaults to TRENDLENS_AUTHOR_CACHE_TTL or 3600
+            negative_ttl (float): Failure lifetime in seconds, defaults to TRENDLENS_AUTHOR_CACHE_NEGATIVE_TTL or 60
+            scheduler (FetchScheduler): Pool used by get_many, defaults to the shared scheduler
+        """
+        if maxsize is None:
+            maxsize = int(os.environ.get("TRENDLENS_AUTHOR_CACHE_SIZE", 10000))
+        if ttl is None:
+            ttl = float(os.environ.get("TRENDLENS_AUTHOR_CACHE_TTL", 3600))
+        if negative_ttl is None:
+            negative_ttl = float(os.environ.get("TRENDLENS_AUTHOR_CACHE_NEGATIVE_TTL", 60))
+
+        self.fetch_profile = fetch_profile or RedditClient.fetch_user_profile
+        self.negative_ttl = negative_ttl
+        self._scheduler = scheduler
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def _key(username):
+        return username.lower()
+
+    def _load(self, username):
+        """Fetch and cache one profile, caching a failure marker on error"""
+        try:
+            profile = self.fetch_profile(username)
+        except Exception as e:
+            logger.warning("Error fetching profile for user %s: %s", username, e)
+            self._cache.set(self._key(username), self._FAILED, ttl=self.negative_ttl)
+            return None
+        self._cache.set(self._key(username), profile)
+        return profile
+
+    def get(self, username):
+        """
+        Look up one author profile
+
+        Args:
+            username (str): The Reddit username
+
+        Returns:
+            dict: The profile, or None if the lookup failed recently
+        """
+        profile = self._cache.get(self._key(username), None)
+        if profile is None:
+            return self._load(username)
+        return None if profile is self._FAILED else profile
+
+    def get_many(self, usernames):
+        """
+        Look up many author profiles, fetching the misses in parallel
+
+        Args:
+            usernames (iterable): Reddit usernames, duplicates allowed
+
+        Returns:
+            dict: Username to profile, or to None for failed lookups
+        """
+        profiles = {}
+        missing = []
+        for username in dict.fromkeys(usernames):
+            profile = self._cache.get(self._key(username), None)
+            if profile is None:
+                missing.append(username)
+            else:
+                profiles[username] = None if profile is self._FAILED else profile
+
+        if missing:
+            scheduler = self._scheduler or get_default_scheduler()
+            for username, profile in zip(missing, scheduler.map(self._load, missing)):
+                profiles[username] = profile
+
+        return profiles
+
+    def invalidate(self, username):
+        self._cache.delete(self._key(username))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        """Return hit, miss and eviction counters"""
+        return self._cache.stats()
+
+# Shared by every model so karma is reused across requests and subreddits
+author_profiles = AuthorProfileCache()
+metrics.add_collector(lambda: cache_samples('author_profiles', author_profiles.stats()))
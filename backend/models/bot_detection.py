@@ -1,73 +1,278 @@
 
+import logging
+import os
+import queue
 import random
-import time
+import threading
+import numpy as np
+from models.cache import TTLCache
+from models.latency import LatencyBudget
+from models.metrics import mock_fallback, timed
+from models.reddit_client import RedditClient
+from models.author_cache import author_profiles
+from models.fetch_scheduler import get_default_scheduler
+from models.ingestion import live_aggregates
+from models.bot_features import (
+    CRITERIA, MAX_CRITERION_SCORE, NEUTRAL_SCORE, build_feature_matrix, criteria_details, score_feature_matrix
+)
+
+logger = logging.getLogger(__name__)
 
 class BotDetectionModel:
     """
     Model for detecting bot accounts on Reddit
     """
     
+    CRITERIA = CRITERIA
+    
+    # Raw feature rows of recently scored users, keyed by lowercased username;
+    # live bot screening scores from these instead of calling Reddit
+    _feature_cache = TTLCache(
+        maxsize=int(os.environ.get("TRENDLENS_BOT_FEATURE_CACHE_SIZE", 10000)),
+        ttl=float(os.environ.get("TRENDLENS_BOT_FEATURE_TTL", 3600))
+    )
+    _refresh_queue = queue.Queue()
+    _refreshing = set()
+    _refresher = None
+    _refresh_lock = threading.Lock()
+    
+    @staticmethod
+    def _criteria_details():
+        """Generate a random score for each bot criterion"""
+        return [
+            {"criteriaName": criteria_name, "score": round(random.random() * 5, 2), "maxScore": 5}
+            for criteria_name in BotDetectionModel.CRITERIA
+        ]
+    
+    @staticmethod
+    def _fetch_history(username):
+        """Fetch a user's recent activity, or None if it is unavailable"""
+        try:
+            return RedditClient.get_user_history(username)
+        except Exception as e:
+            logger.warning("Error fetching history for user %s: %s", username, e)
+            return None
+    
+    @staticmethod
+    def score_users(usernames, budget=None):
+        """
+        Score many users on the bot criteria in one batch
+        
+        Profiles and histories are fetched in parallel, one scheduler-sized
+        chunk at a time; the latency budget is checked between chunks and
+        only the users fetched so far are scored when it runs out.
+        
+        Args:
+            usernames (iterable): Reddit usernames
+            budget (LatencyBudget): Latency policy, defaults to the configured one
+            
+        Returns:
+            list: Bot detection score details of each scored user, in input order
+        """
+        budget = budget or LatencyBudget.from_config()
+        usernames = [username for username in dict.fromkeys(usernames) if username]
+        scheduler = get_default_scheduler()
+        
+        fetched = []
+        histories = []
+        for start in range(0, len(usernames), scheduler.max_workers):
+            if budget.exhausted():
+                break
+            chunk = usernames[start:start + scheduler.max_workers]
+            fetched.extend(chunk)
+            histories.extend(scheduler.map(BotDetectionModel._fetch_history, chunk))
+        
+        if not fetched:
+            return []
+        
+        profiles = author_profiles.get_many(fetched)
+        with timed("aggregate"):
+            features = build_feature_matrix(
+                [profiles.get(username) for username in fetched], histories, usernames=fetched
+            )
+        
+        for username, history, row in zip(fetched, histories, features):
+            if history is not None:
+                BotDetectionModel._feature_cache.set(username.lower(), row)
+        
+        return BotDetectionModel._score_features(fetched, features)
+    
     @staticmethod
-    def analyze_user(username):
+    def _score_features(usernames, features):
+        """Score a raw feature matrix, one row per username"""
+        with timed("aggregate"):
+            criteria, overall = score_feature_matrix(features)
+        
+        return [{
+            "username": username,
+            "score": int(score),
+            "details": criteria_details(row)
+        } for username, score, row in zip(usernames, overall, criteria)]
+    
+    @staticmethod
+    def score_cached(usernames):
+        """
+        Score the users whose features are cached, without calling Reddit
+        
+        Args:
+            usernames (iterable): Reddit usernames
+            
+        Returns:
+            tuple: Score details of the cached users in input order, and the usernames not cached
+        """
+        cached, rows, missing = [], [], []
+        for username in dict.fromkeys(usernames):
+            if not username:
+                continue
+            row = BotDetectionModel._feature_cache.get(username.lower())
+            if row is None:
+                missing.append(username)
+            else:
+                cached.append(username)
+                rows.append(row)
+        
+        if not cached:
+            return [], missing
+        return BotDetectionModel._score_features(cached, np.vstack(rows)), missing
+    
+    @classmethod
+    def refresh_in_background(cls, usernames):
+        """
+        Queue users to be fetched and scored on a background thread, caching their features
+        
+        Users already queued are skipped. The fetches share the scheduler's
+        request budget with everything else.
+        
+        Args:
+            usernames (iterable): Reddit usernames
+        """
+        with cls._refresh_lock:
+            usernames = [username for username in usernames if username.lower() not in cls._refreshing]
+            if not usernames:
+                return
+            cls._refreshing.update(username.lower() for username in usernames)
+            if cls._refresher is None:
+                cls._refresher = threading.Thread(target=cls._refresh_pending, name="bot-features", daemon=True)
+                cls._refresher.start()
+        cls._refresh_queue.put(usernames)
+    
+    @classmethod
+    def _refresh_pending(cls):
+        while True:
+            usernames = cls._refresh_queue.get()
+            try:
+                cls.score_users(usernames, LatencyBudget())
+            except Exception as e:
+                logger.warning("Error refreshing bot features of %d users: %s", len(usernames), e)
+            finally:
+                with cls._refresh_lock:
+                    cls._refreshing.difference_update(username.lower() for username in usernames)
+                cls._refresh_queue.task_done()
+    
+    @classmethod
+    def clear_feature_cache(cls):
+        cls._feature_cache.clear()
+    
+    @staticmethod
+    def analyze_user(username, budget=None):
         """
         Analyze a username to determine if it's likely a bot
         
         Args:
             username (str): The Reddit username to analyze
+            budget (LatencyBudget): Latency policy, defaults to the configured one
             
         Returns:
             dict: Bot detection score details
         """
-        print(f"Analyzing user {username} for bot behavior")
-        
-        # Simulate API delay
-        time.sleep(1)
-        
-        # Generate random details
-        details = [
-            {"criteriaName": "Account Age", "score": round(random.random() * 5, 2), "maxScore": 5},
-            {"criteriaName": "Comment Patterns", "score": round(random.random() * 5, 2), "maxScore": 5},
-            {"criteriaName": "Post Frequency", "score": round(random.random() * 5, 2), "maxScore": 5},
-            {"criteriaName": "Content Diversity", "score": round(random.random() * 5, 2), "maxScore": 5},
-            {"criteriaName": "Interaction Ratio", "score": round(random.random() * 5, 2), "maxScore": 5},
-        ]
+        logger.info("Analyzing user %s for bot behavior", username)
+        budget = budget or LatencyBudget.from_config()
         
-        return {
-            "username": username,
-            "score": int(random.random() * 40) + 60,  # Random score between 60-100
-            "details": details
-        }
+        budget.simulate("bot.analyze_user")
+        
+        if RedditClient.get_instance() is None:
+            logger.warning("Reddit API unavailable, using mock bot score")
+            mock_fallback("bot.user")
+            return {
+                "username": username,
+                "score": int(random.random() * 40) + 60,  # Random score between 60-100
+                "details": BotDetectionModel._criteria_details()
+            }
+        
+        results = BotDetectionModel.score_users([username], budget)
+        if not results:
+            # The latency budget ran out before the user was fetched: no evidence either way
+            return {
+                "username": username,
+                "score": int(NEUTRAL_SCORE / MAX_CRITERION_SCORE * 100),
+                "details": criteria_details([NEUTRAL_SCORE] * len(CRITERIA))
+            }
+        return results[0]
     
     @staticmethod
-    def get_subreddit_bots(subreddit):
+    def get_subreddit_bots(subreddit, budget=None, top_k=10, post_limit=100):
         """
-        Get a list of potential bots in a subreddit
+        Rank the authors of a subreddit's newest posts by bot score
+        
+        Subreddits followed by the ingestion worker rank their `post_limit`
+        most recently active streamed authors instead. Those are scored from
+        cached features without calling Reddit; authors not cached yet are
+        fetched in the background for later reads. Only when none of them is
+        cached are they fetched and scored on the request.
         
         Args:
             subreddit (str): The subreddit to analyze
+            budget (LatencyBudget): Latency policy, defaults to the configured one
+            top_k (int): Number of highest scoring authors to return
+            post_limit (int): Number of newest posts whose authors are scored
             
         Returns:
             list: List of potential bots with their scores
         """
-        print(f"Finding bots in r/{subreddit}")
+        logger.info("Finding bots in r/%s", subreddit)
+        budget = budget or LatencyBudget.from_config()
+        
+        budget.simulate("bot.get_subreddit_bots")
         
-        # Simulate API delay
-        time.sleep(1.5)
+        # Screen the streamed recent authors when the subreddit is being ingested
+        authors = live_aggregates.recent_authors(subreddit)
+        if authors:
+            authors = authors[:post_limit]
+            results, missing = BotDetectionModel.score_cached(authors)
+            if not results:
+                results = BotDetectionModel.score_users(authors, budget)
+            elif missing:
+                BotDetectionModel.refresh_in_background(missing)
+        else:
+            try:
+                if RedditClient.get_instance() is None:
+                    raise RuntimeError("Reddit API unavailable")
+                posts = RedditClient.get_posts(subreddit, 'new', post_limit)
+            except Exception as e:
+                logger.warning("Error fetching posts from r/%s: %s; using mock bot data", subreddit, e)
+                mock_fallback("bot.subreddit")
+                return BotDetectionModel._mock_subreddit_bots(budget)
+            
+            authors = [post['author'] for post in posts if post['author']]
+            results = BotDetectionModel.score_users(authors, budget)
         
-        # Generate 3-5 random bot accounts
+        results.sort(key=lambda result: result["score"], reverse=True)
+        logger.info("Scored %d authors in r/%s", len(results), subreddit)
+        return results[:top_k]
+    
+    @staticmethod
+    def _mock_subreddit_bots(budget):
+        """Generate 3-5 random bot accounts for when Reddit is unavailable"""
         bot_count = random.randint(3, 5)
         bot_prefixes = ["AutoMod", "NewsBot", "RepostBot", "ModeratorBot", "AnalyticsBot", "TrendBot"]
         results = []
         
         for i in range(bot_count):
+            if budget.exhausted():
+                break
+            
             username = f"{bot_prefixes[i % len(bot_prefixes)]}{random.randint(1, 10000)}"
-            details = [
-                {"criteriaName": "Account Age", "score": round(random.random() * 5, 2), "maxScore": 5},
-                {"criteriaName": "Comment Patterns", "score": round(random.random() * 5, 2), "maxScore": 5},
-                {"criteriaName": "Post Frequency", "score": round(random.random() * 5, 2), "maxScore": 5},
-                {"criteriaName": "Content Diversity", "score": round(random.random() * 5, 2), "maxScore": 5},
-                {"criteriaName": "Interaction Ratio", "score": round(random.random() * 5, 2), "maxScore": 5},
-            ]
+            details = BotDetectionModel._criteria_details()
             
             results.append({
                 "username": username,
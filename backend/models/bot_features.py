@@ -0,0 +1,159 @@
+import math
+import time
+from collections import Counter
+
+import numpy as np
+from models.near_duplicate import get_default_index
+
+# The five bot criteria reported to the frontend, in display order
+CRITERIA = ["Account Age", "Comment Patterns", "Post Frequency", "Content Diversity", "Interaction Ratio"]
+
+# Columns of the raw feature matrix built by build_feature_matrix
+RAW_FEATURES = [
+    "account_age_days",     # NaN when the profile could not be fetched
+    "comments",
+    "repeated_items",       # posts and comments near-duplicating an earlier one of the user or another author's
+    "activities",           # posts + comments
+    "active_span_days",     # time between the oldest and newest activity
+    "subreddit_evenness",   # normalized entropy of activity across subreddits, NaN below 2 activities
+    "reply_comments",       # comments replying to another comment rather than a post
+]
+
+MAX_CRITERION_SCORE = 5
+# Criterion score given when a user's history holds no evidence either way
+NEUTRAL_SCORE = MAX_CRITERION_SCORE / 2
+# Relative weight of each criterion in the overall 0-100 score
+CRITERIA_WEIGHTS = np.full(len(CRITERIA), 1 / len(CRITERIA))
+
+# Accounts older than this get no account age score
+AGE_SATURATION_DAYS = 730
+# Posting this many times a day or more gets the full post frequency score
+RATE_SATURATION_PER_DAY = 50
+# Subreddit entropy is normalized against at most this many equally used subreddits
+DIVERSITY_SUBREDDITS = 10
+
+def _subreddit_evenness(subreddits):
+    if len(subreddits) < 2:
+        return math.nan
+    counts = np.array(list(Counter(name.lower() for name in subreddits).values()), dtype=float)
+    probabilities = counts / counts.sum()
+    entropy = -(probabilities * np.log(probabilities)).sum()
+    return entropy / math.log(min(len(subreddits), DIVERSITY_SUBREDDITS))
+
+def _history_items(history):
+    """(doc_id, text, subreddit, created_utc) of a user's posts and comments, oldest first"""
+    items = [(f"t3_{post['id']}", post['title'], post['subreddit'], post['created_utc']) for post in history['posts']]
+    items += [(f"t1_{comment['id']}", comment['body'], comment['subreddit'], comment['created_utc'])
+              for comment in history['comments']]
+    items.sort(key=lambda item: item[3])
+    return items
+
+def extract_features(profile, history, now=None, username=None, index=None):
+    """
+    Raw feature vector of one user
+
+    Args:
+        profile (dict): Author profile with 'created_utc', or None if unavailable
+        history (dict): 'posts' and 'comments' as returned by RedditClient.get_user_history, or None
+        now (float): Reference UTC timestamp, defaults to the current time
+        username (str): The user, so their own content is not counted as another author's
+        index (NearDuplicateIndex): Content index the history is added to and
+            checked against, defaults to the shared index
+
+    Returns:
+        list: Values in RAW_FEATURES order
+    """
+    now = time.time() if now is None else now
+    posts = history['posts'] if history else []
+    comments = history['comments'] if history else []
+
+    account_age_days = (now - profile['created_utc']) / 86400 if profile else math.nan
+
+    index = get_default_index() if index is None else index
+    repeated_items = index.count_repeated(username, _history_items(history)) if history else 0
+
+    timestamps = [item['created_utc'] for item in posts] + [item['created_utc'] for item in comments]
+    active_span_days = (max(timestamps) - min(timestamps)) / 86400 if timestamps else 0.0
+
+    subreddits = [item['subreddit'] for item in posts] + [item['subreddit'] for item in comments]
+
+    return [
+        account_age_days,
+        len(comments),
+        repeated_items,
+        len(timestamps),
+        active_span_days,
+        _subreddit_evenness(subreddits),
+        sum(1 for comment in comments if comment.get('is_reply')),
+    ]
+
+def build_feature_matrix(profiles, histories, now=None, usernames=None, index=None):
+    """
+    Stack the raw features of many users into one matrix
+
+    Args:
+        profiles (list): Author profiles (or None), one per user
+        histories (list): User histories (or None), one per user
+        now (float): Reference UTC timestamp shared by every row
+        usernames (list): The users, one per row
+        index (NearDuplicateIndex): Content index, defaults to the shared index
+
+    Returns:
+        numpy.ndarray: (n_users, len(RAW_FEATURES)) float matrix
+    """
+    now = time.time() if now is None else now
+    usernames = usernames or [None] * len(profiles)
+    rows = [
+        extract_features(profile, history, now, username, index)
+        for profile, history, username in zip(profiles, histories, usernames)
+    ]
+    return np.array(rows, dtype=float).reshape(len(rows), len(RAW_FEATURES))
+
+def score_feature_matrix(features):
+    """
+    Score every user of a raw feature matrix on the five bot criteria at once
+
+    Each criterion scores 0 (human-like) to 5 (bot-like):
+
+    - Account Age: young accounts, on a log scale up to AGE_SATURATION_DAYS
+    - Comment Patterns: share of posts and comments near-duplicating an earlier
+      one of the user or another author's (see models.near_duplicate)
+    - Post Frequency: activities per active day, on a log scale up to RATE_SATURATION_PER_DAY
+    - Content Diversity: activity concentrated in few subreddits
+    - Interaction Ratio: comments that never reply to anyone
+
+    Args:
+        features (numpy.ndarray): (n_users, len(RAW_FEATURES)) matrix from build_feature_matrix
+
+    Returns:
+        tuple: (n_users, 5) criterion scores and (n_users,) overall 0-100 scores
+    """
+    X = np.asarray(features, dtype=float)
+    age, comments, repeated, activities, span, evenness, replies = X.T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        age_score = np.clip(1 - np.log1p(np.maximum(age, 0)) / math.log1p(AGE_SATURATION_DAYS), 0, 1)
+        repeated_share = np.where(activities >= 2, repeated / activities, np.nan)
+        rate = activities / np.maximum(span, 1)
+        rate_score = np.clip(np.log1p(rate) / math.log1p(RATE_SATURATION_PER_DAY), 0, 1)
+        # Users who never comment give no evidence either way, rather than "never replies"
+        reply_share = np.where(comments > 0, replies / comments, np.nan)
+
+    criteria = np.column_stack([
+        age_score,
+        repeated_share,
+        rate_score,
+        1 - np.clip(evenness, 0, 1),
+        1 - reply_share,
+    ]) * MAX_CRITERION_SCORE
+    criteria = np.where(np.isnan(criteria), NEUTRAL_SCORE, criteria)
+
+    overall = np.rint(criteria @ CRITERIA_WEIGHTS / MAX_CRITERION_SCORE * 100).astype(int)
+    return criteria, overall
+
+def criteria_details(criterion_scores):
+    """Format one row of criterion scores for the API"""
+    return [
+        {"criteriaName": name, "score": round(float(score), 2), "maxScore": MAX_CRITERION_SCORE}
+        for name, score in zip(CRITERIA, criterion_scores)
+    ]
@@ -0,0 +1,111 @@
+"""
+Build step for the sentiment classifier
+
+Trains the TF-IDF vectorizer and logistic regression once and saves them
+to a versioned artifact that SentimentAnalysisModel loads at import:
+
+    cd backend
+    python -m models.build_sentiment_model
+"""
+import argparse
+import logging
+import os
+import joblib
+import sklearn
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+logger = logging.getLogger(__name__)
+
+MODEL_VERSION = 'v1'
+
+ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'artifacts')
+
+# Small training dataset with examples (1=positive, 0=neutral, -1=negative)
+TRAINING_TEXTS = [
+    "I love this, it's amazing!",
+    "This is terrible, absolutely hate it",
+    "It's okay, nothing special",
+    "Best experience ever, highly recommend",
+    "Worst product I've ever used",
+    "It's alright, does the job",
+    "Incredible service, very happy",
+    "Disappointed with the quality",
+    "Not bad, not great either",
+    "Absolutely fantastic!"
+]
+TRAINING_LABELS = [1, -1, 0, 1, -1, 0, 1, -1, 0, 1]
+
+def artifact_path(version=MODEL_VERSION):
+    """Default location of the artifact for a model version"""
+    return os.environ.get(
+        'TRENDLENS_SENTIMENT_MODEL',
+        os.path.join(ARTIFACT_DIR, f'sentiment_model_{version}.joblib')
+    )
+
+def train_sentiment_model(clean_text):
+    """
+    Train the sentiment classifier
+
+    Args:
+        clean_text (callable): Text preprocessor applied before vectorizing
+
+    Returns:
+        tuple: (vectorizer, classifier)
+    """
+    cleaned_texts = [clean_text(text) for text in TRAINING_TEXTS]
+
+    # Create and fit the vectorizer
+    vectorizer = TfidfVectorizer()
+    X = vectorizer.fit_transform(cleaned_texts)
+
+    # Train a logistic regression model
+    classifier = LogisticRegression()
+    classifier.fit(X, TRAINING_LABELS)
+
+    return vectorizer, classifier
+
+def save_sentiment_model(vectorizer, classifier, path=None):
+    """Save a trained vectorizer and classifier to a versioned artifact"""
+    path = path or artifact_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    joblib.dump({
+        'version': MODEL_VERSION,
+        'sklearn_version': sklearn.__version__,
+        'vectorizer': vectorizer,
+        'classifier': classifier
+    }, path)
+    return path
+
+def load_sentiment_model(path=None):
+    """
+    Load a saved artifact, memory-mapping its numpy arrays
+
+    Returns:
+        tuple: (vectorizer, classifier)
+
+    Raises:
+        FileNotFoundError: If the artifact has not been built
+        ValueError: If the artifact was built for another model version
+    """
+    path = path or artifact_path()
+    artifact = joblib.load(path, mmap_mode='r')
+    if artifact.get('version') != MODEL_VERSION:
+        raise ValueError(f"Sentiment model artifact {path} is version {artifact.get('version')}, expected {MODEL_VERSION}")
+    if artifact.get('sklearn_version') != sklearn.__version__:
+        logger.warning("Sentiment model artifact was built with scikit-learn %s, running %s", artifact.get('sklearn_version'), sklearn.__version__)
+    return artifact['vectorizer'], artifact['classifier']
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and save the sentiment classifier")
+    parser.add_argument('--output', help="Artifact path (defaults to models/artifacts/sentiment_model_<version>.joblib)")
+    args = parser.parse_args()
+
+    from models.text_cleaning import TextCleaner
+
+    vectorizer, classifier = train_sentiment_model(TextCleaner().clean)
+    path = save_sentiment_model(vectorizer, classifier, args.output)
+    print(f"Saved sentiment model {MODEL_VERSION} to {path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+
+class _InFlightLoad:
+    """A value being loaded by one thread while others wait for it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after a time-to-live
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize=1024, ttl=300):
+        """
+        Args:
+            maxsize (int): Maximum number of entries before the least recently used is evicted
+            ttl (float): Default lifetime of an entry in seconds, None for no expiry
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self._data = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return a live cached value, or default on a miss"""
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is not self._MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Store a value, optionally overriding the default time-to-live"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader, ttl=None):
+        """
+        Return a cached value, calling loader() and caching its result on a miss
+
+        Concurrent misses on the same key share a single loader() call.
+        Exceptions raised by the loader propagate and nothing is cached.
+        """
+        value = self.get(key, self._MISSING)
+        if value is not self._MISSING:
+            return value
+
+        with self._lock:
+            load = self._inflight.get(key)
+            is_loader = load is None
+            if is_loader:
+                load = self._inflight[key] = _InFlightLoad()
+            else:
+                self.coalesced += 1
+
+        if not is_loader:
+            load.done.wait()
+            if load.error is not None:
+                raise load.error
+            return load.value
+
+        try:
+            load.value = loader()
+            self.set(key, load.value, ttl)
+            return load.value
+        except Exception as e:
+            load.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            load.done.set()
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Return hit, miss and eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'coalesced': self.coalesced,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
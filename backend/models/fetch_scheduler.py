@@ -0,0 +1,120 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class RateLimiter:
+    """
+    Thread-safe token bucket enforcing a requests-per-minute budget
+    """
+
+    def __init__(self, requests_per_minute, burst=None):
+        """
+        Args:
+            requests_per_minute (float): Sustained request rate
+            burst (int): Bucket capacity, defaults to one minute's worth of requests
+        """
+        self.requests_per_minute = float(requests_per_minute)
+        self.capacity = float(burst if burst is not None else requests_per_minute)
+        self._tokens = self.capacity
+        self._refill_rate = self.requests_per_minute / 60.0  # tokens per second
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._refill_rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available, without blocking"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._refill_rate
+            time.sleep(wait)
+
+    def spend(self, tokens):
+        """
+        Take tokens for requests already made, without blocking
+
+        The bucket can go negative; later acquire() calls then wait until
+        the debt is paid back.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+
+class FetchScheduler:
+    """
+    Bounded thread pool for running blocking Reddit fetches in parallel
+    """
+
+    def __init__(self, max_workers=None, requests_per_minute=None):
+        """
+        Args:
+            max_workers (int): Pool size, defaults to TRENDLENS_FETCH_WORKERS or 8
+            requests_per_minute (float): Request budget shared by all workers,
+                defaults to TRENDLENS_REDDIT_RPM or 100; 0 disables rate limiting
+        """
+        if max_workers is None:
+            max_workers = int(os.environ.get("TRENDLENS_FETCH_WORKERS", 8))
+        if requests_per_minute is None:
+            requests_per_minute = float(os.environ.get("TRENDLENS_REDDIT_RPM", 100))
+
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_minute) if requests_per_minute else None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="reddit-fetch")
+
+    def _run(self, fn, item):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return fn(item)
+
+    def map(self, fn, items):
+        """
+        Apply a fetch function to every item in parallel
+
+        Each call runs in a copy of the caller's context, so fetch timings
+        count towards the request that asked for them.
+
+        Args:
+            fn (callable): Blocking function taking a single item
+            items (iterable): The items to fetch
+
+        Returns:
+            list: Results in the same order as items
+        """
+        items = list(items)
+        if len(items) <= 1:
+            return [self._run(fn, item) for item in items]
+        contexts = [contextvars.copy_context() for _ in items]
+        return list(self._executor.map(lambda context, item: context.run(self._run, fn, item), contexts, items))
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+def get_default_scheduler():
+    """Return the process-wide scheduler shared by every model, creating it on first use"""
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_scheduler_lock:
+            if _default_scheduler is None:
+                _default_scheduler = FetchScheduler()
+    return _default_scheduler
@@ -0,0 +1,154 @@
+import numpy as np
+
+FORECAST_METHODS = ("linear", "holt_winters", "seasonal_naive")
+
+# Season length per sampling frequency
+SEASON_LENGTHS = {"monthly": 12, "weekly": 52, "daily": 7}
+
+def _as_batch(series):
+    """Coerce a 1-D or 2-D array-like into a float (n_series, n_obs) array"""
+    batch = np.asarray(series, dtype=float)
+    if batch.ndim == 1:
+        batch = batch[np.newaxis, :]
+    if batch.ndim != 2 or batch.shape[1] == 0:
+        raise ValueError("Expected a non-empty 1-D series or 2-D (n_series, n_obs) batch")
+    return batch
+
+def linear_trend_forecast(series, horizon):
+    """
+    Least-squares linear trend fitted to every series at once
+
+    Forecasts are clamped at 0, since counts cannot be negative.
+
+    Args:
+        series (array-like): (n_series, n_obs) batch of counts
+        horizon (int): Number of future steps
+
+    Returns:
+        numpy.ndarray: (n_series, horizon) forecasts
+    """
+    Y = _as_batch(series)
+    n_obs = Y.shape[1]
+    t = np.arange(n_obs, dtype=float)
+    t_centered = t - t.mean()
+    denominator = t_centered @ t_centered
+
+    y_mean = Y.mean(axis=1)
+    slope = (Y - y_mean[:, np.newaxis]) @ t_centered / denominator if denominator else np.zeros(len(Y))
+    intercept = y_mean - slope * t.mean()
+
+    future_t = np.arange(n_obs, n_obs + horizon, dtype=float)
+    return np.maximum(intercept[:, np.newaxis] + slope[:, np.newaxis] * future_t, 0)
+
+def seasonal_naive_forecast(series, horizon, season_length=12):
+    """
+    Repeat the last observed season; with less than one season of history,
+    repeat the last value
+
+    Returns:
+        numpy.ndarray: (n_series, horizon) forecasts
+    """
+    Y = _as_batch(series)
+    n_obs = Y.shape[1]
+    if n_obs < season_length:
+        return np.repeat(Y[:, -1:], horizon, axis=1)
+
+    steps = np.arange(horizon)
+    return Y[:, n_obs - season_length + steps % season_length]
+
+def holt_winters_forecast(series, horizon, season_length=12, alpha=0.5, beta=0.3, gamma=0.2):
+    """
+    Additive Holt-Winters exponential smoothing, vectorized across series
+
+    Needs two full seasons of history to initialise the seasonal component;
+    shorter series are smoothed with Holt's linear trend method instead.
+    Forecasts are clamped at 0, since counts cannot be negative.
+
+    Args:
+        series (array-like): (n_series, n_obs) batch of counts
+        horizon (int): Number of future steps
+        season_length (int): Observations per season
+        alpha (float): Level smoothing factor
+        beta (float): Trend smoothing factor
+        gamma (float): Seasonal smoothing factor
+
+    Returns:
+        numpy.ndarray: (n_series, horizon) forecasts
+    """
+    Y = _as_batch(series)
+    n_series, n_obs = Y.shape
+    steps = np.arange(1, horizon + 1, dtype=float)
+
+    if n_obs < 2 * season_length:
+        # Holt's linear trend (no seasonality)
+        level = Y[:, 0].copy()
+        trend = Y[:, 1] - Y[:, 0] if n_obs > 1 else np.zeros(n_series)
+        for t in range(1, n_obs):
+            previous_level = level
+            level = alpha * Y[:, t] + (1 - alpha) * (level + trend)
+            trend = beta * (level - previous_level) + (1 - beta) * trend
+        return np.maximum(level[:, np.newaxis] + trend[:, np.newaxis] * steps, 0)
+
+    m = season_length
+    first_season = Y[:, :m].mean(axis=1)
+    second_season = Y[:, m:2 * m].mean(axis=1)
+    trend = (second_season - first_season) / m
+
+    # Detrend the first season so the seasonal component does not absorb the trend
+    offsets = np.arange(m) - (m - 1) / 2
+    seasonals = Y[:, :m] - (first_season[:, np.newaxis] + trend[:, np.newaxis] * offsets)
+    level = first_season + trend * (m - 1) / 2
+
+    for t in range(m, n_obs):
+        season_index = t % m
+        previous_level = level
+        level = alpha * (Y[:, t] - seasonals[:, season_index]) + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous_level) + (1 - beta) * trend
+        seasonals[:, season_index] = gamma * (Y[:, t] - level) + (1 - gamma) * seasonals[:, season_index]
+
+    season_indices = (n_obs + np.arange(horizon)) % m
+    return np.maximum(level[:, np.newaxis] + trend[:, np.newaxis] * steps + seasonals[:, season_indices], 0)
+
+def forecast(series, horizon, method="linear", season_length=12):
+    """
+    Forecast a batch of equally long series with one model
+
+    Args:
+        series (array-like): 1-D series or (n_series, n_obs) batch of counts
+        horizon (int): Number of future steps
+        method (str): One of FORECAST_METHODS
+        season_length (int): Observations per season (12 for monthly, 7 for daily counts)
+
+    Returns:
+        numpy.ndarray: (n_series, horizon) forecasts
+    """
+    if method == "linear":
+        return linear_trend_forecast(series, horizon)
+    if method == "holt_winters":
+        return holt_winters_forecast(series, horizon, season_length)
+    if method == "seasonal_naive":
+        return seasonal_naive_forecast(series, horizon, season_length)
+    raise ValueError(f"Unknown forecast method '{method}', expected one of {', '.join(FORECAST_METHODS)}")
+
+def forecast_many(series_by_key, horizon, method="linear", season_length=12):
+    """
+    Forecast many series of possibly different lengths
+
+    Series of the same length are stacked and fitted in one batched call.
+
+    Args:
+        series_by_key (dict): Key (e.g. subreddit) to 1-D series of counts
+
+    Returns:
+        dict: Key to 1-D numpy array of `horizon` forecasts
+    """
+    keys_by_length = {}
+    for key, values in series_by_key.items():
+        keys_by_length.setdefault(len(values), []).append(key)
+
+    forecasts = {}
+    for keys in keys_by_length.values():
+        batch = np.array([series_by_key[key] for key in keys], dtype=float)
+        for key, row in zip(keys, forecast(batch, horizon, method, season_length)):
+            forecasts[key] = row
+    return forecasts
@@ -0,0 +1,351 @@
+import logging
+import math
+import os
+import time
+import numpy as np
+import scipy.sparse as sp
+from textblob.en import sentiment as pattern_sentiment
+from models.metrics import record_stage
+
+logger = logging.getLogger(__name__)
+
+# Components of the hybrid score and their weight in it. Weights of the
+# enabled components are renormalized to sum to 1, so without the ML model
+# VADER and TextBlob count half each, as before.
+COMPONENTS = ("ml", "vader", "textblob")
+COMPONENT_WEIGHTS = {"ml": 0.4, "vader": 0.3, "textblob": 0.3}
+
+_DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+# Plain texts covering boosters, "kind of", "but", negation and all caps,
+# scored both ways when a scorer is built (see HybridScorer._self_check)
+_SELF_CHECK_TEXTS = (
+    "this movie is really great but the ending was kind of bad",
+    "absolutely terrible service never again",
+    "I LOVE this so much",
+    "not good at all and honestly quite disappointing",
+    "the weather is okay I guess",
+    "a",
+)
+
+def configured_components():
+    """Components enabled by TRENDLENS_SENTIMENT_COMPONENTS (comma-separated), all by default"""
+    value = os.environ.get("TRENDLENS_SENTIMENT_COMPONENTS", "")
+    names = [name.strip().lower() for name in value.split(',') if name.strip()]
+    return tuple(names) if names else COMPONENTS
+
+def _is_plain(tokens):
+    """
+    Whether every token is purely alphabetic, before and after lowercasing
+
+    For such text the TF-IDF analyzer, VADER and the pattern tokenizer all
+    split on whitespace and nothing else, so a single str.split() reproduces
+    each of them. Cleaned texts are almost always plain; anything else is
+    scored by the original analyzers.
+    """
+    if not tokens:
+        return True
+    joined = "".join(tokens)
+    return joined.isalpha() and joined.lower().isalpha()
+
+def _pattern_average(assessments):
+    # Same summation as pattern's Sentiment.__call__, so results match bit for bit
+    total = 0
+    for assessment in assessments:
+        total += assessment[1]
+    return total / float(len(assessments) or 1)
+
+def _plain_polarity(lowered):
+    """Pattern polarity of already lowercased plain tokens"""
+    return _pattern_average(pattern_sentiment.assessments(((token, None) for token in lowered), True))
+
+def _matches_original(name, same):
+    """
+    Run a self-check comparing a single-pass path with its original analyzer
+
+    Args:
+        name (str): The component, for the log
+        same (callable): Returns whether both score the self-check texts identically
+
+    Returns:
+        bool: Whether the single-pass path may be used; False if it disagreed or raised
+    """
+    try:
+        if same():
+            return True
+        logger.warning("Single-pass %s scores differ from the original analyzer, using the original", name)
+    except Exception as e:
+        logger.warning("Single-pass %s scoring failed (%s), using the original analyzer", name, e)
+    return False
+
+_PLAIN_POLARITY_MATCHES = _matches_original("TextBlob", lambda: all(
+    _plain_polarity(text.lower().split()) == pattern_sentiment(text)[0] for text in _SELF_CHECK_TEXTS
+))
+
+def polarity(text, tokens=None):
+    """
+    TextBlob (pattern) polarity of a text, without building a TextBlob
+
+    Args:
+        text (str): The text to score
+        tokens (list): text.split(), if the caller already has it
+
+    Returns:
+        float: Polarity in [-1, 1], equal to TextBlob(text).sentiment.polarity
+    """
+    tokens = text.split() if tokens is None else tokens
+    if not _PLAIN_POLARITY_MATCHES or not _is_plain(tokens):
+        return pattern_sentiment(text)[0]
+    return _plain_polarity([token.lower() for token in tokens])
+
+class _SentiTokens:
+    """The parts of VADER's SentiText that sentiment_valence reads"""
+
+    __slots__ = ("words_and_emoticons", "is_cap_diff")
+
+    def __init__(self, words, is_cap_diff):
+        self.words_and_emoticons = words
+        self.is_cap_diff = is_cap_diff
+
+class HybridScorer:
+    """
+    Single-pass hybrid ML, VADER and TextBlob sentiment scorer
+
+    Each text is tokenized once. The one token stream feeds the TF-IDF row
+    (counted straight against the vectorizer vocabulary), the VADER valence
+    loop and the pattern polarity lookup, instead of the vectorizer, VADER
+    and TextBlob each re-tokenizing it. Scores are identical to running the
+    three analyzers separately; texts the shared tokenization does not cover
+    exactly fall back to the original analyzers.
+
+    The single pass reads private parts of scikit-learn (the vectorizer's
+    fitted transformer) and NLTK (VADER's valence helpers), which can change
+    between releases even though requirements.txt pins both. Each shared
+    path is therefore checked against its original analyzer when the scorer
+    is built, and a path that fails or disagrees is replaced by the original
+    analyzer for every text.
+    """
+
+    def __init__(self, vectorizer=None, classifier=None, sid=None, components=COMPONENTS):
+        """
+        Args:
+            vectorizer (TfidfVectorizer): Fitted vectorizer of the ML model, None without ML
+            classifier: Fitted classifier predicting -1, 0 or 1 from TF-IDF rows, None without ML
+            sid (SentimentIntensityAnalyzer): VADER analyzer, required if VADER is enabled
+            components (iterable): Components to score with, a subset of COMPONENTS
+        """
+        components = tuple(components)
+        unknown = set(components) - set(COMPONENTS)
+        if unknown:
+            raise ValueError(f"Unknown sentiment components: {', '.join(sorted(unknown))}")
+        self.components = tuple(name for name in COMPONENTS if name in components)
+        if not self.components:
+            raise ValueError("At least one sentiment component must be enabled")
+        if "vader" in self.components and sid is None:
+            raise ValueError("VADER is enabled but no analyzer was given")
+
+        self.vectorizer = vectorizer
+        self.classifier = classifier
+        self.sid = sid
+
+        self._vocabulary = None
+        self._analyzer = None
+        self._plain_tokens = False
+        if vectorizer is not None:
+            self._vocabulary = vectorizer.vocabulary_
+            self._analyzer = vectorizer.build_analyzer()
+            self._plain_tokens = (
+                vectorizer.analyzer == 'word' and vectorizer.tokenizer is None
+                and vectorizer.preprocessor is None and vectorizer.lowercase
+                and vectorizer.strip_accents is None and vectorizer.stop_words is None
+                and tuple(vectorizer.ngram_range) == (1, 1)
+                and vectorizer.token_pattern == _DEFAULT_TOKEN_PATTERN
+            )
+
+        self._shared_tfidf, self._shared_vader = self._self_check()
+
+    def _self_check(self):
+        """
+        Score the self-check texts with each shared path and its original analyzer
+
+        The pattern path is checked once, at import.
+
+        Returns:
+            tuple: Whether the shared TF-IDF and VADER paths may be used
+        """
+        texts = list(_SELF_CHECK_TEXTS)
+        split = [text.split() for text in texts]
+        lowered = [[token.lower() for token in tokens] for tokens in split]
+
+        shared_tfidf = self.vectorizer is None or _matches_original("TF-IDF", lambda: np.allclose(
+            self._tfidf_matrix([
+                self._term_counts(text, tokens if self._plain_tokens else None) for text, tokens in zip(texts, lowered)
+            ]).toarray(),
+            self.vectorizer.transform(texts).toarray(), rtol=0, atol=1e-12
+        ))
+        shared_vader = self.sid is None or _matches_original("VADER", lambda: all(
+            self._vader_compound(tokens) == self.sid.polarity_scores(text)['compound'] for text, tokens in zip(texts, split)
+        ))
+        return shared_tfidf, shared_vader
+
+    @property
+    def ml_available(self):
+        return "ml" in self.components and self.vectorizer is not None and self.classifier is not None
+
+    def weights(self, ml_available):
+        """Weight of each component in the combined score"""
+        names = [name for name in self.components if name != "ml" or ml_available]
+        total = math.fsum(COMPONENT_WEIGHTS[name] for name in names)
+        return {name: COMPONENT_WEIGHTS[name] / total for name in names}
+
+    def _term_counts(self, text, lowered):
+        """Vocabulary column -> count of a text, from the shared tokens when possible"""
+        terms = [token for token in lowered if len(token) > 1] if lowered is not None else self._analyzer(text)
+        vocabulary = self._vocabulary
+        counts = {}
+        for term in terms:
+            column = vocabulary.get(term)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+        return counts
+
+    def _tfidf_matrix(self, rows):
+        """TF-IDF matrix of per-text term counts, as TfidfVectorizer.transform would build it"""
+        indptr = [0]
+        indices = []
+        data = []
+        for counts in rows:
+            columns = sorted(counts)
+            indices.extend(columns)
+            data.extend(counts[column] for column in columns)
+            indptr.append(len(indices))
+        counts = sp.csr_matrix(
+            (np.array(data, dtype=np.intc), np.array(indices, dtype=np.intc), np.array(indptr, dtype=np.intc)),
+            shape=(len(rows), len(self._vocabulary)), dtype=self.vectorizer.dtype
+        )
+        if self.vectorizer.binary:
+            counts.data.fill(1)
+        # The vectorizer's own fitted transformer applies the idf weights and norm
+        return self.vectorizer._tfidf.transform(counts, copy=False)
+
+    def _vader_compound(self, tokens):
+        """
+        VADER compound score from whitespace tokens of a plain text
+
+        Follows SentimentIntensityAnalyzer.polarity_scores step by step,
+        including its lookup of each word's first position, but skips the
+        punctuation maps and the pos/neg/neu shares that are never used.
+        """
+        sid = self.sid
+        words = [token for token in tokens if len(token) > 1]
+        if not words:
+            return 0.0
+
+        allcaps = sum(1 for word in words if word.isupper())
+        sentitext = _SentiTokens(words, 0 < len(words) - allcaps < len(words))
+        lexicon = sid.lexicon
+        boosters = sid.constants.BOOSTER_DICT
+
+        first_index = {}
+        for i, word in enumerate(words):
+            first_index.setdefault(word, i)
+
+        sentiments = []
+        last = len(words) - 1
+        for word in words:
+            i = first_index[word]
+            lower = word.lower()
+            if (i < last and lower == "kind" and words[i + 1].lower() == "of") or lower in boosters:
+                sentiments.append(0)
+            elif lower not in lexicon:
+                sentiments.append(0)
+            else:
+                sid.sentiment_valence(0, sentitext, word, i, sentiments)
+
+        sentiments = sid._but_check(words, sentiments)
+        return round(sid.constants.normalize(float(sum(sentiments))), 4)
+
+    def score(self, cleaned_texts, ml_available=None):
+        """
+        Score already cleaned texts
+
+        Args:
+            cleaned_texts (list): Texts cleaned by TextCleaner
+            ml_available (bool): Whether to include the ML component, defaults to ml_available
+
+        Returns:
+            tuple: {'sentimentScore', 'ml', 'vader', 'textblob'} numpy arrays aligned
+                with the texts, and whether the ML prediction failed
+        """
+        ml_available = self.ml_available if ml_available is None else ml_available
+        count = len(cleaned_texts)
+        use_vader = "vader" in self.components
+        use_textblob = "textblob" in self.components
+        build_tfidf = ml_available and self._vocabulary is not None and self._shared_tfidf
+
+        vader_scores = np.zeros(count)
+        textblob_scores = np.zeros(count)
+        term_rows = []
+        # Seconds spent per component, shared tokenization excluded
+        clock = time.perf_counter
+        ml_seconds = vader_seconds = textblob_seconds = 0.0
+        for row, text in enumerate(cleaned_texts):
+            tokens = text.split()
+            plain = _is_plain(tokens)
+            lowered = [token.lower() for token in tokens] if plain else None
+
+            if build_tfidf:
+                started = clock()
+                term_rows.append(self._term_counts(text, lowered if self._plain_tokens else None))
+                ml_seconds += clock() - started
+            if use_vader:
+                started = clock()
+                if plain and self._shared_vader:
+                    vader_scores[row] = self._vader_compound(tokens)
+                else:
+                    vader_scores[row] = self.sid.polarity_scores(text)['compound']
+                vader_seconds += clock() - started
+            if use_textblob:
+                started = clock()
+                if plain and _PLAIN_POLARITY_MATCHES:
+                    textblob_scores[row] = _plain_polarity(lowered)
+                else:
+                    textblob_scores[row] = pattern_sentiment(text)[0]
+                textblob_seconds += clock() - started
+
+        # ML-based sentiment prediction (if available)
+        ml_scores = np.zeros(count)
+        ml_failed = False
+        if ml_available and count:
+            started = clock()
+            try:
+                if build_tfidf:
+                    features = self._tfidf_matrix(term_rows)
+                else:
+                    features = self.vectorizer.transform(cleaned_texts)
+                ml_scores = self.classifier.predict(features).astype(float)  # -1, 0, or 1
+            except Exception as e:
+                logger.warning("ML sentiment prediction error: %s", e)
+                ml_failed = True
+            ml_seconds += clock() - started
+
+        if count:
+            for stage, seconds, enabled in (("ml_predict", ml_seconds, ml_available),
+                                            ("vader", vader_seconds, use_vader),
+                                            ("textblob", textblob_seconds, use_textblob)):
+                if enabled:
+                    record_stage(stage, seconds)
+
+        # Combine the enabled scores (weighted average)
+        columns = {"ml": ml_scores, "vader": vader_scores, "textblob": textblob_scores}
+        sentiment_scores = None
+        for name, weight in self.weights(ml_available).items():
+            term = weight * columns[name]
+            sentiment_scores = term if sentiment_scores is None else sentiment_scores + term
+
+        return {
+            'sentimentScore': sentiment_scores,
+            'ml': ml_scores,
+            'vader': vader_scores,
+            'textblob': textblob_scores
+        }, ml_failed
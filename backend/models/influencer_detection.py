@@ -1,63 +1,60 @@
+import logging
 import random
 import time
-import praw
-from textblob import TextBlob
-from collections import defaultdict
-import traceback
+from models.latency import LatencyBudget
+from models.metrics import mock_fallback, timed
+from models.fetch_scheduler import get_default_scheduler
+from models.reddit_client import RedditClient
+from models.author_cache import author_profiles
+from models.influencer_ranking import InfluencerAggregator
+from models.ingestion import live_aggregates
+from models.sentiment_aggregates import SentimentAggregate
+from models.sentiment_cache import content_key, get_default_result_cache
+from models.scoring_pool import get_scoring_pool
+from models.hybrid_scorer import polarity
+
+logger = logging.getLogger(__name__)
+
+class CommentSentimentAggregate(SentimentAggregate):
+    """Sentiment histogram of comment polarities, which sit closer to 0 than combined scores"""
+
+    __slots__ = ()
+    positive_threshold = 0.1
+    negative_threshold = -0.1
 
 class InfluencerDetectionModel:
     """
     Model for detecting influential accounts on Reddit
     """
     
-    # Initialize Reddit API (use environment variables in production!)
-    _reddit = None
-    
     @classmethod
     def _get_reddit_instance(cls):
-        if cls._reddit is None:
-            try:
-                cls._reddit = praw.Reddit(
-                    client_id='EH0Y7-k7VoZ12VXC3VxWSQ',
-                    client_secret='1LvwUtguratTBh2DXZ2S66vcZ3CAFg',
-                    user_agent='TrendLens by /u/Live_Pain_1914'
-                )
-                print("Reddit API initialized successfully")
-            except Exception as e:
-                print(f"Error initializing Reddit API: {str(e)}")
-                traceback.print_exc()
-                # Fall back to mock data if Reddit API fails
-                cls._reddit = None
-        return cls._reddit
+        return RedditClient.get_instance()
+    
+    @staticmethod
+    def _get_fetch_scheduler():
+        return get_default_scheduler()
     
     @staticmethod
     def fetch_top_posts(subreddit, limit=50):
         """Fetch top posts for a given subreddit"""
-        print(f"Fetching top posts from r/{subreddit}...")
+        logger.info("Fetching top posts from r/%s...", subreddit)
         reddit = InfluencerDetectionModel._get_reddit_instance()
         if not reddit:
-            print("Reddit API not available, falling back to mock data")
+            logger.warning("Reddit API not available, falling back to mock data")
             # Return mock data if Reddit API is not available
+            mock_fallback("influencer.posts")
             return InfluencerDetectionModel._generate_mock_posts(subreddit, limit)
         
         try:
-            subreddit_obj = reddit.subreddit(subreddit)
-            posts = list(subreddit_obj.top(limit=limit))
-            print(f"Successfully fetched {len(posts)} posts from r/{subreddit}")
+            posts = RedditClient.get_posts(subreddit, 'top', limit)
+            logger.info("Successfully fetched %d posts from r/%s", len(posts), subreddit)
             
-            return [{
-                'id': post.id,
-                'author': post.author.name if post.author else None,
-                'title': post.title,
-                'score': post.score,
-                'num_comments': post.num_comments,
-                'created_utc': post.created_utc,
-                'awards': post.total_awards_received
-            } for post in posts if post.author]
+            return [post for post in posts if post['author']]
         except Exception as e:
-            print(f"Error fetching posts from r/{subreddit}: {str(e)}")
-            traceback.print_exc()
+            logger.exception("Error fetching posts from r/%s: %s", subreddit, e)
             # Fall back to mock data if fetching fails
+            mock_fallback("influencer.posts")
             return InfluencerDetectionModel._generate_mock_posts(subreddit, limit)
     
     @staticmethod
@@ -79,56 +76,57 @@ class InfluencerDetectionModel:
         
         return mock_posts
     
+    @staticmethod
+    def _mock_karma():
+        return random.randint(1000, 50000), random.randint(1000, 50000)
+    
     @staticmethod
     def get_user_karma(username):
         """Fetch a user's karma with error handling"""
+        return InfluencerDetectionModel.get_karma_many([username])[username]
+    
+    @staticmethod
+    def get_karma_many(usernames):
+        """
+        Fetch karma for many users, reusing cached author profiles
+        
+        Args:
+            usernames (list): Reddit usernames
+            
+        Returns:
+            dict: Username to (post_karma, comment_karma)
+        """
         reddit = InfluencerDetectionModel._get_reddit_instance()
         if not reddit:
             # Return mock data if Reddit API is not available
-            return random.randint(1000, 50000), random.randint(1000, 50000)
+            mock_fallback("influencer.karma", len(usernames))
+            return {username: InfluencerDetectionModel._mock_karma() for username in usernames}
         
-        try:
-            user = reddit.redditor(username)
-            return user.link_karma, user.comment_karma
-        except Exception as e:
-            print(f"Error fetching karma for user {username}: {str(e)}")
-            return random.randint(1000, 50000), random.randint(1000, 50000)
+        karma = {}
+        for username, profile in author_profiles.get_many(usernames).items():
+            if profile is None:
+                # Fall back to mock karma if the profile could not be fetched
+                mock_fallback("influencer.karma")
+                karma[username] = InfluencerDetectionModel._mock_karma()
+            else:
+                karma[username] = (profile['link_karma'], profile['comment_karma'])
+        return karma
     
     @staticmethod
-    def detect_top_influencers(posts):
-        """Analyze post data to identify influencers"""
-        user_engagement = defaultdict(lambda: {
-            'post_karma': 0, 
-            'comment_karma': 0, 
-            'upvotes': 0, 
-            'comments': 0, 
-            'awards': 0
-        })
+    def _rank_influencers(posts, budget=None, top_k=10):
+        """Aggregate posts by author and rank the top_k authors, returning the aggregator too"""
+        with timed("aggregate"):
+            aggregator = InfluencerAggregator().add_many(posts, budget)
         
-        for post in posts:
-            if not post['author']:
-                continue
-                
-            author = post['author']
-            if user_engagement[author]['post_karma'] == 0:  # Only fetch karma once per user
-                post_karma, comment_karma = InfluencerDetectionModel.get_user_karma(author)
-                user_engagement[author]['post_karma'] = post_karma
-                user_engagement[author]['comment_karma'] = comment_karma
-            
-            user_engagement[author]['upvotes'] += post['score']
-            user_engagement[author]['comments'] += post['num_comments']
-            user_engagement[author]['awards'] += post['awards']
-        
-        return sorted(
-            user_engagement.items(),
-            key=lambda x: (
-                x[1]['post_karma'] + x[1]['comment_karma'],
-                x[1]['upvotes'],
-                x[1]['comments'],
-                x[1]['awards']
-            ),
-            reverse=True
-        )[:10]  # Return top 10
+        # Fetch karma once per user, in parallel
+        karma = InfluencerDetectionModel.get_karma_many(aggregator.authors())
+        with timed("aggregate"):
+            return aggregator, aggregator.top(top_k, karma)
+    
+    @staticmethod
+    def detect_top_influencers(posts, budget=None, top_k=10):
+        """Analyze post data to identify influencers"""
+        return InfluencerDetectionModel._rank_influencers(posts, budget, top_k)[1]
     
     @staticmethod
     def fetch_comments(post_id, limit=10):
@@ -136,15 +134,14 @@ class InfluencerDetectionModel:
         reddit = InfluencerDetectionModel._get_reddit_instance()
         if not reddit:
             # Return mock data if Reddit API is not available
+            mock_fallback("influencer.comments")
             return [f"Mock comment {i}" for i in range(limit)]
         
         try:
-            post = reddit.submission(id=post_id)
-            post.comments.replace_more(limit=0)
-            return [comment.body for comment in post.comments[:limit]]
+            return RedditClient.get_comments(post_id, limit)
         except Exception as e:
-            print(f"Error fetching comments for post {post_id}: {str(e)}")
-            traceback.print_exc()
+            logger.exception("Error fetching comments for post %s: %s", post_id, e)
+            mock_fallback("influencer.comments")
             return [f"Mock comment {i}" for i in range(limit)]
     
     @staticmethod
@@ -154,38 +151,48 @@ class InfluencerDetectionModel:
             return {'positive': 0, 'neutral': 0, 'negative': 0}
         
         try:
-            scores = {'positive': 0, 'neutral': 0, 'negative': 0}
-            for comment in comments:
-                polarity = TextBlob(comment).sentiment.polarity
-                if polarity > 0.1:
-                    scores['positive'] += 1
-                elif polarity < -0.1:
-                    scores['negative'] += 1
-                else:
-                    scores['neutral'] += 1
+            # Reuse the polarity of comments scored before
+            cache = get_default_result_cache()
+            keys = [content_key(comment, "textblob") for comment in comments]
+            polarities = cache.get_many(keys)
+            unscored = {key: comment for key, comment in zip(keys, comments) if key not in polarities}
+            pool = get_scoring_pool()
+            if pool is not None and len(unscored) > pool.chunk_size:
+                scored = {key: (value,) for key, value in zip(unscored, pool.polarities(unscored.values()))}
+            elif unscored:
+                with timed("textblob"):
+                    scored = {key: (polarity(comment),) for key, comment in unscored.items()}
+            else:
+                scored = {}
+            cache.set_many(scored)
+            polarities.update(scored)
             
-            total = sum(scores.values())
-            return {k: round(v/total*100, 2) if total > 0 else 0 for k, v in scores.items()}
+            aggregate = CommentSentimentAggregate()
+            for key in keys:
+                aggregate.update(polarities[key][0])
+            return aggregate.percentages()
         except Exception as e:
-            print(f"Error analyzing sentiment: {str(e)}")
+            logger.warning("Error analyzing sentiment: %s", e)
             # Fall back to mock sentiment data
+            mock_fallback("influencer.comment_sentiment")
             return {'positive': 50, 'neutral': 30, 'negative': 20}
     
     @staticmethod
-    def analyze_user(username):
+    def analyze_user(username, budget=None):
         """
         Analyze a username to determine their influence score
         
         Args:
             username (str): The Reddit username to analyze
+            budget (LatencyBudget): Latency policy, defaults to the configured one
             
         Returns:
             dict: Influencer score details
         """
-        print(f"Analyzing user {username} for influencer metrics")
+        logger.info("Analyzing user %s for influencer metrics", username)
+        budget = budget or LatencyBudget.from_config()
         
-        # Simulate API delay
-        time.sleep(1.2)
+        budget.simulate("influencer.analyze_user")
         
         details = [
             {"criteriaName": "Account Age", "score": round(random.random() * 5, 2), "maxScore": 5},
@@ -202,17 +209,21 @@ class InfluencerDetectionModel:
         }
     
     @staticmethod
-    def get_subreddit_influencers(subreddit):
+    def get_subreddit_influencers(subreddit, budget=None, top_k=10, post_limit=50):
         """
         Get top influencers in a subreddit
         
         Args:
             subreddit (str): The subreddit to analyze
+            budget (LatencyBudget): Latency policy, defaults to the configured one
+            top_k (int): Number of influencers to return
+            post_limit (int): Number of top posts to aggregate
             
         Returns:
             list: List of top influencers with their metrics
         """
-        print(f"Finding influencers in r/{subreddit}")
+        logger.info("Finding influencers in r/%s", subreddit)
+        budget = budget or LatencyBudget.from_config()
         
         TOPICS = [
             "technology", "sports", "politics", "gaming", "music", 
@@ -222,24 +233,40 @@ class InfluencerDetectionModel:
         ]
         
         try:
-            # Fetch top posts from the subreddit
-            posts = InfluencerDetectionModel.fetch_top_posts(subreddit)
-            if not posts:
-                print(f"No posts found in r/{subreddit}, returning mock data")
-                raise Exception("No posts found")
+            # Rank the streamed post window when the subreddit is being ingested
+            aggregator = live_aggregates.influencer_aggregator(subreddit)
+            if aggregator:
+                karma = InfluencerDetectionModel.get_karma_many(aggregator.authors())
+                with timed("aggregate"):
+                    influencers = aggregator.top(top_k, karma)
+            else:
+                # Fetch top posts from the subreddit
+                posts = InfluencerDetectionModel.fetch_top_posts(subreddit, post_limit)
+                if not posts:
+                    logger.warning("No posts found in r/%s, returning mock data", subreddit)
+                    raise Exception("No posts found")
                 
-            # Detect top influencers
-            influencers = InfluencerDetectionModel.detect_top_influencers(posts)
+                # Detect top influencers
+                aggregator, influencers = InfluencerDetectionModel._rank_influencers(posts, budget, top_k)
             results = []
             
-            for username, data in influencers:
-                # Get user-specific posts
-                user_posts = [p for p in posts if p['author'] == username]
-                if not user_posts:
-                    continue
-                
-                # Fetch and analyze comments
-                comments = InfluencerDetectionModel.fetch_comments(user_posts[0]['id'])
+            # Fetch comments on each influencer's first post in parallel, one
+            # scheduler-sized chunk at a time so a deadline stops the fetching
+            scheduler = InfluencerDetectionModel._get_fetch_scheduler()
+            fetched = []
+            influencer_comments = []
+            for start in range(0, len(influencers), scheduler.max_workers):
+                if budget.exhausted():
+                    break
+                chunk = influencers[start:start + scheduler.max_workers]
+                fetched.extend(chunk)
+                influencer_comments.extend(scheduler.map(
+                    InfluencerDetectionModel.fetch_comments,
+                    [aggregator.posts_by(username)[0]['id'] for username, _ in chunk]
+                ))
+            
+            for (username, data), comments in zip(fetched, influencer_comments):
+                # Analyze comments
                 sentiment_data = InfluencerDetectionModel.analyze_sentiment(comments)
                 
                 # Calculate engagement percentage
@@ -279,13 +306,13 @@ class InfluencerDetectionModel:
                     "botProbability": bot_probability,
                 })
             
-            print(f"Successfully found {len(results)} influencers in r/{subreddit}")
+            logger.info("Successfully found %d influencers in r/%s", len(results), subreddit)
             return results
             
         except Exception as e:
-            print(f"Error in get_subreddit_influencers: {str(e)}")
-            traceback.print_exc()
+            logger.exception("Error in get_subreddit_influencers: %s", e)
             # Fall back to mock data
+            mock_fallback("influencer.subreddit")
             count = random.randint(4, 6)
             results = []
             
@@ -313,5 +340,5 @@ class InfluencerDetectionModel:
                     "botProbability": round(random.random() * 0.3, 2),  # 0.0 to 0.3 bot probability
                 })
             
-            print(f"Generated {len(results)} mock influencers for r/{subreddit}")
+            logger.info("Generated %d mock influencers for r/%s", len(results), subreddit)
             return results
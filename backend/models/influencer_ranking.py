@@ -0,0 +1,111 @@
+import heapq
+
+class InfluencerAggregator:
+    """
+    Streaming per-author engagement aggregator
+
+    Posts are indexed by author in a single pass; top() then ranks authors
+    with a bounded heap instead of sorting every author.
+    """
+
+    def __init__(self):
+        self._engagement = {}
+        self._posts_by_author = {}
+
+    def add(self, post):
+        """Fold one post into its author's engagement totals"""
+        author = post['author']
+        if not author:
+            return
+
+        engagement = self._engagement.get(author)
+        if engagement is None:
+            engagement = self._engagement[author] = {
+                'post_karma': 0,
+                'comment_karma': 0,
+                'upvotes': 0,
+                'comments': 0,
+                'awards': 0
+            }
+            self._posts_by_author[author] = []
+
+        engagement['upvotes'] += post['score']
+        engagement['comments'] += post['num_comments']
+        engagement['awards'] += post['awards']
+        self._posts_by_author[author].append(post)
+
+    def remove(self, post):
+        """Take a previously added post back out of its author's totals"""
+        author = post['author']
+        posts = self._posts_by_author.get(author)
+        if not posts or post not in posts:
+            return
+
+        engagement = self._engagement[author]
+        engagement['upvotes'] -= post['score']
+        engagement['comments'] -= post['num_comments']
+        engagement['awards'] -= post['awards']
+        posts.remove(post)
+        if not posts:
+            del self._engagement[author]
+            del self._posts_by_author[author]
+
+    def copy(self):
+        """Independent snapshot of the current totals"""
+        snapshot = InfluencerAggregator()
+        snapshot._engagement = {author: dict(engagement) for author, engagement in self._engagement.items()}
+        snapshot._posts_by_author = {author: list(posts) for author, posts in self._posts_by_author.items()}
+        return snapshot
+
+    def add_many(self, posts, budget=None):
+        """
+        Fold many posts, stopping early if the latency budget runs out
+
+        Returns:
+            InfluencerAggregator: self, for chaining
+        """
+        for post in posts:
+            if budget is not None and budget.exhausted():
+                break
+            self.add(post)
+        return self
+
+    def authors(self):
+        """Authors in the order they were first seen"""
+        return list(self._engagement)
+
+    def posts_by(self, author):
+        """Posts of one author in the order they were added"""
+        return self._posts_by_author.get(author, [])
+
+    def __len__(self):
+        return len(self._engagement)
+
+    def top(self, k, karma=None):
+        """
+        Rank authors by (total karma, upvotes, comments, awards)
+
+        Args:
+            k (int): Number of authors to return
+            karma (dict): Username to (post_karma, comment_karma), merged into the totals
+
+        Returns:
+            list: Up to k (username, engagement) tuples, best first
+        """
+        if karma:
+            for author, (post_karma, comment_karma) in karma.items():
+                engagement = self._engagement.get(author)
+                if engagement is not None:
+                    engagement['post_karma'] = post_karma
+                    engagement['comment_karma'] = comment_karma
+
+        return heapq.nlargest(
+            k,
+            self._engagement.items(),
+            key=lambda x: (
+                x[1]['post_karma'] + x[1]['comment_karma'],
+                x[1]['upvotes'],
+                x[1]['comments'],
+                x[1]['awards']
+            )
+        )
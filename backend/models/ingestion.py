@@ -0,0 +1,434 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from models.influencer_ranking import InfluencerAggregator
+from models.timeseries_store import get_default_store, valid_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Ingested events are dicts with a 'kind' of "post" or "comment" and the
+# fields below; the replay file format is one such dict per line (NDJSON).
+#   post:    id, subreddit, author, created_utc, title, score, num_comments, awards
+#   comment: id, subreddit, author, created_utc, body, post_id, is_reply
+
+# Fields every event of a kind must carry (author is None for deleted accounts)
+_REQUIRED_FIELDS = {
+    'post': ('id', 'subreddit', 'author', 'created_utc', 'title', 'score', 'num_comments', 'awards'),
+    'comment': ('id', 'subreddit', 'author', 'created_utc', 'body'),
+}
+
+def is_valid_event(event):
+    """Whether an event has a known kind, all its fields and a sane timestamp"""
+    if not isinstance(event, dict):
+        return False
+    fields = _REQUIRED_FIELDS.get(event.get('kind'))
+    if fields is None or any(field not in event for field in fields):
+        return False
+    if event['kind'] == 'post':
+        text = event['title']
+        if not all(isinstance(event[field], (int, float)) for field in ('score', 'num_comments', 'awards')):
+            return False
+    else:
+        text = event['body']
+    return (isinstance(event['id'], str) and isinstance(event['subreddit'], str) and isinstance(text, str)
+            and (event['author'] is None or isinstance(event['author'], str))
+            and valid_timestamp(event['created_utc']))
+
+def post_event(submission):
+    """Convert a PRAW submission into a post event"""
+    return {
+        'kind': 'post',
+        'id': submission.id,
+        'subreddit': submission.subreddit.display_name,
+        'author': submission.author.name if submission.author else None,
+        'created_utc': submission.created_utc,
+        'title': submission.title,
+        'score': submission.score,
+        'num_comments': submission.num_comments,
+        'awards': submission.total_awards_received
+    }
+
+def comment_event(comment):
+    """Convert a PRAW comment into a comment event"""
+    return {
+        'kind': 'comment',
+        'id': comment.id,
+        'subreddit': comment.subreddit.display_name,
+        'author': comment.author.name if comment.author else None,
+        'created_utc': comment.created_utc,
+        'body': comment.body,
+        'post_id': comment.link_id[3:],
+        'is_reply': comment.parent_id.startswith('t1_')
+    }
+
+class ReplaySource:
+    """
+    Event source replaying a local NDJSON file, e.g. a recorded stream
+    """
+
+    def __init__(self, path, subreddits=None):
+        """
+        Args:
+            path (str): File with one event dict per line
+            subreddits (iterable): Only replay events of these subreddits, None for all
+        """
+        self.path = path
+        self.subreddits = {name.lower() for name in subreddits} if subreddits else None
+
+    def __iter__(self):
+        with open(self.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # Passed on as is; the worker skips and counts it like any bad event
+                    yield line
+                    continue
+                if (self.subreddits is None or not isinstance(event, dict)
+                        or str(event.get('subreddit')).lower() in self.subreddits):
+                    yield event
+
+    def close(self):
+        pass
+
+class PrawStreamSource:
+    """
+    Live event source following the new submissions and comments of a set of subreddits
+    """
+
+    def __init__(self, subreddits, reddit=None, idle_delay=5.0):
+        """
+        Args:
+            subreddits (iterable): The subreddits to follow
+            reddit (praw.Reddit): Client to stream with, defaults to the shared RedditClient instance
+            idle_delay (float): Seconds to wait before polling again when neither stream had new items
+        """
+        self.subreddits = list(subreddits)
+        self.reddit = reddit
+        self.idle_delay = idle_delay
+        self._closed = threading.Event()
+
+    def __iter__(self):
+        """Yield events as they arrive, and None whenever both streams are idle"""
+        reddit = self.reddit
+        if reddit is None:
+            from models.reddit_client import RedditClient
+            reddit = RedditClient.get_instance()
+        if reddit is None:
+            raise RuntimeError("Reddit API unavailable")
+
+        stream = reddit.subreddit('+'.join(self.subreddits)).stream
+        # pause_after=-1 makes each stream yield None once it has no new items,
+        # so the two streams can be interleaved on one thread
+        streams = (
+            (stream.submissions(pause_after=-1), post_event),
+            (stream.comments(pause_after=-1), comment_event),
+        )
+        while not self._closed.is_set():
+            idle = True
+            for items, to_event in streams:
+                for item in items:
+                    if item is None or self._closed.is_set():
+                        break
+                    idle = False
+                    yield to_event(item)
+            yield None
+            if idle:
+                self._closed.wait(self.idle_delay)
+
+    def close(self):
+        self._closed.set()
+
+class LiveAggregates:
+    """
+    Per-subreddit aggregates kept current by the ingestion worker
+
+    Reads return copies taken under a lock, so they never observe a
+    half-applied batch. The ids of the latest applied posts and comments
+    are remembered, so a live source replaying its recent backlog after a
+    reconnect does not count them twice.
+    """
+
+    def __init__(self, recent_posts=10, window=None, seen_ids=None):
+        """
+        Args:
+            recent_posts (int): Number of latest scored posts kept for sentiment
+            window (int): Number of latest posts ranked for influencers and latest
+                authors kept for bot screening, defaults to TRENDLENS_INGEST_WINDOW or 200
+            seen_ids (int): Number of latest post and comment ids remembered,
+                defaults to TRENDLENS_INGEST_SEEN_IDS or 100000
+        """
+        if window is None:
+            window = int(os.environ.get("TRENDLENS_INGEST_WINDOW", 200))
+        if seen_ids is None:
+            seen_ids = int(os.environ.get("TRENDLENS_INGEST_SEEN_IDS", 100000))
+        self.recent_posts = recent_posts
+        self.window = window
+        self.seen_ids = seen_ids
+        self.duplicates = 0
+        self._seen = OrderedDict()
+        self._sentiment = {}
+        self._posts = {}
+        self._influencers = {}
+        self._authors = {}
+        self._updated_at = {}
+        self._lock = threading.Lock()
+
+    def _subreddit(self, subreddit):
+        key = subreddit.lower()
+        if key not in self._posts:
+            self._sentiment[key] = deque(maxlen=self.recent_posts)
+            self._posts[key] = deque()
+            self._influencers[key] = InfluencerAggregator()
+            self._authors[key] = OrderedDict()
+        return key
+
+    def _first_sighting(self, fullname):
+        """Remember an id, returning False if it was seen before; the caller holds the lock"""
+        if fullname in self._seen:
+            self._seen.move_to_end(fullname)
+            self.duplicates += 1
+            return False
+        self._seen[fullname] = None
+        if len(self._seen) > self.seen_ids:
+            self._seen.popitem(last=False)
+        return True
+
+    def apply(self, subreddit, posts, comments, sentiment_results):
+        """
+        Fold a batch of one subreddit's events into its aggregates
+
+        Posts and comments applied before are skipped.
+
+        Args:
+            subreddit (str): The subreddit
+            posts (list): Post events, oldest first
+            comments (list): Comment events, oldest first
+            sentiment_results (list): Sentiment result of each post's title
+        """
+        with self._lock:
+            new_posts = [
+                (post, result) for post, result in zip(posts, sentiment_results)
+                if self._first_sighting(f"t3_{post['id']}")
+            ]
+            posts = [post for post, _ in new_posts]
+            sentiment_results = [result for _, result in new_posts]
+            comments = [comment for comment in comments if self._first_sighting(f"t1_{comment['id']}")]
+
+            key = self._subreddit(subreddit)
+            self._sentiment[key].extend(sentiment_results)
+
+            window, influencers, authors = self._posts[key], self._influencers[key], self._authors[key]
+            for post in posts:
+                if not post['author']:
+                    continue
+                window.append(post)
+                influencers.add(post)
+                if len(window) > self.window:
+                    influencers.remove(window.popleft())
+
+            for event in sorted(posts + comments, key=lambda event: event['created_utc']):
+                if event['author']:
+                    authors.pop(event['author'], None)
+                    authors[event['author']] = event['created_utc']
+            while len(authors) > self.window:
+                authors.popitem(last=False)
+
+            self._updated_at[key] = time.time()
+
+    def has_subreddit(self, subreddit):
+        with self._lock:
+            return subreddit.lower() in self._posts
+
+    def recent_sentiment(self, subreddit):
+        """Sentiment results of the latest posts, newest first, or None if not ingested"""
+        with self._lock:
+            results = self._sentiment.get(subreddit.lower())
+            return None if results is None else list(reversed(results))
+
+    def influencer_aggregator(self, subreddit):
+        """Snapshot of the influencer totals over the post window, or None if not ingested"""
+        with self._lock:
+            aggregator = self._influencers.get(subreddit.lower())
+            return None if aggregator is None else aggregator.copy()
+
+    def recent_authors(self, subreddit):
+        """Most recently active authors, newest first, or None if not ingested"""
+        with self._lock:
+            authors = self._authors.get(subreddit.lower())
+            return None if authors is None else list(reversed(authors))
+
+    def updated_at(self, subreddit):
+        """UTC timestamp of the last batch applied to a subreddit, or None"""
+        with self._lock:
+            return self._updated_at.get(subreddit.lower())
+
+    def stats(self):
+        with self._lock:
+            return {
+                subreddit: {
+                    'windowPosts': len(self._posts[subreddit]),
+                    'authors': len(self._authors[subreddit]),
+                    'updatedAt': self._updated_at.get(subreddit)
+                }
+                for subreddit in self._posts
+            }
+
+# Shared by the ingestion worker (writer) and the models (readers)
+live_aggregates = LiveAggregates()
+
+class IngestionWorker:
+    """
+    Background thread consuming an event source into the live aggregates
+
+    Events are applied in batches of up to `batch_size`, or whatever
+    arrived within `flush_interval` seconds. Each batch:
+
+    - appends posts and comments to the activity store
+    - scores post titles for sentiment in one batch and records them in the running sentiment aggregates
+    - adds posts and comments to the shared near-duplicate index used by bot scoring
+    - updates the influencer window and recent authors of each subreddit
+    """
+
+    def __init__(self, source, aggregates=None, store=None, batch_size=100, flush_interval=1.0, retry_delay=30):
+        """
+        Args:
+            source (iterable): Yields event dicts, or None when idle
+            aggregates (LiveAggregates): Defaults to the shared live_aggregates
+            store (TimeSeriesStore): Defaults to the shared activity store
+            batch_size (int): Maximum events per batch
+            flush_interval (float): Seconds before a partial batch is applied
+            retry_delay (float): Seconds to wait before reopening a failed live source
+        """
+        self.source = source
+        self.aggregates = aggregates or live_aggregates
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self.events = 0
+        self.batches = 0
+        self.errors = 0
+        self.skipped = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="ingestion", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self.source.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self):
+        """Consume the source until it ends or the worker is stopped"""
+        while not self._stop.is_set():
+            try:
+                self._consume()
+                return
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Ingestion source failed: %s", e)
+                if isinstance(self.source, ReplaySource):
+                    return
+                self._stop.wait(self.retry_delay)
+
+    def _consume(self):
+        batch = []
+        flush_at = time.monotonic() + self.flush_interval
+        for event in self.source:
+            if self._stop.is_set():
+                break
+            if event is not None:
+                batch.append(event)
+            if batch and (len(batch) >= self.batch_size or event is None or time.monotonic() >= flush_at):
+                self.apply_batch(batch)
+                batch = []
+                flush_at = time.monotonic() + self.flush_interval
+        if batch:
+            self.apply_batch(batch)
+
+    def apply_batch(self, events):
+        """Fold one batch of events into the store, the content index and the live aggregates"""
+        from models.near_duplicate import get_default_index
+        from models.sentiment_analysis import SentimentAnalysisModel
+
+        store = self.store or get_default_store()
+        index = get_default_index()
+
+        valid = [event for event in events if is_valid_event(event)]
+        if len(valid) < len(events):
+            self.skipped += len(events) - len(valid)
+            logger.warning("Skipped %d malformed ingestion events", len(events) - len(valid))
+
+        by_subreddit = {}
+        for event in valid:
+            posts, comments = by_subreddit.setdefault(event['subreddit'], ([], []))
+            (posts if event['kind'] == 'post' else comments).append(event)
+
+        for subreddit, (posts, comments) in by_subreddit.items():
+            store.ingest_posts(subreddit, posts)
+            store.ingest_comments(subreddit, comments)
+
+            for post in posts:
+                index.add(f"t3_{post['id']}", post['title'], post['author'], subreddit, post['created_utc'])
+            for comment in comments:
+                index.add(f"t1_{comment['id']}", comment['body'], comment['author'], subreddit, comment['created_utc'])
+
+            sentiment_results = SentimentAnalysisModel.analyze_titles([post['title'] for post in posts])
+            SentimentAnalysisModel.record_results(subreddit, posts, sentiment_results)
+            self.aggregates.apply(subreddit, posts, comments, sentiment_results)
+
+        self.events += len(valid)
+        self.batches += 1
+
+    def stats(self):
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'events': self.events,
+            'batches': self.batches,
+            'errors': self.errors,
+            'skipped': self.skipped,
+            'duplicates': self.aggregates.duplicates,
+            'subreddits': self.aggregates.stats()
+        }
+
+_worker = None
+
+def start_ingestion_from_config():
+    """
+    Start the ingestion worker configured by the environment, if any
+
+    TRENDLENS_INGEST_REPLAY names an NDJSON file to replay; otherwise
+    TRENDLENS_INGEST_SUBREDDITS (comma-separated) are followed live.
+    TRENDLENS_INGEST_SUBREDDITS also filters a replay.
+
+    Returns:
+        IngestionWorker: The started worker, or None if ingestion is not configured
+    """
+    global _worker
+    subreddits = [name.strip() for name in os.environ.get("TRENDLENS_INGEST_SUBREDDITS", "").split(',') if name.strip()]
+    replay_path = os.environ.get("TRENDLENS_INGEST_REPLAY")
+
+    if replay_path:
+        source = ReplaySource(replay_path, subreddits or None)
+    elif subreddits:
+        source = PrawStreamSource(subreddits)
+    else:
+        return None
+
+    _worker = IngestionWorker(source).start()
+    logger.info("Started ingestion from %s", replay_path or 'r/' + '+'.join(subreddits))
+    return _worker
+
+def get_ingestion_worker():
+    return _worker
@@ -0,0 +1,117 @@
+import asyncio
+import math
+import os
+import time
+
+LATENCY_MODES = ("none", "simulated", "deadline-ms")
+
+# Simulated API delays (in seconds) used by the "simulated" latency mode
+SIMULATED_DELAYS = {
+    "bot.analyze_user": 1.0,
+    "bot.get_subreddit_bots": 1.5,
+    "influencer.analyze_user": 1.2,
+    "sentiment.analyze_subreddit": 1.0,
+    "trend.get_trend_data": 1.5,
+    "trend.get_activity_data": 1.2,
+}
+
+def _positive_ms(value):
+    try:
+        milliseconds = float(value)
+    except (TypeError, ValueError):
+        milliseconds = None
+    if milliseconds is None or not math.isfinite(milliseconds) or milliseconds <= 0:
+        raise ValueError(f"A deadline must be a positive number of milliseconds, got {value!r}")
+    return milliseconds
+
+class LatencyBudget:
+    """
+    Latency policy and time accounting for a single model call
+
+    Modes:
+        none: do the work as fast as possible
+        simulated: sleep for the historical mock API delay before working
+        deadline-ms: stop early and return a partial result once the
+            deadline has passed
+    """
+
+    def __init__(self, mode="none", deadline_ms=None):
+        if mode not in LATENCY_MODES:
+            raise ValueError(f"Unknown latency mode '{mode}', expected one of {', '.join(LATENCY_MODES)}")
+        if mode == "deadline-ms" and deadline_ms is None:
+            raise ValueError("The deadline-ms latency mode requires a deadline")
+        if deadline_ms is not None:
+            deadline_ms = _positive_ms(deadline_ms)
+
+        self.mode = mode
+        self.deadline_ms = deadline_ms
+        self.partial = False
+        # Unix time a precomputed result served for the call was computed
+        self.computed_at = None
+        self._started = time.perf_counter()
+        self._simulated = set()
+
+    @classmethod
+    def from_config(cls, mode=None, deadline_ms=None):
+        """
+        Build a budget from explicit values or the environment
+
+        Args:
+            mode (str): Latency mode, defaults to TRENDLENS_LATENCY_MODE or "none"
+            deadline_ms (float): Deadline in milliseconds, defaults to TRENDLENS_DEADLINE_MS or 1000
+
+        Returns:
+            LatencyBudget: A budget whose clock starts now
+        """
+        if mode is None:
+            mode = os.environ.get("TRENDLENS_LATENCY_MODE", "none")
+        if deadline_ms is None and mode == "deadline-ms":
+            deadline_ms = os.environ.get("TRENDLENS_DEADLINE_MS", 1000)
+        return cls(mode, deadline_ms)
+
+    def simulate(self, operation):
+        """Sleep for the simulated delay of an operation when in simulated mode"""
+        if self.mode == "simulated" and operation not in self._simulated:
+            self._simulated.add(operation)
+            time.sleep(SIMULATED_DELAYS.get(operation, 0))
+
+    async def simulate_async(self, operation):
+        """
+        Await the simulated delay of an operation without holding a thread
+
+        A later simulate() call for the same operation is then a no-op.
+        """
+        if self.mode == "simulated" and operation not in self._simulated:
+            self._simulated.add(operation)
+            await asyncio.sleep(SIMULATED_DELAYS.get(operation, 0))
+
+    def elapsed_ms(self):
+        """Milliseconds spent since the budget was created"""
+        return (time.perf_counter() - self._started) * 1000
+
+    def remaining_ms(self):
+        """Milliseconds left before the deadline, or None when there is no deadline"""
+        if self.mode != "deadline-ms":
+            return None
+        return max(self.deadline_ms - self.elapsed_ms(), 0.0)
+
+    def exhausted(self):
+        """
+        Check whether the deadline has passed
+
+        Once exhausted, the result being built is flagged as partial.
+        """
+        if self.mode != "deadline-ms":
+            return False
+        if self.elapsed_ms() >= self.deadline_ms:
+            self.partial = True
+        return self.partial
+
+def check_latency_config():
+    """
+    Raise ValueError if TRENDLENS_LATENCY_MODE or TRENDLENS_DEADLINE_MS is invalid
+
+    Called at startup, so a bad setting stops the server instead of failing
+    every request.
+    """
+    LatencyBudget.from_config()
@@ -0,0 +1,37 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+_listener = None
+_listener_lock = threading.Lock()
+
+def configure_logging(level=None):
+    """
+    Route log records through a queue to a background writer thread
+
+    Request threads only enqueue their records, so a slow or blocked
+    stderr never stalls them. Calling this again has no effect.
+
+    Args:
+        level (str): Root log level, defaults to TRENDLENS_LOG_LEVEL or INFO
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        level = (level or os.environ.get("TRENDLENS_LOG_LEVEL", "INFO")).upper()
+
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        records = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        root = logging.getLogger()
+        root.addHandler(logging.handlers.QueueHandler(records))
+        root.setLevel(level)
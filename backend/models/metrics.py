@@ -0,0 +1,271 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Hot-path stages timed by timed() / record_stage(), in Server-Timing order
+STAGES = ("fetch", "clean", "vader", "textblob", "ml_predict", "aggregate", "forecast", "serialize")
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Metric name -> (Prometheus type, help text)
+METRICS = {
+    'trendlens_requests_total': ('counter', "API requests served, by route and status"),
+    'trendlens_coalesced_requests_total': ('counter', "API requests answered by an identical request's analysis, by route and source"),
+    'trendlens_precomputed_served_total': ('counter', "API requests served a precomputed result, by route"),
+    'trendlens_precompute_runs_total': ('counter', "Background refreshes of watched subreddits, by job and status"),
+    'trendlens_precomputed_results': ('gauge', "Precomputed results currently stored"),
+    'trendlens_precomputed_oldest_seconds': ('gauge', "Age of the oldest stored precomputed result"),
+    'trendlens_precompute_unrefreshed_subreddits': ('gauge', "Watched subreddits the precompute budget could not cover in the last cycle"),
+    'trendlens_request_seconds': ('histogram', "API request latency, by route"),
+    'trendlens_stage_seconds': ('histogram', "Time spent in each hot-path stage"),
+    'trendlens_reddit_calls_total': ('counter', "Reddit API calls, by endpoint"),
+    'trendlens_reddit_errors_total': ('counter', "Failed Reddit API calls, by endpoint"),
+    'trendlens_mock_fallbacks_total': ('counter', "Results that fell back to mock data, by source"),
+    'trendlens_cache_hits_total': ('counter', "Cache hits, by cache"),
+    'trendlens_cache_misses_total': ('counter', "Cache misses, by cache"),
+    'trendlens_cache_evictions_total': ('counter', "Entries evicted to stay under the cache size, by cache"),
+    'trendlens_cache_coalesced_total': ('counter', "Misses that waited for another thread's load, by cache"),
+    'trendlens_cache_entries': ('gauge', "Entries currently cached, by cache"),
+    'trendlens_collector_errors': ('gauge', "Collectors that failed during this scrape, by error"),
+}
+
+# Timings of the request being served, when one is being tracked
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and latency histograms in the Prometheus text format
+
+    Metrics live in process memory, so each server worker process reports
+    its own values. Values that other components already count (such as
+    cache hits) are read from them at scrape time through collectors.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Args:
+            buckets (tuple): Ascending upper bounds of the histogram buckets, in seconds
+        """
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        """Add to a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """Record one observation in a histogram"""
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # Per-bucket counts (the last one is +Inf), sum and count
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def add_collector(self, collect):
+        """
+        Register a source of samples read at every scrape
+
+        Args:
+            collect (callable): Returns (name, labels dict, value) samples
+        """
+        with self._lock:
+            self._collectors.append(collect)
+
+    def clear(self):
+        """Reset every counter and histogram; collectors stay registered"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def _samples(self):
+        """Metric name -> list of (sample suffix, labels, value)"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(counts), total, count) for key, (counts, total, count) in self._histograms.items()}
+            collectors = list(self._collectors)
+
+        samples = {}
+        for (name, labels), value in counters.items():
+            samples.setdefault(name, []).append(("", labels, value))
+        for (name, labels), (counts, total, count) in histograms.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                samples.setdefault(name, []).append(("_bucket", labels + (('le', _format_value(float(bound))),), cumulative))
+            samples[name].append(("_sum", labels, total))
+            samples[name].append(("_count", labels, count))
+        for collect in collectors:
+            try:
+                for name, labels, value in collect():
+                    samples.setdefault(name, []).append(("", tuple(sorted(labels.items())), value))
+            except Exception as e:
+                samples.setdefault('trendlens_collector_errors', []).append(("", (('error', type(e).__name__),), 1))
+        return samples
+
+    def render(self):
+        """
+        All metrics in the Prometheus text exposition format
+
+        Returns:
+            str: One HELP/TYPE block per metric followed by its samples
+        """
+        lines = []
+        for name, samples in sorted(self._samples().items()):
+            kind, help_text = METRICS.get(name, ('untyped', name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+# Shared by every model and route
+metrics = MetricsRegistry()
+
+def count(name, amount=1, **labels):
+    """Add to a counter of the shared registry"""
+    metrics.inc(name, amount, **labels)
+
+def observe(name, value, **labels):
+    """Record an observation in a histogram of the shared registry"""
+    metrics.observe(name, value, **labels)
+
+def mock_fallback(source, amount=1):
+    """Count results served from mock data instead of Reddit or the models"""
+    metrics.inc('trendlens_mock_fallbacks_total', amount, source=source)
+
+def record_stage(stage, seconds):
+    """Record time spent in a hot-path stage, adding it to the tracked request's timings too"""
+    metrics.observe('trendlens_stage_seconds', seconds, stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+@contextmanager
+def timed(stage):
+    """Time the body of a with block as a hot-path stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+def cache_samples(cache, stats):
+    """
+    Samples of the cache metrics from a TTLCache-style stats() dict
+
+    Args:
+        cache (str): Value of the cache label
+        stats (dict): Counters with 'hits', 'misses' and optionally 'evictions', 'coalesced' and 'size'
+
+    Returns:
+        list: (name, labels, value) samples
+    """
+    labels = {'cache': cache}
+    samples = [
+        ('trendlens_cache_hits_total', labels, stats['hits']),
+        ('trendlens_cache_misses_total', labels, stats['misses']),
+    ]
+    for stat, name in (('evictions', 'trendlens_cache_evictions_total'),
+                       ('coalesced', 'trendlens_cache_coalesced_total'),
+                       ('size', 'trendlens_cache_entries')):
+        if stat in stats:
+            samples.append((name, labels, stats[stat]))
+    return samples
+
+class RequestTimings:
+    """
+    Seconds spent in each stage while serving one request, and how often it ran
+
+    Stages running on several threads at once (such as parallel fetches)
+    add up, so a stage can exceed the request's wall-clock time. The fetch
+    count is the number of Reddit API calls made for the request.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def server_timing(self, total_ms=None):
+        """
+        The timings as a Server-Timing header value
+
+        Args:
+            total_ms (float): Wall-clock time of the whole request, reported as 'total'
+
+        Returns:
+            str: e.g. "fetch;dur=12.5, vader;dur=3.1, total;dur=20.4"
+        """
+        with self._lock:
+            stages = dict(self.stages)
+        order = [stage for stage in STAGES if stage in stages] + sorted(set(stages) - set(STAGES))
+        parts = [f"{stage};dur={stages[stage] * 1000:.1f}" for stage in order]
+        if total_ms is not None:
+            parts.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(parts)
+
+@contextmanager
+def track_request():
+    """
+    Collect the stage timings of the work done inside the with block
+
+    Timings are tracked through a context variable, so they follow the
+    request into threads started with a copy of the context
+    (contextvars.copy_context().run).
+
+    Yields:
+        RequestTimings: The timings collected so far
+    """
+    timings = RequestTimings()
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+def server_timing_requested(header_value=None):
+    """
+    Whether to report the per-stage breakdown of a request
+
+    Args:
+        header_value (str): The request's X-Server-Timing header, if any
+
+    Returns:
+        bool: True when TRENDLENS_SERVER_TIMING is enabled or the request asked for it
+    """
+    truthy = ("1", "true", "yes")
+    if os.environ.get("TRENDLENS_SERVER_TIMING", "").strip().lower() in truthy:
+        return True
+    return (header_value or "").strip().lower() in truthy
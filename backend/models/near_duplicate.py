@@ -0,0 +1,242 @@
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+from models.text_cleaning import TextCleaner
+
+# Mersenne prime 2^31 - 1: (a * h + b) stays below 2^64 for 32-bit shingle hashes
+_PRIME = np.uint64((1 << 31) - 1)
+
+class MinHasher:
+    """
+    MinHash signatures of character shingles, computed with numpy
+    """
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        """
+        Args:
+            num_perm (int): Number of hash permutations (signature length)
+            shingle_size (int): Characters per shingle
+            seed (int): Seed of the permutation coefficients, fixed so signatures are stable across processes
+        """
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._a = rng.randint(1, (1 << 31) - 1, size=num_perm).astype(np.uint64)[:, np.newaxis]
+        self._b = rng.randint(0, (1 << 31) - 1, size=num_perm).astype(np.uint64)[:, np.newaxis]
+
+    def shingles(self, text):
+        k = self.shingle_size
+        if len(text) <= k:
+            return {text}
+        return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+    def signature(self, text):
+        """
+        Args:
+            text (str): Already normalized text
+
+        Returns:
+            numpy.ndarray: (num_perm,) uint64 signature
+        """
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode('utf-8')) for shingle in self.shingles(text)), dtype=np.uint64
+        ) % _PRIME
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1)
+
+    @staticmethod
+    def similarity(signature, other):
+        """Estimated Jaccard similarity of the texts behind two signatures"""
+        return float(np.mean(signature == other))
+
+class NearDuplicateIndex:
+    """
+    MinHash LSH index of post and comment text
+
+    Each signature is split into `bands` bands; two texts become candidates
+    when any band matches exactly, so a lookup only compares against texts
+    sharing a bucket instead of the whole index. Candidates are kept when
+    their estimated Jaccard similarity reaches `threshold`.
+
+    Text is normalized with the sentiment TextCleaner first, so casing,
+    URLs, punctuation, stopwords and verb inflections do not hide a repost.
+    Texts with fewer than `min_words` cleaned words are ignored, so short
+    replies such as "thanks!" are not treated as reposts.
+    """
+
+    def __init__(self, num_perm=128, bands=32, threshold=0.8, min_words=3, max_documents=None, cleaner=None):
+        """
+        Args:
+            num_perm (int): MinHash signature length, a multiple of bands
+            bands (int): Number of LSH bands
+            threshold (float): Minimum estimated Jaccard similarity of a near-duplicate
+            min_words (int): Minimum cleaned words for a text to be indexed
+            max_documents (int): Oldest documents are evicted beyond this many, None for no limit
+            cleaner (TextCleaner): Text normalizer, defaults to a new TextCleaner
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.min_words = min_words
+        self.max_documents = max_documents
+        self.cleaner = cleaner or TextCleaner()
+        self._buckets = {}
+        # doc_id -> (signature, author, subreddit, created_utc), in insertion order
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def signature(self, text):
+        """Normalize and sign a text, or return None if it is too short to index"""
+        cleaned = self.cleaner.clean(text)
+        if len(cleaned.split()) < self.min_words:
+            return None
+        return self.hasher.signature(cleaned)
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def _matches(self, signature, author=None, subreddit=None, exclude_author=None, before=None):
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+
+        matches = []
+        for doc_id in candidates:
+            other, doc_author, doc_subreddit, doc_created = self._documents[doc_id]
+            if author is not None and doc_author != author:
+                continue
+            if exclude_author is not None and doc_author == exclude_author:
+                continue
+            if subreddit is not None and doc_subreddit != subreddit:
+                continue
+            # Documents without a timestamp can not be ordered and always count
+            if before is not None and doc_created is not None and doc_created >= before:
+                continue
+            if MinHasher.similarity(signature, other) >= self.threshold:
+                matches.append(doc_id)
+        return matches
+
+    def query(self, text, author=None, subreddit=None, exclude_author=None):
+        """
+        Find indexed near-duplicates of a text
+
+        Args:
+            text (str): The raw post or comment text
+            author (str): Only match documents by this author
+            subreddit (str): Only match documents in this subreddit
+            exclude_author (str): Ignore documents by this author
+
+        Returns:
+            list: Ids of the matching documents
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        with self._lock:
+            return self._matches(signature, _lower(author), _lower(subreddit), _lower(exclude_author))
+
+    def add(self, doc_id, text, author=None, subreddit=None, created_utc=None):
+        """
+        Index a document and return the near-duplicates posted before it
+
+        Args:
+            doc_id (str): Unique id, e.g. the Reddit fullname; a re-added id is not indexed twice
+            text (str): The raw post or comment text
+            author (str): The document's author
+            subreddit (str): The document's subreddit
+            created_utc (float): When the document was posted, None if unknown
+
+        Returns:
+            list: Ids of earlier near-duplicate documents
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        return self._insert(doc_id, signature, _lower(author), _lower(subreddit), created_utc)
+
+    def _insert(self, doc_id, signature, author, subreddit, created_utc=None, exclude_author=None):
+        with self._lock:
+            matches = [
+                match for match in self._matches(signature, exclude_author=exclude_author, before=created_utc)
+                if match != doc_id
+            ]
+            if doc_id in self._documents:
+                return matches
+            self._documents[doc_id] = (signature, author, subreddit, created_utc)
+            for key in self._band_keys(signature):
+                self._buckets.setdefault(key, set()).add(doc_id)
+            while self.max_documents is not None and len(self._documents) > self.max_documents:
+                self._evict_oldest()
+        return matches
+
+    def _evict_oldest(self):
+        doc_id, (signature, _, _, _) = self._documents.popitem(last=False)
+        for key in self._band_keys(signature):
+            bucket = self._buckets[key]
+            bucket.discard(doc_id)
+            if not bucket:
+                del self._buckets[key]
+
+    def count_repeated(self, author, items):
+        """
+        Index an author's posts and comments and count the repeated ones
+
+        An item is repeated when it near-duplicates an earlier item in
+        `items` or a document another author posted before it. The original
+        of a copied text is therefore not counted against its author, no
+        matter which of the two authors is scored first.
+
+        Args:
+            author (str): The items' author
+            items (iterable): (doc_id, text, subreddit, created_utc) tuples, oldest first
+
+        Returns:
+            int: Number of repeated items
+        """
+        author = _lower(author)
+        own_items = NearDuplicateIndex(
+            self.hasher.num_perm, self.bands, self.threshold, self.min_words, cleaner=self.cleaner
+        )
+        repeated = 0
+        for doc_id, text, subreddit, created_utc in items:
+            signature = self.signature(text)
+            if signature is None:
+                continue
+            subreddit = _lower(subreddit)
+            earlier_own = own_items._insert(doc_id, signature, author, subreddit)
+            other_authors = self._insert(doc_id, signature, author, subreddit, created_utc, exclude_author=author)
+            if earlier_own or other_authors:
+                repeated += 1
+        return repeated
+
+    def __len__(self):
+        return len(self._documents)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'documents': len(self._documents),
+                'buckets': len(self._buckets),
+                'maxDocuments': self.max_documents
+            }
+
+def _lower(name):
+    return name.lower() if name else None
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+def get_default_index():
+    """Return the process-wide content index, sized by TRENDLENS_DUPLICATE_INDEX_SIZE"""
+    global _default_index
+    if _default_index is None:
+        with _default_index_lock:
+            if _default_index is None:
+                max_documents = int(os.environ.get("TRENDLENS_DUPLICATE_INDEX_SIZE", 200000))
+                _default_index = NearDuplicateIndex(max_documents=max_documents or None)
+    return _default_index
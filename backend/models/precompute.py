@@ -0,0 +1,501 @@
+import contextvars
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from models.fetch_scheduler import RateLimiter
+from models.latency import LatencyBudget
+from models.metrics import count, metrics, track_request
+from models.timeseries_store import data_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Whether the code running is a background refresh rather than a request
+_refreshing = contextvars.ContextVar("precompute_refreshing", default=False)
+
+def _interval_from_config():
+    return float(os.environ.get("TRENDLENS_PRECOMPUTE_INTERVAL", 300))
+
+@contextmanager
+def refreshing():
+    """
+    Mark the work done inside the with block as a background refresh
+
+    Handlers serving precomputed results compute a fresh one instead, and
+    store it, while this is set.
+    """
+    token = _refreshing.set(True)
+    try:
+        yield
+    finally:
+        _refreshing.reset(token)
+
+def is_refreshing():
+    return _refreshing.get()
+
+class PrecomputedResults:
+    """
+    Thread-safe store of the latest precomputed result per key, with its freshness
+
+    Results are kept in memory and, once share() is called, in an SQLite
+    file as well, so the process running the scheduler stores results that
+    every worker process on the host serves. Results older than `max_age`
+    are no longer served, so a subreddit whose refreshes keep failing falls
+    back to being computed on demand.
+    """
+
+    def __init__(self, max_age=None):
+        """
+        Args:
+            max_age (float): Seconds a result is served for, defaults to
+                TRENDLENS_PRECOMPUTE_MAX_AGE or three refresh intervals; 0 serves results of any age
+        """
+        if max_age is None:
+            max_age = float(os.environ.get("TRENDLENS_PRECOMPUTE_MAX_AGE", 3 * _interval_from_config()))
+        self.max_age = max_age
+        self._results = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def share(self, path):
+        """
+        Keep results in an SQLite file shared by every worker process
+
+        Args:
+            path (str): SQLite database file
+        """
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, computed_at REAL NOT NULL, result TEXT NOT NULL)"
+        )
+        with self._lock:
+            self._conn = conn
+
+    @staticmethod
+    def _disk_key(key):
+        return json.dumps(key)
+
+    def get(self, key):
+        """
+        Return (result, computed_at) for a key, or None if it has no result fresh enough to serve
+
+        computed_at is the Unix time the result was computed.
+        """
+        with self._lock:
+            entry = self._results.get(key)
+            if self._conn is not None:
+                # Only decode a stored result when another process has replaced it
+                row = self._conn.execute(
+                    "SELECT computed_at FROM results WHERE key = ?", (self._disk_key(key),)
+                ).fetchone()
+                if row is None:
+                    entry = None
+                elif entry is None or entry[1] != row[0]:
+                    row = self._conn.execute(
+                        "SELECT result, computed_at FROM results WHERE key = ?", (self._disk_key(key),)
+                    ).fetchone()
+                    entry = self._results[key] = (json.loads(row[0]), row[1]) if row else None
+        if entry is None:
+            return None
+        if self.max_age and time.time() - entry[1] > self.max_age:
+            return None
+        return entry
+
+    def put(self, key, result, computed_at=None):
+        entry = (result, computed_at or time.time())
+        with self._lock:
+            self._results[key] = entry
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO results (key, computed_at, result) VALUES (?, ?, ?)",
+                        (self._disk_key(key), entry[1], json.dumps(result))
+                    )
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM results")
+
+    def stats(self):
+        """Return the number of stored results and the age of the oldest one"""
+        with self._lock:
+            if self._conn is not None:
+                size, oldest = self._conn.execute("SELECT COUNT(*), MIN(computed_at) FROM results").fetchone()
+            else:
+                computed = [computed_at for _, computed_at in self._results.values()]
+                size, oldest = len(computed), min(computed, default=None)
+        return {
+            'size': size,
+            'maxAge': self.max_age,
+            'oldestSeconds': round(time.time() - oldest, 1) if oldest is not None else None
+        }
+
+class SubredditPopularity:
+    """
+    Decaying request counts per subreddit, used to refresh the busiest subreddits first
+
+    Only watched subreddits are counted. Counts are halved after every
+    refresh cycle, so recent traffic outweighs old traffic.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._watched = frozenset()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(subreddit):
+        return (subreddit or "").strip().lower()
+
+    def watch(self, subreddits):
+        """Start counting requests for these subreddits"""
+        with self._lock:
+            self._watched = self._watched | {self._key(subreddit) for subreddit in subreddits}
+
+    def record(self, subreddit):
+        """Count one request for a subreddit, if it is watched"""
+        key = self._key(subreddit)
+        if key not in self._watched:
+            return
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0.0) + 1
+
+    def rank(self, subreddits):
+        """Return subreddits ordered by request count, most requested first; ties keep their order"""
+        with self._lock:
+            counts = dict(self._counts)
+        return sorted(subreddits, key=lambda subreddit: -counts.get(self._key(subreddit), 0.0))
+
+    def decay(self, factor=0.5):
+        """Scale every count down, dropping those that fall to almost nothing"""
+        with self._lock:
+            self._counts = {key: value * factor for key, value in self._counts.items() if value * factor >= 0.01}
+
+    def top(self, limit=10):
+        with self._lock:
+            ranked = sorted(self._counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [{'subreddit': key, 'requests': round(value, 2)} for key, value in ranked]
+
+# Shared by the precompute scheduler (writer) and the API handlers (readers)
+precomputed_results = PrecomputedResults()
+subreddit_popularity = SubredditPopularity()
+
+def _result_samples():
+    stats = precomputed_results.stats()
+    samples = [('trendlens_precomputed_results', {}, stats['size'])]
+    if stats['oldestSeconds'] is not None:
+        samples.append(('trendlens_precomputed_oldest_seconds', {}, stats['oldestSeconds']))
+    return samples
+
+metrics.add_collector(_result_samples)
+
+class LeaderLock:
+    """
+    Exclusive lock on a file, held by at most one process on the host until it exits
+
+    Worker processes all start a precompute scheduler; only the one holding
+    the lock refreshes, and another takes over when it exits. Without fcntl
+    (Windows) every process holds the lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        """Take the lock without waiting, returning whether this process holds it"""
+        if self._file is not None or fcntl is None:
+            return True
+        f = open(self.path, 'a')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def held(self):
+        return self._file is not None or fcntl is None
+
+def budget_capacity(calls_per_refresh, requests_per_minute, max_age):
+    """
+    Number of subreddits a Reddit request budget can refresh before their results expire
+
+    Args:
+        calls_per_refresh (float): Budget one subreddit's refresh takes
+        requests_per_minute (float): The budget, 0 for no limit
+        max_age (float): Seconds results are served for, 0 for no limit
+
+    Returns:
+        int: The number of subreddits, at least one, or None when the budget or the age is unlimited
+    """
+    if not requests_per_minute or not max_age:
+        return None
+    allowed = requests_per_minute * max_age / 60
+    return max(int(allowed // max(calls_per_refresh, 1)), 1)
+
+class PrecomputeScheduler:
+    """
+    Background thread refreshing the analyses of a watchlist of subreddits
+
+    Every `interval` seconds each watched subreddit is refreshed once, most
+    requested first. Refreshes are spread evenly over the interval, each
+    shifted by a random jitter, so they neither arrive in a burst nor line
+    up with other traffic. A refresh runs every job on the subreddit under
+    refreshing(), so the handlers store their results for requests to be
+    served from.
+
+    With a leader lock, a cycle only runs in the process holding it, so
+    several worker processes refresh the watchlist once between them; the
+    others retry the lock every interval.
+
+    Refreshes are charged to their own Reddit request budget, a share of
+    the one the fetch scheduler enforces for every request: the scheduler
+    waits for a token before each job and pays for the Reddit calls the
+    job made once it finishes. A cycle only refreshes as many of the most
+    requested subreddits as the budget covers before their results expire,
+    at the budget a refresh took in the previous cycle (one token per job
+    before the first). The rest are reported in stats() and computed on
+    demand.
+    """
+
+    def __init__(self, jobs, subreddits, interval=None, requests_per_minute=None, jitter=None, popularity=None,
+                 leader_lock=None):
+        """
+        Args:
+            jobs (dict): Job name -> handler(data, budget), called with {'subreddit': name}
+            subreddits (list): The watchlist
+            interval (float): Seconds between refreshes of a subreddit, defaults to TRENDLENS_PRECOMPUTE_INTERVAL or 300
+            requests_per_minute (float): Reddit request budget of the refreshes,
+                defaults to TRENDLENS_PRECOMPUTE_RPM or 50; 0 disables the budget
+            jitter (float): Random shift of each refresh as a fraction of the gap between refreshes,
+                defaults to TRENDLENS_PRECOMPUTE_JITTER or 0.25
+            popularity (SubredditPopularity): Defaults to the shared subreddit_popularity
+            leader_lock (LeaderLock): Lock a process must hold to refresh, None to always refresh
+        """
+        if interval is None:
+            interval = _interval_from_config()
+        if requests_per_minute is None:
+            requests_per_minute = float(os.environ.get("TRENDLENS_PRECOMPUTE_RPM", 50))
+        if jitter is None:
+            jitter = float(os.environ.get("TRENDLENS_PRECOMPUTE_JITTER", 0.25))
+
+        self.jobs = dict(jobs)
+        self.subreddits = list(dict.fromkeys(subreddits))
+        self.interval = interval
+        self.jitter = jitter
+        self.popularity = popularity or subreddit_popularity
+        self.popularity.watch(self.subreddits)
+        self.requests_per_minute = requests_per_minute
+        self.rate_limiter = RateLimiter(requests_per_minute) if requests_per_minute else None
+        self.leader_lock = leader_lock
+        self.cycles = 0
+        self.refreshes = 0
+        self.errors = 0
+        self.reddit_calls = 0
+        # Budget a refresh took on average in the last cycle, None before the first
+        self.calls_per_refresh = None
+        self.unrefreshed = []
+        self.refreshed_at = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="precompute", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self.leader_lock is not None:
+            self.leader_lock.release()
+
+    def is_leader(self):
+        return self.leader_lock is None or self.leader_lock.held
+
+    def run(self):
+        """Refresh the watchlist every interval until the scheduler is stopped"""
+        while not self._stop.is_set():
+            started = time.monotonic()
+            if self.leader_lock is None or self.leader_lock.acquire():
+                self.run_cycle()
+            self._stop.wait(max(started + self.interval - time.monotonic(), 0))
+
+    def covered(self, ranked):
+        """The leading subreddits of a ranked watchlist the request budget covers"""
+        calls_per_refresh = self.calls_per_refresh if self.calls_per_refresh is not None else len(self.jobs)
+        capacity = budget_capacity(calls_per_refresh, self.requests_per_minute, precomputed_results.max_age)
+        return ranked if capacity is None else ranked[:capacity]
+
+    def run_cycle(self):
+        """Refresh the watched subreddits the budget covers once, most requested first, spread over one interval"""
+        ranked = self.popularity.rank(self.subreddits)
+        if not ranked:
+            return
+        ordered = self.covered(ranked)
+        self.unrefreshed = ranked[len(ordered):]
+        if self.unrefreshed:
+            logger.warning(
+                "The %.0f requests per minute budget covers %d of %d watched subreddits at %.1f Reddit calls "
+                "per refresh; the %d least requested are computed on demand. "
+                "Raise TRENDLENS_PRECOMPUTE_RPM or shorten the watchlist",
+                self.requests_per_minute, len(ordered), len(ranked),
+                self.calls_per_refresh if self.calls_per_refresh is not None else len(self.jobs),
+                len(self.unrefreshed)
+            )
+
+        gap = self.interval / len(ordered)
+        started = time.monotonic()
+        used = 0
+
+        for position, subreddit in enumerate(ordered):
+            due = started + gap * (position + random.uniform(0, self.jitter))
+            if self._stop.wait(max(due - time.monotonic(), 0)):
+                return
+            used += self.refresh(subreddit)
+
+        self.cycles += 1
+        self.calls_per_refresh = used / len(ordered)
+        self.popularity.decay()
+        elapsed = time.monotonic() - started
+        if elapsed > self.interval:
+            logger.warning("Refreshing %d subreddits took %.0f s, longer than the %.0f s interval",
+                           len(ordered), elapsed, self.interval)
+
+    def refresh(self, subreddit):
+        """
+        Run every job on one subreddit, storing the results
+
+        Returns:
+            int: Budget the refresh took: its Reddit calls, and at least one per job
+        """
+        used = 0
+        for name, job in self.jobs.items():
+            if self._stop.is_set():
+                return used
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            with refreshing(), track_request() as timings:
+                try:
+                    job({'subreddit': subreddit}, LatencyBudget())
+                    count('trendlens_precompute_runs_total', job=name, status='ok')
+                except Exception as e:
+                    self.errors += 1
+                    count('trendlens_precompute_runs_total', job=name, status='error')
+                    logger.warning("Refreshing %s for r/%s failed: %s", name, subreddit, e)
+
+            # The token taken above pays for the first call
+            calls = timings.counts.get('fetch', 0)
+            self.reddit_calls += calls
+            used += max(calls, 1)
+            if self.rate_limiter is not None and calls > 1:
+                self.rate_limiter.spend(calls - 1)
+
+        self.refreshes += 1
+        self.refreshed_at[subreddit] = time.time()
+        return used
+
+    def stats(self):
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'leader': self.is_leader(),
+            'interval': self.interval,
+            'jobs': list(self.jobs),
+            'watched': len(self.subreddits),
+            'cycles': self.cycles,
+            'refreshes': self.refreshes,
+            'errors': self.errors,
+            'redditCalls': self.reddit_calls,
+            'callsPerRefresh': round(self.calls_per_refresh, 2) if self.calls_per_refresh is not None else None,
+            'requestsPerMinute': self.requests_per_minute or None,
+            'unrefreshed': list(self.unrefreshed),
+            'results': precomputed_results.stats(),
+            'popular': self.popularity.top(),
+            'refreshedAt': dict(self.refreshed_at)
+        }
+
+_scheduler = None
+
+def _scheduler_samples():
+    if _scheduler is None:
+        return []
+    return [('trendlens_precompute_unrefreshed_subreddits', {}, len(_scheduler.unrefreshed))]
+
+metrics.add_collector(_scheduler_samples)
+
+def read_watchlist():
+    """
+    The configured watchlist
+
+    TRENDLENS_PRECOMPUTE_SUBREDDITS (comma-separated) and the file named by
+    TRENDLENS_PRECOMPUTE_WATCHLIST (one subreddit per line, # comments) are
+    combined.
+
+    Returns:
+        list: Subreddit names, without duplicates
+    """
+    subreddits = [name.strip() for name in os.environ.get("TRENDLENS_PRECOMPUTE_SUBREDDITS", "").split(',')]
+    path = os.environ.get("TRENDLENS_PRECOMPUTE_WATCHLIST")
+    if path:
+        with open(path) as f:
+            subreddits.extend(line.split('#', 1)[0].strip() for line in f)
+    return list(dict.fromkeys(name for name in subreddits if name))
+
+def start_precompute_from_config(jobs):
+    """
+    Start the precompute scheduler configured by the environment, if any
+
+    TRENDLENS_PRECOMPUTE_JOBS (comma-separated job names) limits the jobs
+    run, by default all of them. Every worker process starts a scheduler
+    and serves results from precompute.sqlite3 in the data directory, but
+    only the one holding precompute.lock refreshes them.
+
+    Args:
+        jobs (dict): Job name -> handler(data, budget)
+
+    Returns:
+        PrecomputeScheduler: The started scheduler, or None if no watchlist is configured
+    """
+    global _scheduler
+    subreddits = read_watchlist()
+    if not subreddits:
+        return None
+
+    names = [name.strip() for name in os.environ.get("TRENDLENS_PRECOMPUTE_JOBS", "").split(',') if name.strip()]
+    if names:
+        jobs = {name: job for name, job in jobs.items() if name in names}
+
+    directory = data_dir()
+    precomputed_results.share(os.path.join(directory, 'precompute.sqlite3'))
+    _scheduler = PrecomputeScheduler(
+        jobs, subreddits, leader_lock=LeaderLock(os.path.join(directory, 'precompute.lock'))
+    ).start()
+    logger.info("Precomputing %s for %d subreddits every %.0f s",
+                ', '.join(_scheduler.jobs), len(subreddits), _scheduler.interval)
+    return _scheduler
+
+def get_precompute_scheduler():
+    return _scheduler
@@ -0,0 +1,237 @@
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from models.timeseries_store import data_dir
+
+# Profile ids are UTC timestamps down to the microsecond plus a random suffix, so they sort by age
+_PROFILE_ID = re.compile(r"^\d{8}T\d{6}\.\d{6}-[0-9a-f]{8}$")
+
+SORT_KEYS = tuple(sorted(pstats.Stats.sort_arg_dict_default))
+
+def is_admin(token):
+    """
+    Check a request's admin token against TRENDLENS_ADMIN_TOKEN
+
+    Returns:
+        bool: False whenever no admin token is configured
+    """
+    expected = os.environ.get("TRENDLENS_ADMIN_TOKEN", "")
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8'))
+
+def profiling_requested(query_value=None, header_value=None):
+    """Whether a request asked to be profiled with ?profile=1 or an X-Profile: 1 header"""
+    return any((value or "").strip().lower() in ("1", "true", "yes") for value in (query_value, header_value))
+
+def new_profile_id():
+    """A fresh profile id"""
+    now = time.time()
+    return f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}.{int(now % 1 * 1e6):06d}-{uuid.uuid4().hex[:8]}"
+
+def _top_functions(stats, limit=10):
+    """The functions with the most cumulative time, as JSON-able dicts"""
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{
+        'function': f"{name} ({filename}:{line})",
+        'calls': calls,
+        'totalMs': round(total * 1000, 3),
+        'cumulativeMs': round(cumulative * 1000, 3)
+    } for (filename, line, name), (_, calls, total, cumulative, _) in rows]
+
+class ProfileStore:
+    """
+    Local directory of request profiles with a retention limit
+
+    Each profile is a pstats file (<id>.prof, readable with pstats or
+    snakeviz) next to a JSON summary (<id>.json) with the route, status,
+    elapsed time and the top functions by cumulative time. Only the newest
+    `retention` profiles are kept.
+    """
+
+    def __init__(self, directory=None, retention=None):
+        """
+        Args:
+            directory (str): Where profiles are written, defaults to profiles/ in the data directory
+            retention (int): Profiles kept, defaults to TRENDLENS_PROFILE_RETENTION or 50
+        """
+        if retention is None:
+            retention = int(os.environ.get("TRENDLENS_PROFILE_RETENTION", 50))
+        self.directory = directory or os.path.join(data_dir(), 'profiles')
+        self.retention = retention
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _file(self, profile_id, extension):
+        return os.path.join(self.directory, f"{profile_id}.{extension}")
+
+    def _ids(self):
+        """Stored profile ids, newest first"""
+        names = (name[:-len('.json')] for name in os.listdir(self.directory) if name.endswith('.json'))
+        return sorted((name for name in names if _PROFILE_ID.match(name)), reverse=True)
+
+    def save(self, profiler, route, elapsed_ms, status=None, profile_id=None):
+        """
+        Store a finished profile and drop the oldest beyond the retention limit
+
+        Args:
+            profiler (cProfile.Profile): The disabled profiler
+            route (str): The profiled request path
+            elapsed_ms (float): Wall-clock time of the profiled work
+            status (int): HTTP status of the response, if known
+            profile_id (str): Id from new_profile_id() to store the profile under, defaults to a fresh one
+
+        Returns:
+            str: The new profile's id
+        """
+        now = time.time()
+        profile_id = profile_id or new_profile_id()
+        stats = pstats.Stats(profiler)
+        summary = {
+            'id': profile_id,
+            'route': route,
+            'status': status,
+            'createdAt': now,
+            'elapsedMs': round(elapsed_ms, 1),
+            'functionCalls': stats.total_calls,
+            'top': _top_functions(stats)
+        }
+
+        with self._lock:
+            stats.dump_stats(self._file(profile_id, 'prof'))
+            with open(self._file(profile_id, 'json'), 'w') as f:
+                json.dump(summary, f)
+            for old_id in self._ids()[self.retention:]:
+                for extension in ('json', 'prof'):
+                    try:
+                        os.remove(self._file(old_id, extension))
+                    except FileNotFoundError:
+                        pass
+        return profile_id
+
+    def list(self):
+        """Summaries of the stored profiles, newest first"""
+        summaries = []
+        for profile_id in self._ids():
+            summary = self.get(profile_id)
+            if summary is not None:
+                summaries.append(summary)
+        return summaries
+
+    def get(self, profile_id):
+        """The summary of a profile, or None if there is no such profile"""
+        if not _PROFILE_ID.match(profile_id or ""):
+            return None
+        try:
+            with open(self._file(profile_id, 'json')) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def path(self, profile_id):
+        """Path of a profile's pstats file, or None if there is no such profile"""
+        if not _PROFILE_ID.match(profile_id or ""):
+            return None
+        path = self._file(profile_id, 'prof')
+        return path if os.path.exists(path) else None
+
+    def report(self, profile_id, sort="cumulative", limit=50):
+        """
+        A profile as a pstats text report
+
+        Args:
+            profile_id (str): The profile
+            sort (str): One of SORT_KEYS
+            limit (int): Number of functions listed
+
+        Returns:
+            str: The report, or None if there is no such profile
+
+        Raises:
+            ValueError: For an unknown sort key
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{sort}', expected one of {', '.join(SORT_KEYS)}")
+        path = self.path(profile_id)
+        if path is None:
+            return None
+        stream = io.StringIO()
+        pstats.Stats(path, stream=stream).sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_profile_store():
+    """Return the process-wide profile store, creating it on first use"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = ProfileStore()
+    return _default_store
+
+class RequestProfiler:
+    """
+    Deterministic (cProfile) profile of one request on the current thread
+
+    Only one request is profiled at a time per process; start() returns
+    False while another profile is running and the request then runs
+    unprofiled. The profile id is chosen when profiling starts, so a
+    streamed response can name it in its headers before the profile is
+    stored. Work the request hands to other threads (parallel fetches,
+    the scoring pool) shows up as time waiting on them.
+    """
+
+    _active = threading.Lock()
+
+    def __init__(self, route, store=None):
+        """
+        Args:
+            route (str): The request path, recorded with the profile
+            store (ProfileStore): Where to save it, defaults to the shared store
+        """
+        self.route = route
+        self.store = store
+        self.profile_id = None
+        self._profiler = None
+        self._started = None
+
+    def start(self):
+        """Start profiling the current thread, or return False if another profile is running"""
+        if not RequestProfiler._active.acquire(blocking=False):
+            return False
+        self.profile_id = new_profile_id()
+        self._profiler = cProfile.Profile()
+        self._started = time.perf_counter()
+        self._profiler.enable()
+        return True
+
+    def stop(self, status=None):
+        """
+        Stop profiling and store the profile
+
+        Args:
+            status (int): HTTP status of the response, if known
+
+        Returns:
+            str: The profile id, or None if profiling never started
+        """
+        if self._profiler is None:
+            return None
+        try:
+            self._profiler.disable()
+            elapsed_ms = (time.perf_counter() - self._started) * 1000
+            store = self.store or get_profile_store()
+            store.save(self._profiler, self.route, elapsed_ms, status, self.profile_id)
+        finally:
+            self._profiler = None
+            RequestProfiler._active.release()
+        return self.profile_id
@@ -0,0 +1,200 @@
+import logging
+import os
+import threading
+from contextlib import contextmanager
+import praw
+import requests
+from requests.adapters import HTTPAdapter
+from models.cache import TTLCache
+from models.fetch_scheduler import get_default_scheduler
+from models.metrics import cache_samples, count, metrics, timed
+
+logger = logging.getLogger(__name__)
+
+@contextmanager
+def _reddit_call(endpoint):
+    """Count and time one Reddit API call as the fetch stage"""
+    count('trendlens_reddit_calls_total', endpoint=endpoint)
+    try:
+        with timed("fetch"):
+            yield
+    except Exception:
+        count('trendlens_reddit_errors_total', endpoint=endpoint)
+        raise
+
+class RedditClient:
+    """
+    Shared Reddit API client used by all models
+
+    Holds a single PRAW instance on a pooled HTTP session and caches
+    responses keyed by (endpoint, subreddit or user, listing, limit).
+    """
+
+    _reddit = None
+    _session = None
+    _lock = threading.Lock()
+    _cache = TTLCache(
+        maxsize=int(os.environ.get("TRENDLENS_REDDIT_CACHE_SIZE", 1024)),
+        ttl=float(os.environ.get("TRENDLENS_REDDIT_CACHE_TTL", 300))
+    )
+
+    @classmethod
+    def _get_session(cls):
+        """Build the pooled HTTP session shared by every Reddit request"""
+        if cls._session is None:
+            pool_size = int(os.environ.get("TRENDLENS_REDDIT_POOL_SIZE", 16))
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            cls._session = session
+        return cls._session
+
+    @classmethod
+    def get_instance(cls):
+        """Return the shared PRAW instance, or None if the Reddit API is unavailable"""
+        if cls._reddit is None:
+            with cls._lock:
+                if cls._reddit is None:
+                    try:
+                        # Use environment variables in production!
+                        cls._reddit = praw.Reddit(
+                            client_id=os.environ.get("REDDIT_CLIENT_ID", 'EH0Y7-k7VoZ12VXC3VxWSQ'),
+                            client_secret=os.environ.get("REDDIT_CLIENT_SECRET", '1LvwUtguratTBh2DXZ2S66vcZ3CAFg'),
+                            user_agent=os.environ.get("REDDIT_USER_AGENT", 'TrendLens by /u/Live_Pain_1914'),
+                            requestor_kwargs={'session': cls._get_session()}
+                        )
+                        logger.info("Reddit API initialized successfully")
+                    except Exception as e:
+                        logger.exception("Error initializing Reddit API: %s", e)
+                        # Callers fall back to mock data if Reddit API fails
+                        cls._reddit = None
+        return cls._reddit
+
+    @classmethod
+    def set_instance(cls, reddit):
+        """Replace the shared PRAW instance, e.g. with the benchmarks' fake backend"""
+        with cls._lock:
+            cls._reddit = reddit
+
+    @classmethod
+    def get_posts(cls, subreddit, listing='hot', limit=10):
+        """
+        Fetch a subreddit listing
+
+        Args:
+            subreddit (str): The subreddit to fetch
+            listing (str): The listing to read, e.g. 'hot', 'top' or 'new'
+            limit (int): Maximum number of posts
+
+        Returns:
+            list: Post dicts; deleted authors are None
+        """
+        key = ('posts', subreddit.lower(), listing, limit)
+        return cls._cache.get_or_load(key, lambda: cls._fetch_posts(subreddit, listing, limit))
+
+    @classmethod
+    def _fetch_posts(cls, subreddit, listing, limit):
+        # Listings are fetched on the request thread, outside the scheduler's pool
+        rate_limiter = get_default_scheduler().rate_limiter
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        with _reddit_call(f"subreddit.{listing}"):
+            posts = getattr(cls.get_instance().subreddit(subreddit), listing)(limit=limit)
+            return [{
+                'id': post.id,
+                'author': post.author.name if post.author else None,
+                'title': post.title,
+                'score': post.score,
+                'num_comments': post.num_comments,
+                'created_utc': post.created_utc,
+                'awards': post.total_awards_received
+            } for post in posts]
+
+    @classmethod
+    def fetch_user_profile(cls, username):
+        """
+        Fetch a user's public profile, bypassing the response cache
+
+        Author profiles are cached by models.author_cache instead.
+
+        Returns:
+            dict: The user's karma and account creation time
+        """
+        with _reddit_call("redditor"):
+            user = cls.get_instance().redditor(username)
+            return {
+                'name': username,
+                'link_karma': user.link_karma,
+                'comment_karma': user.comment_karma,
+                'created_utc': user.created_utc
+            }
+
+    @classmethod
+    def get_user_history(cls, username, limit=100):
+        """
+        Fetch a user's most recent posts and comments
+
+        Args:
+            username (str): The Reddit username
+            limit (int): Maximum number of posts and of comments
+
+        Returns:
+            dict: 'posts' and 'comments' lists of dicts with id, subreddit and created_utc;
+                comments also carry their body and whether they reply to another comment
+        """
+        key = ('history', username.lower(), None, limit)
+        return cls._cache.get_or_load(key, lambda: cls._fetch_user_history(username, limit))
+
+    @classmethod
+    def _fetch_user_history(cls, username, limit):
+        user = cls.get_instance().redditor(username)
+        with _reddit_call("redditor.submissions"):
+            posts = [{
+                'id': post.id,
+                'subreddit': post.subreddit.display_name,
+                'title': post.title,
+                'created_utc': post.created_utc
+            } for post in user.submissions.new(limit=limit)]
+        with _reddit_call("redditor.comments"):
+            comments = [{
+                'id': comment.id,
+                'subreddit': comment.subreddit.display_name,
+                'body': comment.body,
+                'created_utc': comment.created_utc,
+                'is_reply': comment.parent_id.startswith('t1_')
+            } for comment in user.comments.new(limit=limit)]
+        # Histories are fetched through the scheduler, whose token paid for the first call
+        rate_limiter = get_default_scheduler().rate_limiter
+        if rate_limiter is not None:
+            rate_limiter.spend(1)
+        return {'posts': posts, 'comments': comments}
+
+    @classmethod
+    def get_comments(cls, post_id, limit=10):
+        """
+        Fetch the top-level comment bodies of a post
+
+        Returns:
+            list: Comment bodies
+        """
+        key = ('comments', post_id, None, limit)
+        return cls._cache.get_or_load(key, lambda: cls._fetch_comments(post_id, limit))
+
+    @classmethod
+    def _fetch_comments(cls, post_id, limit):
+        with _reddit_call("submission.comments"):
+            post = cls.get_instance().submission(id=post_id)
+            post.comments.replace_more(limit=0)
+            return [comment.body for comment in post.comments[:limit]]
+
+    @classmethod
+    def cache_stats(cls):
+        """Return hit and miss counters of the response cache"""
+        return cls._cache.stats()
+
+    @classmethod
+    def clear_cache(cls):
+        cls._cache.clear()
+
+metrics.add_collector(lambda: cache_samples('reddit_responses', RedditClient.cache_stats()))
@@ -0,0 +1,144 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+from models.metrics import record_stage, timed, track_request
+
+# Worker-side functions: module level so they can be pickled by reference
+
+_in_worker = False
+
+def _init_worker():
+    """
+    Load the ML model, VADER lexicon and corpora once per worker process
+
+    Workers are spawned rather than forked, so they start without the
+    server's threads, locks and SQLite connections; the result cache and
+    its disk tier are opened here, in the worker's own process.
+    """
+    global _in_worker
+    _in_worker = True
+    from models.sentiment_analysis import SentimentAnalysisModel
+    from models.sentiment_cache import get_default_result_cache
+    get_default_result_cache()
+    SentimentAnalysisModel.warm_up()
+
+# Each chunk also returns the stage timings it recorded in the worker,
+# for the parent to report (see _record_stages)
+
+def _score_cleaned_chunk(cleaned_texts, ml_available):
+    from models.sentiment_analysis import SentimentAnalysisModel
+    with track_request() as timings:
+        return SentimentAnalysisModel._score_cleaned(cleaned_texts, ml_available), timings.stages
+
+def _score_texts_chunk(texts):
+    from models.sentiment_analysis import SentimentAnalysisModel
+    with track_request() as timings:
+        return SentimentAnalysisModel.score_texts(texts), timings.stages
+
+def _polarity_chunk(texts):
+    from models.hybrid_scorer import polarity
+    with track_request() as timings:
+        with timed("textblob"):
+            polarities = [polarity(text) for text in texts]
+        return polarities, timings.stages
+
+def _record_stages(chunk_results):
+    """Record the worker stage timings of each chunk in this process, returning the chunk results"""
+    results = []
+    for result, stages in chunk_results:
+        for stage, seconds in stages.items():
+            record_stage(stage, seconds)
+        results.append(result)
+    return results
+
+class ScoringPool:
+    """
+    Process pool that spreads CPU-bound sentiment scoring over cores
+
+    VADER and TextBlob are pure Python, so threads cannot score in
+    parallel under the GIL. Each worker process loads the models once in
+    its initializer; texts are split into chunks and results come back
+    in input order.
+
+    Workers use the spawn start method: forking a multithreaded server
+    would copy locks held by other threads and share its SQLite
+    connections with the children.
+    """
+
+    def __init__(self, workers=None, chunk_size=None):
+        """
+        Args:
+            workers (int): Worker processes, defaults to TRENDLENS_SCORING_WORKERS or the CPU count
+            chunk_size (int): Texts per task, defaults to TRENDLENS_SCORING_CHUNK_SIZE or 256
+        """
+        if workers is None:
+            workers = int(os.environ.get("TRENDLENS_SCORING_WORKERS", 0)) or os.cpu_count() or 1
+        if chunk_size is None:
+            chunk_size = int(os.environ.get("TRENDLENS_SCORING_CHUNK_SIZE", 256))
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker
+        )
+
+    def _chunks(self, texts):
+        return [texts[start:start + self.chunk_size] for start in range(0, len(texts), self.chunk_size)]
+
+    @staticmethod
+    def _concatenate(chunk_columns):
+        return {name: np.concatenate([columns[name] for columns in chunk_columns]) for name in chunk_columns[0]}
+
+    def score_texts(self, texts):
+        """
+        Clean and score raw texts entirely in the workers, e.g. for offline backfills
+
+        Returns:
+            dict: Columnar results as returned by SentimentAnalysisModel.score_texts
+        """
+        texts = list(texts)
+        if not texts:
+            return _score_texts_chunk([])[0]
+        return self._concatenate(_record_stages(self._executor.map(_score_texts_chunk, self._chunks(texts))))
+
+    def score_cleaned(self, cleaned_texts, ml_available):
+        """
+        Score already cleaned texts in the workers
+
+        Returns:
+            tuple: Columnar results and whether any ML prediction failed
+        """
+        chunks = self._chunks(list(cleaned_texts))
+        results = _record_stages(self._executor.map(_score_cleaned_chunk, chunks, repeat(ml_available)))
+        return self._concatenate([columns for columns, _ in results]), any(failed for _, failed in results)
+
+    def polarities(self, texts):
+        """TextBlob polarity of each text, in order"""
+        chunks = _record_stages(self._executor.map(_polarity_chunk, self._chunks(list(texts))))
+        return [polarity for chunk in chunks for polarity in chunk]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+def get_scoring_pool():
+    """
+    Return the process-wide scoring pool, or None if it is disabled
+
+    The pool is enabled by setting TRENDLENS_SCORING_WORKERS to the number
+    of worker processes; requests then hand batches larger than one chunk
+    to it and score smaller ones in-process.
+    """
+    global _default_pool
+    if _in_worker:
+        return None
+    if _default_pool is None and int(os.environ.get("TRENDLENS_SCORING_WORKERS", 0)) > 0:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = ScoringPool()
+    return _default_pool
@@ -0,0 +1,405 @@
+import logging
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from models.timeseries_store import data_dir
+
+logger = logging.getLogger(__name__)
+
+# Scores above / below these thresholds count as positive / negative
+POSITIVE_THRESHOLD = 0.3
+NEGATIVE_THRESHOLD = -0.3
+
+SENTIMENT_CLASSES = ("positive", "neutral", "negative")
+
+# Windowed summary name -> (bucket resolution, number of buckets ending with the current one)
+SUMMARY_WINDOWS = {
+    "1h": ("hour", 1),
+    "24h": ("hour", 24),
+    "7d": ("day", 7),
+    "30d": ("day", 30),
+}
+
+_BUCKET_STEPS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+# How often the store drops item ids and rollups past the retention period
+_PRUNE_INTERVAL = 3600
+
+def classify(score, positive_threshold=POSITIVE_THRESHOLD, negative_threshold=NEGATIVE_THRESHOLD):
+    """Sentiment class of a combined sentiment score"""
+    if score > positive_threshold:
+        return "positive"
+    if score < negative_threshold:
+        return "negative"
+    return "neutral"
+
+def _bucket_key(moment, resolution):
+    return moment.strftime("%Y-%m-%dT%H" if resolution == "hour" else "%Y-%m-%d")
+
+def _window_keys(resolution, buckets, now):
+    """First and last bucket key of the `buckets` buckets ending with the one containing now"""
+    moment = datetime.fromtimestamp(now, tz=timezone.utc)
+    first = moment - _BUCKET_STEPS[resolution] * (buckets - 1)
+    return _bucket_key(first, resolution), _bucket_key(moment, resolution)
+
+class SentimentAggregate:
+    """
+    Running summary of a stream of sentiment scores
+
+    Every update is O(1): count, sum and sum of squares give the mean and
+    standard deviation, the class histogram counts positive, neutral and
+    negative items, and an exponentially time-decayed mean tracks recent
+    sentiment. The decayed mean is kept as a decayed sum and weight, so
+    items arriving out of order are weighted by their own age.
+
+    Subclasses scoring on another scale override the class thresholds.
+    """
+
+    positive_threshold = POSITIVE_THRESHOLD
+    negative_threshold = NEGATIVE_THRESHOLD
+
+    __slots__ = ("count", "total", "total_sq", "positive", "neutral", "negative",
+                 "decayed_sum", "decayed_weight", "decayed_at")
+
+    def __init__(self, count=0, total=0.0, total_sq=0.0, positive=0, neutral=0, negative=0,
+                 decayed_sum=0.0, decayed_weight=0.0, decayed_at=None):
+        self.count = count
+        self.total = total
+        self.total_sq = total_sq
+        self.positive = positive
+        self.neutral = neutral
+        self.negative = negative
+        self.decayed_sum = decayed_sum
+        self.decayed_weight = decayed_weight
+        self.decayed_at = decayed_at
+
+    def update(self, score, timestamp=None, half_life=None):
+        """
+        Fold one scored item into the aggregate
+
+        Args:
+            score (float): Combined sentiment score in [-1, 1]
+            timestamp (float): UTC time the item was created, None to leave the decayed mean out
+            half_life (float): Seconds after which an item's weight in the decayed mean halves
+        """
+        self.count += 1
+        self.total += score
+        self.total_sq += score * score
+        sentiment_class = classify(score, self.positive_threshold, self.negative_threshold)
+        setattr(self, sentiment_class, getattr(self, sentiment_class) + 1)
+
+        if timestamp is None:
+            return
+        if self.decayed_at is None or timestamp >= self.decayed_at:
+            decay = 0.5 ** ((timestamp - self.decayed_at) / half_life) if self.decayed_at is not None else 0.0
+            self.decayed_sum = self.decayed_sum * decay + score
+            self.decayed_weight = self.decayed_weight * decay + 1
+            self.decayed_at = timestamp
+        else:
+            weight = 0.5 ** ((self.decayed_at - timestamp) / half_life)
+            self.decayed_sum += score * weight
+            self.decayed_weight += weight
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    @property
+    def std(self):
+        if not self.count:
+            return None
+        mean = self.total / self.count
+        return math.sqrt(max(self.total_sq / self.count - mean * mean, 0.0))
+
+    @property
+    def decayed_mean(self):
+        return self.decayed_sum / self.decayed_weight if self.decayed_weight else None
+
+    def percentages(self):
+        """Share of each sentiment class in percent, all 0 when empty"""
+        return {
+            name: round(getattr(self, name) / self.count * 100, 2) if self.count else 0
+            for name in SENTIMENT_CLASSES
+        }
+
+    def summary(self):
+        """JSON-able count, mean, standard deviation and class histogram"""
+        return {
+            "count": self.count,
+            "mean": _round(self.mean),
+            "std": _round(self.std),
+            "histogram": {name: getattr(self, name) for name in SENTIMENT_CLASSES}
+        }
+
+def _round(value):
+    return None if value is None else round(value, 4)
+
+class SentimentAggregateStore:
+    """
+    Persistent running sentiment aggregates per subreddit
+
+    All-time totals live in one SQLite row per subreddit, so a summary
+    costs no rescoring. Every recorded batch updates them together with
+    hourly and daily rollups that serve the windowed summaries. Item ids
+    are remembered so rescoring the same post never counts it twice.
+
+    A batch is recorded in one BEGIN IMMEDIATE transaction that re-reads
+    the totals before folding the batch in, so several processes (request
+    workers and the ingestion worker) can share a store without losing
+    each other's updates.
+
+    Ids and rollups older than the retention period are pruned. Items that
+    old are no longer recorded, since they could not be told apart from
+    ones already counted; they only ever mattered to the all-time totals.
+    Requests hand their items to record_in_background(), so they never wait
+    on an SQLite write.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sentiment_items (
+            subreddit TEXT NOT NULL,
+            item_id TEXT NOT NULL,
+            created_utc REAL,
+            PRIMARY KEY (subreddit, item_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS sentiment_totals (
+            subreddit TEXT PRIMARY KEY,
+            count INTEGER NOT NULL,
+            total REAL NOT NULL,
+            total_sq REAL NOT NULL,
+            positive INTEGER NOT NULL,
+            neutral INTEGER NOT NULL,
+            negative INTEGER NOT NULL,
+            decayed_sum REAL NOT NULL,
+            decayed_weight REAL NOT NULL,
+            decayed_at REAL
+        );
+        CREATE TABLE IF NOT EXISTS sentiment_rollups (
+            subreddit TEXT NOT NULL,
+            resolution TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            total_sq REAL NOT NULL DEFAULT 0,
+            positive INTEGER NOT NULL DEFAULT 0,
+            neutral INTEGER NOT NULL DEFAULT 0,
+            negative INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (subreddit, resolution, bucket)
+        ) WITHOUT ROWID;
+    """
+
+    _TOTAL_COLUMNS = ("count", "total", "total_sq", "positive", "neutral", "negative",
+                      "decayed_sum", "decayed_weight", "decayed_at")
+
+    def __init__(self, path=None, half_life_hours=None, retention_days=None):
+        """
+        Args:
+            path (str): SQLite database file, defaults to sentiment.sqlite3 in the data directory
+            half_life_hours (float): Half-life of the decayed mean, defaults to
+                TRENDLENS_SENTIMENT_HALF_LIFE_HOURS or 24
+            retention_days (float): Age after which item ids and rollups are pruned, defaults to
+                TRENDLENS_SENTIMENT_RETENTION_DAYS or 30, never less than the longest summary window
+        """
+        if half_life_hours is None:
+            half_life_hours = float(os.environ.get("TRENDLENS_SENTIMENT_HALF_LIFE_HOURS", 24))
+        if retention_days is None:
+            retention_days = float(os.environ.get("TRENDLENS_SENTIMENT_RETENTION_DAYS", 30))
+        self.path = path or os.path.join(data_dir(), 'sentiment.sqlite3')
+        self.half_life = half_life_hours * 3600
+        self.retention = max(retention_days, 30) * 86400
+        self._pruned_at = 0.0
+        self._lock = threading.Lock()
+        self._pending = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        # Transactions are opened explicitly, record() needs BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(sentiment_items)")]
+        if "created_utc" not in columns:
+            # Stores written before pruning; their ids are pruned on the first pass
+            self._conn.execute("ALTER TABLE sentiment_items ADD COLUMN created_utc REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sentiment_items_created ON sentiment_items (created_utc)")
+
+    def _aggregate(self, subreddit):
+        """The stored all-time totals of a subreddit"""
+        row = self._conn.execute(
+            f"SELECT {', '.join(self._TOTAL_COLUMNS)} FROM sentiment_totals WHERE subreddit = ?", (subreddit,)
+        ).fetchone()
+        return SentimentAggregate(*row) if row else SentimentAggregate()
+
+    def record(self, subreddit, items, now=None):
+        """
+        Fold newly scored items into a subreddit's aggregates
+
+        Args:
+            subreddit (str): The subreddit the items belong to
+            items (iterable): (item_id, sentiment_score, created_utc) tuples
+            now (float): Current UTC timestamp, which the retention period counts back from
+
+        Returns:
+            int: Number of items not recorded before
+        """
+        subreddit = subreddit.lower()
+        now = time.time() if now is None else now
+        cutoff = now - self.retention
+        rollups = {}
+        added = 0
+
+        with self._lock, self._conn:
+            # Take the write lock before reading the totals, so no other writer can interleave
+            self._conn.execute("BEGIN IMMEDIATE")
+            if now - self._pruned_at >= _PRUNE_INTERVAL:
+                self._prune(cutoff)
+                self._pruned_at = now
+
+            aggregate = self._aggregate(subreddit)
+            for item_id, score, created_utc in items:
+                if created_utc < cutoff:
+                    continue
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO sentiment_items (subreddit, item_id, created_utc) VALUES (?, ?, ?)",
+                    (subreddit, str(item_id), created_utc)
+                )
+                if cursor.rowcount != 1:
+                    continue
+                added += 1
+                aggregate.update(score, created_utc, self.half_life)
+
+                moment = datetime.fromtimestamp(created_utc, tz=timezone.utc)
+                for resolution in _BUCKET_STEPS:
+                    key = (resolution, _bucket_key(moment, resolution))
+                    rollups.setdefault(key, SentimentAggregate()).update(score, created_utc, self.half_life)
+
+            if not added:
+                return 0
+
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO sentiment_totals (subreddit, {', '.join(self._TOTAL_COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' * len(self._TOTAL_COLUMNS))})",
+                (subreddit, *(getattr(aggregate, column) for column in self._TOTAL_COLUMNS))
+            )
+            self._conn.executemany(
+                """
+                INSERT INTO sentiment_rollups
+                    (subreddit, resolution, bucket, count, total, total_sq, positive, neutral, negative)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (subreddit, resolution, bucket) DO UPDATE SET
+                    count = count + excluded.count,
+                    total = total + excluded.total,
+                    total_sq = total_sq + excluded.total_sq,
+                    positive = positive + excluded.positive,
+                    neutral = neutral + excluded.neutral,
+                    negative = negative + excluded.negative
+                """,
+                [
+                    (subreddit, resolution, bucket, rollup.count, rollup.total, rollup.total_sq,
+                     rollup.positive, rollup.neutral, rollup.negative)
+                    for (resolution, bucket), rollup in rollups.items()
+                ]
+            )
+        return added
+
+    def _prune(self, cutoff):
+        """Drop item ids and rollups older than cutoff; the caller holds the lock and transaction"""
+        self._conn.execute(
+            "DELETE FROM sentiment_items WHERE created_utc IS NULL OR created_utc < ?", (cutoff,)
+        )
+        moment = datetime.fromtimestamp(cutoff, tz=timezone.utc)
+        self._conn.executemany(
+            "DELETE FROM sentiment_rollups WHERE resolution = ? AND bucket < ?",
+            [(resolution, _bucket_key(moment, resolution)) for resolution in _BUCKET_STEPS]
+        )
+
+    def record_in_background(self, subreddit, items):
+        """
+        Queue items to be recorded on the store's writer thread, returning at once
+
+        Args:
+            subreddit (str): The subreddit the items belong to
+            items (iterable): (item_id, sentiment_score, created_utc) tuples
+        """
+        items = list(items)
+        if not items:
+            return
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_pending, name="sentiment-aggregates", daemon=True)
+                    self._writer.start()
+        self._pending.put((subreddit, items))
+
+    def _write_pending(self):
+        while True:
+            subreddit, items = self._pending.get()
+            try:
+                self.record(subreddit, items)
+            except Exception as e:
+                logger.warning("Error recording sentiment aggregates for r/%s: %s", subreddit, e)
+            finally:
+                self._pending.task_done()
+
+    def flush(self):
+        """Wait until every item queued by record_in_background() is recorded"""
+        self._pending.join()
+
+    def _window(self, subreddit, resolution, buckets, now):
+        first, last = _window_keys(resolution, buckets, now)
+        row = self._conn.execute(
+            """
+            SELECT SUM(count), SUM(total), SUM(total_sq), SUM(positive), SUM(neutral), SUM(negative)
+            FROM sentiment_rollups
+            WHERE subreddit = ? AND resolution = ? AND bucket BETWEEN ? AND ?
+            """,
+            (subreddit, resolution, first, last)
+        ).fetchone()
+        return SentimentAggregate(*(value or 0 for value in row))
+
+    def summary(self, subreddit, now=None):
+        """
+        Running and windowed sentiment summaries of a subreddit
+
+        Args:
+            subreddit (str): The subreddit to summarize
+            now (float): End of the windows as a UTC timestamp, defaults to the current time
+
+        Returns:
+            dict: All-time count, mean, std and histogram, the decayed mean,
+                the last item time and one summary per SUMMARY_WINDOWS entry
+        """
+        subreddit = subreddit.lower()
+        now = time.time() if now is None else now
+
+        with self._lock:
+            aggregate = self._aggregate(subreddit)
+            summary = aggregate.summary()
+            summary["subreddit"] = subreddit
+            summary["decayedMean"] = _round(aggregate.decayed_mean)
+            summary["halfLifeHours"] = self.half_life / 3600
+            summary["lastItemAt"] = aggregate.decayed_at
+            summary["windows"] = {
+                name: self._window(subreddit, resolution, buckets, now).summary()
+                for name, (resolution, buckets) in SUMMARY_WINDOWS.items()
+            }
+        return summary
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_default_sentiment_store():
+    """Return the process-wide sentiment aggregate store, creating it on first use"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = SentimentAggregateStore()
+    return _default_store
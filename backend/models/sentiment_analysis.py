@@ -1,225 +1,231 @@
 
-import praw
-from textblob import TextBlob
+import logging
+import threading
 import time
 import random
-import re
-import string
-import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-import nltk
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+from models.text_cleaning import TextCleaner, ensure_nltk_data
+from models.latency import LatencyBudget
+from models.metrics import mock_fallback, timed
+from models.reddit_client import RedditClient
+from models.ingestion import live_aggregates
+from models.sentiment_aggregates import get_default_sentiment_store
+from models.sentiment_cache import content_key, get_default_result_cache
+from models.scoring_pool import get_scoring_pool
+from models.hybrid_scorer import HybridScorer, configured_components
+from models.build_sentiment_model import (
+    MODEL_VERSION, artifact_path, load_sentiment_model, train_sentiment_model
+)
 
-# Download necessary NLTK data (will only download if not already present)
-try:
-    nltk.data.find('vader_lexicon')
-except LookupError:
-    nltk.download('vader_lexicon')
-
-try:
-    nltk.data.find('stopwords')
-except LookupError:
-    nltk.download('stopwords')
-
-try:
-    nltk.data.find('wordnet')
-except LookupError:
-    nltk.download('wordnet')
+logger = logging.getLogger(__name__)
 
 class SentimentAnalysisModel:
     """
     Advanced model for analyzing sentiment in Reddit content
     """
     
-    # Initialize Reddit API (use environment variables in production!)
-    _reddit = None
     _vectorizer = None
     _ml_model = None
-    _sid = SentimentIntensityAnalyzer()
+    _sid = None
+    _sid_lock = threading.Lock()
+    _scorer = None
+    _text_cleaner = TextCleaner()
+    _SCORING_CHUNK_SIZE = 64
+    _RESULT_COLUMNS = ('sentimentScore', 'ml', 'vader', 'textblob', 'positive', 'negative', 'neutral')
     
     @classmethod
     def _get_reddit_instance(cls):
-        if cls._reddit is None:
-            try:
-                cls._reddit = praw.Reddit(
-                    client_id='EH0Y7-k7VoZ12VXC3VxWSQ',
-                    client_secret='1LvwUtguratTBh2DXZ2S66vcZ3CAFg',
-                    user_agent='TrendLens by /u/Live_Pain_1914'
-                )
-                print("Reddit API initialized successfully")
-            except Exception as e:
-                print(f"Error initializing Reddit API: {e}")
-                # Fall back to mock data if Reddit API fails
-                cls._reddit = None
-        return cls._reddit
+        return RedditClient.get_instance()
+    
+    @classmethod
+    def _get_sid(cls):
+        """The shared VADER analyzer, built once even when the first requests arrive together"""
+        if cls._sid is None:
+            with cls._sid_lock:
+                if cls._sid is None:
+                    ensure_nltk_data('vader_lexicon')
+                    cls._sid = SentimentIntensityAnalyzer()
+        return cls._sid
     
     @classmethod
     def _initialize_ml_model(cls):
-        """Initialize and train the ML model if not already done"""
+        """Load the pre-trained ML model, training it in-process only if no artifact was built"""
         if cls._vectorizer is None or cls._ml_model is None:
             try:
-                # Create a small training dataset with examples
-                data = pd.DataFrame({
-                    'text': [
-                        "I love this, it's amazing!", 
-                        "This is terrible, absolutely hate it",
-                        "It's okay, nothing special",
-                        "Best experience ever, highly recommend",
-                        "Worst product I've ever used",
-                        "It's alright, does the job",
-                        "Incredible service, very happy",
-                        "Disappointed with the quality",
-                        "Not bad, not great either",
-                        "Absolutely fantastic!"
-                    ],
-                    'sentiment': [1, -1, 0, 1, -1, 0, 1, -1, 0, 1]  # 1=positive, 0=neutral, -1=negative
-                })
-                
-                # Clean the text data
-                data['cleaned_text'] = data['text'].apply(cls._clean_text)
-                
-                # Create and fit the vectorizer
-                cls._vectorizer = TfidfVectorizer()
-                X = cls._vectorizer.fit_transform(data['cleaned_text'])
-                
-                # Train a logistic regression model
-                cls._ml_model = LogisticRegression()
-                cls._ml_model.fit(X, data['sentiment'])
-                
-                print("ML sentiment model initialized successfully")
+                cls._vectorizer, cls._ml_model = load_sentiment_model()
+                logger.info("ML sentiment model %s loaded from %s", MODEL_VERSION, artifact_path())
+                return
+            except FileNotFoundError:
+                logger.warning("No sentiment model artifact at %s, run 'python -m models.build_sentiment_model'", artifact_path())
+            except Exception as e:
+                logger.warning("Error loading ML model artifact: %s", e)
+            
+            try:
+                cls._vectorizer, cls._ml_model = train_sentiment_model(cls._clean_text)
+                logger.info("ML sentiment model initialized successfully")
             except Exception as e:
-                print(f"Error initializing ML model: {e}")
+                logger.error("Error initializing ML model: %s", e)
                 cls._vectorizer = None
                 cls._ml_model = None
     
+    @classmethod
+    def warm_up(cls):
+        """
+        Load the ML model, lexicons and corpora ahead of the first request
+        
+        Runs one scoring pass so lazily loaded resources (stopwords, WordNet,
+        the TextBlob lexicon) are ready before traffic arrives.
+        """
+        cls._initialize_ml_model()
+        cls._get_sid()
+        cls.score_texts(["TrendLens warm up: this is a great test"])
+    
     @staticmethod
     def _clean_text(text):
         """Clean and preprocess text for sentiment analysis"""
-        text = str(text).lower()
-        
-        # Replace URLs
-        text = re.sub(r'https?:\/\/\S*|www\.\S+', 'URL', text)
-        
-        # Remove HTML
-        text = re.sub(r'<.*?>', '', text)
-        
-        # Replace mentions
-        text = re.sub(r'@\S*', 'user', text, flags=re.IGNORECASE)
-        
-        # Replace numbers
-        text = re.sub(r'^[+-]*?\d{1,3}[- ]*?\d{1,10}|\d{10}', 'NUMBER', text)
+        return SentimentAnalysisModel._text_cleaner.clean(text)
+    
+    @classmethod
+    def _hybrid_sentiment_analysis(cls, text):
+        """Perform hybrid sentiment analysis using ML and VADER"""
+        scores = cls.score_texts([text])
         
-        # Replace <3 with string heart
-        text = re.sub(r'<3', 'HEART', text)
+        return {
+            'sentimentScore': float(scores['sentimentScore'][0]),
+            'details': {
+                'positive': float(scores['positive'][0]),
+                'negative': float(scores['negative'][0]),
+                'neutral': float(scores['neutral'][0])
+            }
+        }
+    
+    @classmethod
+    def score_texts(cls, texts):
+        """
+        Score a batch of texts using the hybrid ML, VADER and TextBlob approach
         
-        # Remove alphanumeric characters
-        text = re.sub(r'\w*\d+\w*', '', text)
+        Results are cached by a hash of the cleaned text and the model version,
+        so only texts not scored before reach the models. Each of those is
+        tokenized once for all three components (see models.hybrid_scorer),
+        and their TF-IDF rows are classified with one model call, so the
+        sklearn overhead is paid once per batch.
         
-        # Remove stopwords
-        try:
-            text = ' '.join([word for word in text.split() if word not in stopwords.words("english")])
-        except:
-            # If stopwords not available, continue without removing them
-            pass
+        Args:
+            texts (list): The texts to analyze
+            
+        Returns:
+            dict: Columnar results, each key mapping to a numpy array aligned with texts
+        """
+        # Initialize ML model if needed
+        if cls._vectorizer is None or cls._ml_model is None:
+            cls._initialize_ml_model()
         
-        # Remove punctuations
-        text = ''.join([word for word in text if word not in string.punctuation])
+        with timed("clean"):
+            cleaned_texts = cls._text_cleaner.clean_many(texts)
+        scorer = cls._get_scorer()
+        ml_available = scorer.ml_available
+        version = f"hybrid-{MODEL_VERSION}" if ml_available else "hybrid-no-ml"
+        disabled = [name for name in ("vader", "textblob") if name not in scorer.components]
+        if disabled:
+            version += "-without-" + "-".join(disabled)
+        keys = [content_key(text, version) for text in cleaned_texts]
         
-        # Lemmatization
-        try:
-            lm = WordNetLemmatizer()
-            text = ' '.join([lm.lemmatize(word, pos='v') for word in text.split()])
-        except:
-            # If lemmatization fails, continue without it
-            pass
+        cache = get_default_result_cache()
+        rows = cache.get_many(keys)
+        unscored = {key: text for key, text in zip(keys, cleaned_texts) if key not in rows}
+        if unscored:
+            # Large batches are spread over the scoring processes, if enabled
+            pool = get_scoring_pool()
+            if pool is not None and len(unscored) > pool.chunk_size:
+                columns, ml_failed = pool.score_cleaned(list(unscored.values()), ml_available)
+            else:
+                columns, ml_failed = cls._score_cleaned(list(unscored.values()), ml_available)
+            scored = dict(zip(unscored, zip(*(columns[name].tolist() for name in cls._RESULT_COLUMNS))))
+            rows.update(scored)
+            # A failed ML prediction falls back to zeros; never cache that
+            if not ml_failed:
+                cache.set_many(scored)
         
-        return text
+        matrix = np.array([rows[key] for key in keys], dtype=float).reshape(len(keys), len(cls._RESULT_COLUMNS))
+        return {name: matrix[:, i] for i, name in enumerate(cls._RESULT_COLUMNS)}
     
     @classmethod
-    def _hybrid_sentiment_analysis(cls, text):
-        """Perform hybrid sentiment analysis using ML and VADER"""
-        # Initialize ML model if needed
-        if cls._vectorizer is None or cls._ml_model is None:
-            cls._initialize_ml_model()
+    def _get_scorer(cls):
+        """The single-pass hybrid scorer over the current models, rebuilt if they change"""
+        scorer = cls._scorer
+        if scorer is None or scorer.vectorizer is not cls._vectorizer or scorer.classifier is not cls._ml_model:
+            components = configured_components()
+            sid = cls._get_sid() if "vader" in components else None
+            scorer = cls._scorer = HybridScorer(cls._vectorizer, cls._ml_model, sid, components)
+        return scorer
+    
+    @classmethod
+    def _score_cleaned(cls, cleaned_texts, ml_available):
+        """Run the models on already cleaned texts, returning the result columns and whether ML failed"""
+        columns, ml_failed = cls._get_scorer().score(cleaned_texts, ml_available)
         
-        cleaned_text = cls._clean_text(text)
-        sentiment_score = 0
+        positive, negative, neutral = cls._sentiment_breakdown(columns['sentimentScore'])
+        columns.update(positive=positive, negative=negative, neutral=neutral)
+        return columns, ml_failed
+    
+    @staticmethod
+    def _sentiment_breakdown(sentiment_scores):
+        """
+        Calculate the positive/negative/neutral breakdown for an array of scores
         
-        # ML-based sentiment prediction (if available)
-        ml_sentiment_weight = 0
-        if cls._vectorizer is not None and cls._ml_model is not None:
-            try:
-                tfidf_text = cls._vectorizer.transform([cleaned_text])
-                ml_prediction = cls._ml_model.predict(tfidf_text)[0]  # -1, 0, or 1
-                ml_sentiment_weight = ml_prediction  # -1 to 1 scale
-            except Exception as e:
-                print(f"ML sentiment prediction error: {e}")
+        The breakdown is a deterministic function of the score, so equal
+        texts always get equal results:
         
-        # VADER sentiment analysis
-        vader_score = cls._sid.polarity_scores(cleaned_text)['compound']  # -1 to 1 scale
+        - above 0.3: positive rises from 0.6 to 1.0 and negative falls from 0.2 to 0
+        - below -0.3: the same, mirrored
+        - otherwise: neutral peaks at 0.8 for a score of 0 and falls to 0.5 at
+          +/-0.3, the rest is split between positive and negative by the score
+        """
+        scores = np.asarray(sentiment_scores, dtype=float)
+        is_positive = scores > 0.3
+        is_negative = scores < -0.3
+        is_neutral = ~(is_positive | is_negative)
         
-        # TextBlob sentiment analysis (existing approach)
-        blob = TextBlob(cleaned_text)
-        textblob_score = blob.sentiment.polarity  # -1 to 1 scale
+        # How far past the threshold towards +/-1 a polar score is
+        strength = np.clip((np.abs(scores) - 0.3) / 0.7, 0, 1)
+        dominant = 0.6 + strength * 0.4
+        minor = (1 - strength) * 0.2
         
-        # Combine all sentiment scores (weighted average)
-        if cls._vectorizer is not None and cls._ml_model is not None:
-            # If ML model is available, use all three
-            sentiment_score = (0.4 * ml_sentiment_weight) + (0.3 * vader_score) + (0.3 * textblob_score)
-        else:
-            # If ML model is not available, use VADER and TextBlob
-            sentiment_score = (0.5 * vader_score) + (0.5 * textblob_score)
+        positive = np.where(is_positive, dominant, np.where(is_negative, minor, 0.0))
+        negative = np.where(is_negative, dominant, np.where(is_positive, minor, 0.0))
+        neutral = 1 - positive - negative
         
-        # Calculate sentiment breakdown
-        if sentiment_score > 0.3:
-            # Positive sentiment
-            positive = round(0.6 + random.random() * 0.4, 2)
-            negative = round(random.random() * 0.2, 2)
-            neutral = round(1 - positive - negative, 2)
-        elif sentiment_score < -0.3:
-            # Negative sentiment
-            negative = round(0.6 + random.random() * 0.4, 2)
-            positive = round(random.random() * 0.2, 2)
-            neutral = round(1 - positive - negative, 2)
-        else:
-            # Neutral sentiment
-            neutral = round(0.5 + random.random() * 0.3, 2)
-            positive = round((1 - neutral) / 2, 2)
-            negative = round(1 - neutral - positive, 2)
+        # Neutral sentiment
+        neutral_share = 0.5 + (1 - np.abs(scores) / 0.3) * 0.3
+        positive_share = (1 - neutral_share) * (0.5 + scores / 0.6)
+        neutral = np.where(is_neutral, neutral_share, neutral)
+        positive = np.where(is_neutral, positive_share, positive)
+        negative = np.where(is_neutral, 1 - neutral_share - positive_share, negative)
         
-        return {
-            'sentimentScore': sentiment_score,
-            'details': {
-                'positive': positive,
-                'negative': negative,
-                'neutral': neutral
-            }
-        }
+        return np.round(positive, 2), np.round(negative, 2), np.round(neutral, 2)
     
     @staticmethod
     def fetch_top_posts(subreddit, limit=10):
         """Fetch top posts for a given subreddit"""
         reddit = SentimentAnalysisModel._get_reddit_instance()
         if not reddit:
+            mock_fallback("sentiment.posts")
             return SentimentAnalysisModel._generate_mock_posts(subreddit, limit)
         
         try:
-            subreddit_obj = reddit.subreddit(subreddit)
-            posts = subreddit_obj.hot(limit=limit)
+            posts = RedditClient.get_posts(subreddit, 'hot', limit)
             
             return [{
-                'id': post.id,
-                'title': post.title,
-                'score': post.score,
-                'num_comments': post.num_comments,
-                'created_utc': post.created_utc
+                'id': post['id'],
+                'title': post['title'],
+                'score': post['score'],
+                'num_comments': post['num_comments'],
+                'created_utc': post['created_utc']
             } for post in posts]
         except Exception as e:
-            print(f"Error fetching posts from r/{subreddit}: {e}")
+            logger.warning("Error fetching posts from r/%s: %s", subreddit, e)
+            mock_fallback("sentiment.posts")
             return SentimentAnalysisModel._generate_mock_posts(subreddit, limit)
     
     @staticmethod
@@ -258,8 +264,9 @@ class SentimentAnalysisModel:
         try:
             return cls._hybrid_sentiment_analysis(title)
         except Exception as e:
-            print(f"Error analyzing sentiment: {e}")
+            logger.warning("Error analyzing sentiment: %s", e)
             # Return mock sentiment if analysis fails
+            mock_fallback("sentiment.score")
             sentiment_score = round(random.random() * 2 - 1, 1)  # Random between -1 and 1
             
             # Generate details aligned with sentiment score
@@ -286,37 +293,124 @@ class SentimentAnalysisModel:
             }
     
     @classmethod
-    def analyze_subreddit(cls, subreddit):
+    def _score_titles(cls, titles):
+        """Score a list of titles, returning one sentiment result per title"""
+        try:
+            # Analyze sentiment for all titles in one batch
+            scores = cls.score_texts(titles)
+        except Exception as e:
+            logger.warning("Error analyzing sentiment batch: %s", e)
+            # Fall back to scoring each title on its own
+            return [cls.analyze_post_sentiment(title) for title in titles]
+        
+        return [{
+            'sentimentScore': sentiment_score,
+            'details': {
+                'positive': positive,
+                'negative': negative,
+                'neutral': neutral
+            }
+        } for sentiment_score, positive, negative, neutral in zip(
+            scores['sentimentScore'].tolist(),
+            scores['positive'].tolist(),
+            scores['negative'].tolist(),
+            scores['neutral'].tolist()
+        )]
+    
+    @classmethod
+    def analyze_subreddit(cls, subreddit, budget=None):
         """
         Analyze sentiment of content from a subreddit using hybrid approach
         
         Args:
             subreddit (str): The subreddit to analyze
+            budget (LatencyBudget): Latency policy, defaults to the configured one
             
         Returns:
             list: Sentiment analysis results
         """
-        print(f"Analyzing sentiment for r/{subreddit}")
+        logger.info("Analyzing sentiment for r/%s", subreddit)
+        budget = budget or LatencyBudget.from_config()
         
         # Initialize ML model 
         cls._initialize_ml_model()
         
-        # Simulate API delay
-        time.sleep(1)
+        budget.simulate("sentiment.analyze_subreddit")
+        
+        # Serve the streamed aggregates when the subreddit is being ingested;
+        # one that has only streamed comments so far is scored live
+        recent = live_aggregates.recent_sentiment(subreddit)
+        if recent:
+            return recent
         
         # Get posts from subreddit
         posts = cls.fetch_top_posts(subreddit)
+        titles = [post['title'] for post in posts]
         results = []
         
-        for post in posts:
-            # Analyze sentiment for each post
-            sentiment_result = cls.analyze_post_sentiment(post['title'])
+        # Score in chunks so a deadline can cut the work short
+        for start in range(0, len(titles), cls._SCORING_CHUNK_SIZE):
+            if budget.exhausted():
+                break
             
-            # Combine post data with sentiment analysis
-            results.append({
-                "title": post['title'],
-                "sentimentScore": sentiment_result['sentimentScore'],
-                "details": sentiment_result['details']
-            })
+            results.extend(cls.analyze_titles(titles[start:start + cls._SCORING_CHUNK_SIZE]))
         
+        with timed("aggregate"):
+            cls.record_results(subreddit, posts, results)
         return results
+    
+    @staticmethod
+    def record_results(subreddit, posts, results):
+        """Queue scored posts for the subreddit's running sentiment aggregates, skipping mock posts"""
+        get_default_sentiment_store().record_in_background(subreddit, [
+            (post['id'], result['sentimentScore'], post['created_utc'])
+            for post, result in zip(posts, results)
+            if not str(post['id']).startswith('mock_')
+        ])
+    
+    @classmethod
+    def get_summary(cls, subreddit, budget=None):
+        """
+        Running sentiment summary of a subreddit
+        
+        Reads the persisted aggregates; a subreddit with nothing recorded
+        yet is analyzed once to seed them.
+        
+        Args:
+            subreddit (str): The subreddit to summarize
+            budget (LatencyBudget): Latency policy, defaults to the configured one
+            
+        Returns:
+            dict: Count, mean, std, class histogram, decayed mean and windowed summaries
+        """
+        store = get_default_sentiment_store()
+        with timed("aggregate"):
+            store.flush()
+            summary = store.summary(subreddit)
+        if summary['count'] == 0:
+            cls.analyze_subreddit(subreddit, budget)
+            with timed("aggregate"):
+                store.flush()
+                summary = store.summary(subreddit)
+        return summary
+    
+    @classmethod
+    def analyze_titles(cls, titles):
+        """
+        Score post titles in one batch
+        
+        Args:
+            titles (list): Post titles
+            
+        Returns:
+            list: {'title', 'sentimentScore', 'details'} result per title
+        """
+        # Combine post data with sentiment analysis
+        return [{
+            "title": title,
+            "sentimentScore": sentiment_result['sentimentScore'],
+            "details": sentiment_result['details']
+        } for title, sentiment_result in zip(titles, cls._score_titles(titles))]
+
+# Load the pre-trained model at import so requests never pay for it
+SentimentAnalysisModel._initialize_ml_model()
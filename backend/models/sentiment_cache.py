@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from models.cache import TTLCache
+from models.metrics import cache_samples, metrics
+from models.timeseries_store import data_dir
+
+def content_key(text, version):
+    """Cache key of a text scored by a given model version"""
+    return hashlib.blake2b(f"{version}\0{text}".encode('utf-8'), digest_size=16).hexdigest()
+
+class SentimentResultCache:
+    """
+    Bounded cache of sentiment results keyed by content hash
+
+    Results live in an in-memory LRU tier and, optionally, in an SQLite
+    tier that survives restarts and is shared by every worker process on
+    the host. Values are tuples of floats. Keys already include the model
+    version (see content_key), so entries never need to expire.
+
+    The disk tier is bounded by row count across all processes sharing it.
+    Only the oldest rows are ever deleted, so the rows hold a contiguous
+    rowid range and its width is the row count, read from the table itself
+    rather than counted per process.
+    """
+
+    def __init__(self, maxsize=None, disk_path=None, disk_maxsize=None):
+        """
+        Args:
+            maxsize (int): Maximum results in memory, defaults to TRENDLENS_SENTIMENT_CACHE_SIZE or 50000
+            disk_path (str): SQLite file of the on-disk tier, None to keep results in memory only
+            disk_maxsize (int): Maximum results on disk before the oldest are pruned,
+                defaults to TRENDLENS_SENTIMENT_DISK_CACHE_SIZE or 1000000
+        """
+        if maxsize is None:
+            maxsize = int(os.environ.get("TRENDLENS_SENTIMENT_CACHE_SIZE", 50000))
+        if disk_maxsize is None:
+            disk_maxsize = int(os.environ.get("TRENDLENS_SENTIMENT_DISK_CACHE_SIZE", 1000000))
+
+        self._memory = TTLCache(maxsize=maxsize, ttl=None)
+        self.disk_path = disk_path
+        self.disk_maxsize = disk_maxsize
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self._disk_lock = threading.Lock()
+        self._conn = None
+        if disk_path:
+            self._conn = sqlite3.connect(disk_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _disk_range(self):
+        """Lowest and highest rowid on disk, (None, None) when empty; the caller holds the disk lock"""
+        return self._conn.execute("SELECT MIN(rowid), MAX(rowid) FROM results").fetchone()
+
+    def get_many(self, keys):
+        """
+        Look up many results, memory first, then disk
+
+        Returns:
+            dict: Key to result for every key found
+        """
+        found = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            value = self._memory.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+
+        if missing and self._conn is not None:
+            rows = []
+            with self._disk_lock:
+                # Stay below SQLite's bound parameter limit
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    rows.extend(self._conn.execute(
+                        f"SELECT key, value FROM results WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+                    ).fetchall())
+                self.disk_hits += len(rows)
+                self.disk_misses += len(missing) - len(rows)
+            for key, value in rows:
+                found[key] = tuple(json.loads(value))
+                self._memory.set(key, found[key])
+
+        return found
+
+    def set_many(self, results):
+        """
+        Store many results in both tiers
+
+        Args:
+            results (dict): Key to tuple of floats
+        """
+        if not results:
+            return
+        for key, value in results.items():
+            self._memory.set(key, value)
+
+        if self._conn is None:
+            return
+        with self._disk_lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO results (key, value) VALUES (?, ?)",
+                [(key, json.dumps(list(value))) for key, value in results.items()]
+            )
+            first, last = self._disk_range()
+            if first is not None and last - first + 1 > self.disk_maxsize:
+                # Prune down to nine tenths so pruning does not run on every insert
+                self._conn.execute("DELETE FROM results WHERE rowid <= ?", (last - int(self.disk_maxsize * 0.9),))
+
+    def clear(self):
+        self._memory.clear()
+        if self._conn is not None:
+            with self._disk_lock, self._conn:
+                self._conn.execute("DELETE FROM results")
+
+    def stats(self):
+        """Return hit and miss counters of both tiers"""
+        stats = {'memory': self._memory.stats()}
+        if self._conn is not None:
+            with self._disk_lock:
+                first, last = self._disk_range()
+            lookups = self.disk_hits + self.disk_misses
+            stats['disk'] = {
+                'size': last - first + 1 if first is not None else 0,
+                'maxsize': self.disk_maxsize,
+                'hits': self.disk_hits,
+                'misses': self.disk_misses,
+                'hitRate': round(self.disk_hits / lookups, 4) if lookups else 0.0
+            }
+        return stats
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_result_cache():
+    """
+    Return the process-wide sentiment result cache, creating it on first use
+
+    TRENDLENS_SENTIMENT_DISK_CACHE=1 adds the on-disk tier
+    (sentiment_cache.sqlite3 in the data directory).
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                disk_enabled = os.environ.get("TRENDLENS_SENTIMENT_DISK_CACHE", "").strip().lower() in ("1", "true", "yes")
+                disk_path = os.path.join(data_dir(), 'sentiment_cache.sqlite3') if disk_enabled else None
+                _default_cache = SentimentResultCache(disk_path=disk_path)
+    return _default_cache
+
+def _cache_samples():
+    if _default_cache is None:
+        return []
+    stats = _default_cache.stats()
+    samples = cache_samples('sentiment_results', stats['memory'])
+    if 'disk' in stats:
+        samples.extend(cache_samples('sentiment_results_disk', stats['disk']))
+    return samples
+
+metrics.add_collector(_cache_samples)
@@ -0,0 +1,109 @@
+import os
+import threading
+from models.cache import TTLCache
+from models.metrics import cache_samples, metrics
+
+# How a SingleFlight.do() call got its value
+COMPUTED = "computed"
+INFLIGHT = "inflight"
+CACHED = "cached"
+
+_MISSING = object()
+
+class _Call:
+    """A computation running on one thread while identical calls wait for it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical computations into one
+
+    Calls with the same key made while a computation for that key is
+    running wait for it and share its value (or its exception) instead of
+    computing it again. Finished values are also kept in a short-lived
+    result cache, so requests arriving just after a computation reuse it.
+    """
+
+    def __init__(self, ttl=None, maxsize=256):
+        """
+        Args:
+            ttl (float): Seconds a finished value is reused, defaults to TRENDLENS_COALESCE_TTL or 5; 0 disables the result cache
+            maxsize (int): Maximum number of cached values
+        """
+        if ttl is None:
+            ttl = float(os.environ.get("TRENDLENS_COALESCE_TTL", 5))
+        self.ttl = ttl
+        self.coalesced = 0
+        self._results = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, compute, cache_if=None):
+        """
+        Return the value for a key, computing it only if no identical call is running
+
+        Args:
+            key (hashable): Identifies identical computations
+            compute (callable): Computes the value, called with no arguments
+            cache_if (callable): Predicate on a computed value deciding whether it is cached, defaults to caching every value
+
+        Returns:
+            tuple: (value, how) where how is COMPUTED, INFLIGHT or CACHED
+        """
+        if self.ttl > 0:
+            value = self._results.get(key, _MISSING)
+            if value is not _MISSING:
+                return value, CACHED
+
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, INFLIGHT
+
+        try:
+            call.value = compute()
+            if self.ttl > 0 and (cache_if is None or cache_if(call.value)):
+                self._results.set(key, call.value)
+            return call.value, COMPUTED
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        """Number of computations currently running"""
+        with self._lock:
+            return len(self._calls)
+
+    def clear(self):
+        """Drop the cached values; running computations are unaffected"""
+        self._results.clear()
+
+    def stats(self):
+        """Result cache counters, with the calls that waited on a running computation as 'coalesced'"""
+        stats = self._results.stats()
+        with self._lock:
+            stats['coalesced'] = self.coalesced
+            stats['inFlight'] = len(self._calls)
+        stats['ttl'] = self.ttl
+        return stats
+
+# Shared by the API handlers so identical concurrent analyses run once
+analysis_flights = SingleFlight()
+metrics.add_collector(lambda: cache_samples('analysis_results', analysis_flights.stats()))
@@ -0,0 +1,133 @@
+import re
+import string
+from functools import lru_cache
+import nltk
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+
+# NLTK package -> resource path checked before downloading it
+NLTK_RESOURCES = {
+    'vader_lexicon': 'sentiment/vader_lexicon.zip',
+    'stopwords': 'corpora/stopwords',
+    'wordnet': 'corpora/wordnet',
+}
+
+_checked_nltk_packages = set()
+
+def ensure_nltk_data(*packages):
+    """Download necessary NLTK data on first use (will only download if not already present)"""
+    for package in packages:
+        if package in _checked_nltk_packages:
+            continue
+        try:
+            nltk.data.find(NLTK_RESOURCES[package])
+        except LookupError:
+            nltk.download(package)
+        _checked_nltk_packages.add(package)
+
+class TextCleaner:
+    """
+    Reusable text preprocessor for sentiment analysis
+
+    Produces the same output as the original per-call cleaning code, but
+    compiles its patterns, stopword set and punctuation table once.
+    """
+
+    _URL_PATTERN = re.compile(r'https?:\/\/\S*|www\.\S+')
+    _HTML_PATTERN = re.compile(r'<.*?>')
+    _MENTION_PATTERN = re.compile(r'@\S*', flags=re.IGNORECASE)
+    _NUMBER_PATTERN = re.compile(r'^[+-]*?\d{1,3}[- ]*?\d{1,10}|\d{10}')
+    _HEART_PATTERN = re.compile(r'<3')
+    _ALPHANUMERIC_PATTERN = re.compile(r'\w*\d+\w*')
+    _PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
+    def __init__(self, language="english", lemma_cache_size=65536):
+        """
+        Args:
+            language (str): The NLTK stopwords language to remove
+            lemma_cache_size (int): Maximum number of memoized lemmas
+        """
+        self.language = language
+        self._stopwords = None
+        self._stopwords_loaded = False
+        self._lemmatizer = WordNetLemmatizer()
+        self._lemmatizer_available = True
+        self._lemmatize = lru_cache(maxsize=lemma_cache_size)(self._lemmatize_verb)
+
+    def _get_stopwords(self):
+        """Load the stopword set once, or None if the corpus is unavailable"""
+        if not self._stopwords_loaded:
+            try:
+                ensure_nltk_data('stopwords', 'wordnet')
+                self._stopwords = frozenset(stopwords.words(self.language))
+            except Exception:
+                # If stopwords not available (missing corpus, failed download, ...), continue without removing them
+                self._stopwords = None
+            self._stopwords_loaded = True
+        return self._stopwords
+
+    def _lemmatize_verb(self, word):
+        return self._lemmatizer.lemmatize(word, pos='v')
+
+    def clean(self, text):
+        """Clean and preprocess text for sentiment analysis"""
+        text = str(text).lower()
+
+        # Replace URLs
+        text = self._URL_PATTERN.sub('URL', text)
+
+        # Remove HTML
+        text = self._HTML_PATTERN.sub('', text)
+
+        # Replace mentions
+        text = self._MENTION_PATTERN.sub('user', text)
+
+        # Replace numbers
+        text = self._NUMBER_PATTERN.sub('NUMBER', text)
+
+        # Replace <3 with string heart
+        text = self._HEART_PATTERN.sub('HEART', text)
+
+        # Remove alphanumeric characters
+        text = self._ALPHANUMERIC_PATTERN.sub('', text)
+
+        # Remove stopwords
+        stop_words = self._get_stopwords()
+        if stop_words is not None:
+            text = ' '.join([word for word in text.split() if word not in stop_words])
+
+        # Remove punctuations
+        text = text.translate(self._PUNCTUATION_TABLE)
+
+        # Lemmatization
+        words = text.split()
+        if not words:
+            text = ''
+        elif self._lemmatizer_available:
+            try:
+                text = ' '.join([self._lemmatize(word) for word in words])
+            except LookupError:
+                # If the WordNet corpus is missing, continue without lemmatizing
+                self._lemmatizer_available = False
+            except Exception:
+                # If lemmatization fails, continue without it
+                pass
+
+        return text
+
+    def clean_many(self, texts):
+        """
+        Clean a batch of texts
+
+        Args:
+            texts (iterable): The texts to clean
+
+        Returns:
+            list: Cleaned texts in the same order
+        """
+        clean = self.clean
+        return [clean(text) for text in texts]
+
+    def lemma_cache_info(self):
+        """Return hit/miss statistics of the lemma cache"""
+        return self._lemmatize.cache_info()
@@ -0,0 +1,214 @@
+import math
+import os
+import sqlite3
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+
+RESOLUTIONS = ("day", "week", "month")
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+def data_dir():
+    """Directory for local on-disk state, from TRENDLENS_DATA_DIR"""
+    path = os.environ.get("TRENDLENS_DATA_DIR", DEFAULT_DATA_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def shift_months(day, months):
+    """Return the first day of the calendar month `months` away from day's month"""
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def bucket_start(day, resolution):
+    """First day of the day, ISO week (Monday) or calendar month bucket containing day"""
+    if resolution == "day":
+        return day
+    if resolution == "week":
+        return day - timedelta(days=day.weekday())
+    if resolution == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown resolution '{resolution}', expected one of {', '.join(RESOLUTIONS)}")
+
+def bucket_key(day, resolution):
+    """Storage key of a bucket: YYYY-MM for months, YYYY-MM-DD otherwise"""
+    start = bucket_start(day, resolution)
+    return f"{start.year}-{start.month:02d}" if resolution == "month" else start.isoformat()
+
+def utc_day(created_utc):
+    return datetime.fromtimestamp(created_utc, tz=timezone.utc).date()
+
+# Last second datetime can represent, the end of year 9999
+MAX_TIMESTAMP = 253402300799
+
+def valid_timestamp(value):
+    """Whether value is a finite UTC timestamp between 1970 and the end of year 9999"""
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value) and 0 <= value <= MAX_TIMESTAMP)
+
+def bucket_range(months, resolution, today=None):
+    """
+    Bucket keys covering the last `months` calendar months, oldest first
+
+    The window starts on the first day of the month `months - 1` months
+    before today's month and ends with the bucket containing today.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    if months <= 0:
+        return []
+    if resolution == "month":
+        return [bucket_key(shift_months(today, -i), "month") for i in range(months - 1, -1, -1)]
+
+    step = timedelta(days=1 if resolution == "day" else 7)
+    current = bucket_start(shift_months(today, -(months - 1)), resolution)
+    keys = []
+    while current <= today:
+        keys.append(bucket_key(current, resolution))
+        current += step
+    return keys
+
+class TimeSeriesStore:
+    """
+    Append-only SQLite store of subreddit post and comment events
+
+    Every ingested event also increments pre-aggregated day, week and month
+    rollups, so an activity query reads one row per bucket instead of
+    recounting events.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS events (
+            subreddit TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            event_id TEXT NOT NULL,
+            created_utc REAL NOT NULL,
+            PRIMARY KEY (subreddit, kind, event_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS rollups (
+            subreddit TEXT NOT NULL,
+            resolution TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            posts INTEGER NOT NULL DEFAULT 0,
+            comments INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (subreddit, resolution, bucket)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): SQLite database file, defaults to activity.sqlite3 in the data directory
+        """
+        self.path = path or os.path.join(data_dir(), 'activity.sqlite3')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+
+    def ingest(self, subreddit, events):
+        """
+        Append post and comment events, skipping ids already ingested
+
+        Args:
+            subreddit (str): The subreddit the events belong to
+            events (iterable): (kind, event_id, created_utc) tuples, kind being 'post' or 'comment'
+
+        Returns:
+            int: Number of new events
+        """
+        subreddit = subreddit.lower()
+        increments = Counter()
+        added = 0
+
+        with self._lock, self._conn:
+            for kind, event_id, created_utc in events:
+                if kind not in ("post", "comment"):
+                    raise ValueError(f"Unknown event kind '{kind}'")
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO events (subreddit, kind, event_id, created_utc) VALUES (?, ?, ?, ?)",
+                    (subreddit, kind, str(event_id), float(created_utc))
+                )
+                if cursor.rowcount != 1:
+                    continue
+                added += 1
+                day = utc_day(created_utc)
+                for resolution in RESOLUTIONS:
+                    increments[(resolution, bucket_key(day, resolution), kind)] += 1
+
+            self._conn.executemany(
+                """
+                INSERT INTO rollups (subreddit, resolution, bucket, posts, comments) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (subreddit, resolution, bucket) DO UPDATE SET
+                    posts = posts + excluded.posts,
+                    comments = comments + excluded.comments
+                """,
+                [
+                    (subreddit, resolution, bucket, count if kind == "post" else 0, count if kind == "comment" else 0)
+                    for (resolution, bucket, kind), count in increments.items()
+                ]
+            )
+        return added
+
+    def ingest_posts(self, subreddit, posts):
+        """Append posts given as dicts with 'id' and 'created_utc'"""
+        return self.ingest(subreddit, (("post", post['id'], post['created_utc']) for post in posts))
+
+    def ingest_comments(self, subreddit, comments):
+        """Append comments given as dicts with 'id' and 'created_utc'"""
+        return self.ingest(subreddit, (("comment", comment['id'], comment['created_utc']) for comment in comments))
+
+    def has_data(self, subreddit):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM rollups WHERE subreddit = ? LIMIT 1", (subreddit.lower(),)
+            ).fetchone()
+        return row is not None
+
+    def activity(self, subreddit, months=8, resolution="month", today=None):
+        """
+        Post and comment counts per bucket over the last `months` calendar months
+
+        Args:
+            subreddit (str): The subreddit to read
+            months (int): Number of calendar months in the window
+            resolution (str): Bucket size, one of "day", "week" or "month"
+            today (date): End of the window, defaults to the current UTC date
+
+        Returns:
+            list: {'date', 'posts', 'comments'} dicts, oldest first, with empty buckets as zeros
+        """
+        keys = bucket_range(months, resolution, today)
+        if not keys:
+            return []
+
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT bucket, posts, comments FROM rollups
+                WHERE subreddit = ? AND resolution = ? AND bucket BETWEEN ? AND ?
+                """,
+                (subreddit.lower(), resolution, keys[0], keys[-1])
+            ).fetchall()
+
+        counts = {bucket: (posts, comments) for bucket, posts, comments in rows}
+        return [{
+            "date": key,
+            "posts": counts.get(key, (0, 0))[0],
+            "comments": counts.get(key, (0, 0))[1]
+        } for key in keys]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_default_store():
+    """Return the process-wide activity store, creating it on first use"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = TimeSeriesStore()
+    return _default_store
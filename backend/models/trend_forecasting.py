@@ -1,7 +1,15 @@
 
+import logging
 import random
-import time
-from datetime import datetime, timedelta
+import sqlite3
+from datetime import datetime, timezone
+import numpy as np
+from models.latency import LatencyBudget
+from models.metrics import mock_fallback, timed
+from models.forecasting import SEASON_LENGTHS, forecast, forecast_many
+from models.timeseries_store import bucket_range, get_default_store, shift_months
+
+logger = logging.getLogger(__name__)
 
 class TrendForecastingModel:
     """
@@ -9,94 +17,163 @@ class TrendForecastingModel:
     """
     
     @staticmethod
-    def get_trend_data(subreddit, months=8, forecast_months=4):
+    def get_trend_data(subreddit, months=8, forecast_months=4, budget=None, method="linear"):
         """
         Get historical trend data and forecast future trends
         
+        The history is the monthly post and comment count from the local
+        activity store when events have been ingested for the subreddit,
+        and generated mock data otherwise.
+        
         Args:
             subreddit (str): The subreddit to analyze
             months (int): Number of months of historical data
             forecast_months (int): Number of months to forecast
+            budget (LatencyBudget): Latency policy, defaults to the configured one
+            method (str): Forecast model, one of "linear", "holt_winters" or "seasonal_naive"
             
         Returns:
             list: Trend data with historical and predicted values
         """
-        print(f"Forecasting trends for r/{subreddit} with {months} months history and {forecast_months} months forecast")
+        logger.info("Forecasting trends for r/%s with %s months history and %s months forecast", subreddit, months, forecast_months)
         
-        # Simulate API delay
-        time.sleep(1.5)
+        budget = budget or LatencyBudget.from_config()
         
-        current_date = datetime.now()
-        data = []
+        budget.simulate("trend.get_trend_data")
         
-        # Generate historical data
-        for i in range(months - 1, -1, -1):
-            date = current_date - timedelta(days=30 * i)
-            
-            # Generate somewhat realistic trend with some randomness and an upward trend
-            base_value = 30 + (months - i) * 5  # Base trend going up over time
-            random_variation = random.random() * 30 - 15  # Random variation between -15 and +15
-            
-            data.append({
-                "date": TrendForecastingModel.format_date(date),
-                "value": round(base_value + random_variation),
-                "predictedValue": None
-            })
+        # Month keys of the activity store are UTC
+        current_date = datetime.now(timezone.utc).date()
+        months = max(int(months), 0)
         
-        # Generate forecast data
-        last_value = data[-1]["value"] or 0
-        for i in range(1, forecast_months + 1):
-            date = current_date + timedelta(days=30 * i)
-            
-            # Generate forecast with upward trend and some randomness
-            trend_increase = last_value * 0.05 * i  # 5% increase per month
-            random_variation = random.random() * 20 - 5  # Random variation between -5 and +15
-            
-            data.append({
-                "date": TrendForecastingModel.format_date(date),
-                "value": None,
-                "predictedValue": round(last_value + trend_increase + random_variation)
-            })
+        history = None
+        try:
+            store = get_default_store()
+            if store.has_data(subreddit):
+                with timed("aggregate"):
+                    activity = store.activity(subreddit, months, "month", current_date)
+                history = np.array([bucket["posts"] + bucket["comments"] for bucket in activity], dtype=float)
+        except sqlite3.Error as e:
+            logger.warning("Error reading activity store for r/%s: %s", subreddit, e)
+        
+        if history is None:
+            mock_fallback("trend.data")
+            # Generate somewhat realistic history with an upward trend and random variation between -15 and +15
+            base_values = 30 + np.arange(1, months + 1) * 5
+            history = np.rint(base_values + np.random.random(months) * 30 - 15)
+        
+        data = [{
+            "date": TrendForecastingModel.format_date(shift_months(current_date, -i)),
+            "value": value,
+            "predictedValue": None
+        } for i, value in zip(range(months - 1, -1, -1), history.astype(int).tolist())]
+        
+        if months == 0 or budget.exhausted():
+            return data
+        
+        # Forecast from the history
+        with timed("forecast"):
+            predicted = forecast(history, forecast_months, method, SEASON_LENGTHS["monthly"])[0]
+        data.extend({
+            "date": TrendForecastingModel.format_date(shift_months(current_date, i)),
+            "value": None,
+            "predictedValue": value
+        } for i, value in zip(range(1, forecast_months + 1), np.rint(predicted).astype(int).tolist()))
         
         return data
     
     @staticmethod
-    def get_activity_data(subreddit, months=8):
+    def forecast_subreddits(counts_by_subreddit, forecast_months=4, method="linear", frequency="monthly"):
+        """
+        Forecast many subreddits in batched calls
+        
+        Args:
+            counts_by_subreddit (dict): Subreddit to a list of historical counts
+            forecast_months (int): Number of periods to forecast
+            method (str): Forecast model, one of "linear", "holt_winters" or "seasonal_naive"
+            frequency (str): Sampling frequency of the counts, "monthly", "weekly" or "daily"
+            
+        Returns:
+            dict: Subreddit to a list of forecast values
+        """
+        with timed("forecast"):
+            forecasts = forecast_many(counts_by_subreddit, forecast_months, method, SEASON_LENGTHS[frequency])
+        return {subreddit: values.tolist() for subreddit, values in forecasts.items()}
+    
+    @staticmethod
+    def get_activity_data(subreddit, months=8, budget=None, resolution="month"):
         """
         Get historical activity data (posts and comments)
         
+        Reads pre-aggregated counts from the local activity store when events
+        have been ingested for the subreddit, and generates mock data otherwise.
+        
         Args:
             subreddit (str): The subreddit to analyze
-            months (int): Number of months of historical data
+            months (int): Number of calendar months of historical data
+            budget (LatencyBudget): Latency policy, defaults to the configured one
+            resolution (str): Bucket size, one of "day", "week" or "month"
             
         Returns:
             list: Activity data with posts and comments counts
         """
-        print(f"Getting activity data for r/{subreddit} over {months} months")
+        logger.info("Getting activity data for r/%s over %s months", subreddit, months)
+        
+        budget = budget or LatencyBudget.from_config()
+        
+        budget.simulate("trend.get_activity_data")
         
-        # Simulate API delay
-        time.sleep(1.2)
+        try:
+            store = get_default_store()
+            if store.has_data(subreddit):
+                with timed("aggregate"):
+                    return store.activity(subreddit, months, resolution)
+        except sqlite3.Error as e:
+            logger.warning("Error reading activity store for r/%s: %s", subreddit, e)
         
-        current_date = datetime.now()
+        mock_fallback("trend.activity")
+        buckets = bucket_range(months, resolution)
+        bucket_scale = {"day": 1 / 30, "week": 7 / 30, "month": 1}[resolution]
         data = []
         
         # Generate activity data
-        for i in range(months - 1, -1, -1):
-            date = current_date - timedelta(days=30 * i)
+        for i, bucket in zip(range(len(buckets) - 1, -1, -1), buckets):
+            if budget.exhausted():
+                break
+            
+            months_ago = i * bucket_scale
             
             # Generate somewhat realistic data with some randomness and seasonal patterns
-            seasonality = 1 + 0.2 * (i / 12 * 2 * 3.14159)  # Seasonal factor
-            base_posts = 100 + i * 10  # Slight upward trend in post count
-            base_comments = 700 + i * 50  # Slight upward trend in comment count
+            seasonality = 1 + 0.2 * (months_ago / 12 * 2 * 3.14159)  # Seasonal factor
+            base_posts = (100 + months_ago * 10) * bucket_scale  # Slight upward trend in post count
+            base_comments = (700 + months_ago * 50) * bucket_scale  # Slight upward trend in comment count
             
             data.append({
-                "date": TrendForecastingModel.format_date(date),
+                "date": bucket,
                 "posts": round(base_posts * seasonality * (0.9 + random.random() * 0.3)),
                 "comments": round(base_comments * seasonality * (0.9 + random.random() * 0.3))
             })
         
         return data
     
+    @staticmethod
+    def ingest_activity(subreddit, posts=(), comments=()):
+        """
+        Append post and comment events to the local activity store
+        
+        Args:
+            subreddit (str): The subreddit the events belong to
+            posts (list): Dicts with 'id' and 'created_utc'
+            comments (list): Dicts with 'id' and 'created_utc'
+            
+        Returns:
+            dict: Number of new posts and comments
+        """
+        store = get_default_store()
+        return {
+            "posts": store.ingest_posts(subreddit, posts),
+            "comments": store.ingest_comments(subreddit, comments)
+        }
+    
     @staticmethod
     def format_date(date):
         """
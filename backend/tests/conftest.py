@@ -0,0 +1,39 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Tests import the backend modules the way the app does (from models.x import Y)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Isolated on-disk state, no startup warm-up or background workers, no rate
+# limit against the fake backend, and no reuse of finished route results.
+# Set before the models are imported, since they read it at import.
+os.environ.setdefault('TRENDLENS_DATA_DIR', tempfile.mkdtemp(prefix="trendlens-tests-"))
+for name, value in {
+    'TRENDLENS_WARMUP': 'none',
+    'TRENDLENS_LOG_LEVEL': 'WARNING',
+    'TRENDLENS_LATENCY_MODE': 'none',
+    'TRENDLENS_REDDIT_RPM': '0',
+    'TRENDLENS_COALESCE_TTL': '0',
+    'TRENDLENS_PRECOMPUTE_SUBREDDITS': '',
+    'TRENDLENS_PRECOMPUTE_WATCHLIST': '',
+    'TRENDLENS_INGEST_SUBREDDITS': '',
+    'TRENDLENS_INGEST_REPLAY': '',
+}.items():
+    os.environ.setdefault(name, value)
+
+@pytest.fixture
+def fake_reddit():
+    """Serve a small synthetic corpus through RedditClient, starting from cold caches"""
+    from benchmarks.corpus import SyntheticCorpus
+    from benchmarks.fake_reddit import FakeReddit, install, reset_caches
+    from models.reddit_client import RedditClient
+
+    previous = RedditClient._reddit
+    reddit = FakeReddit(SyntheticCorpus(posts=300))
+    install(reddit)
+    yield reddit
+    RedditClient.set_instance(previous)
+    reset_caches()
@@ -0,0 +1,141 @@
+import pytest
+
+@pytest.fixture
+def client(fake_reddit):
+    from app import app
+    return app.test_client()
+
+def test_bot_analyze_without_username_is_a_bad_request(client):
+    response = client.post('/api/bot/analyze', json={})
+    assert response.status_code == 400
+    assert 'username' in response.get_json()['error']
+
+def test_bot_analyze_scores_a_user(client, fake_reddit):
+    username = fake_reddit.corpus.author_name(3)
+    response = client.post('/api/bot/analyze', json={'username': username})
+    assert response.status_code == 200
+    assert response.get_json()['username'] == username
+
+def test_trend_data_with_unknown_forecast_model_is_a_bad_request(client):
+    response = client.post('/api/trend/data', json={'subreddit': 'python', 'forecastModel': 'prophet'})
+    assert response.status_code == 400
+    assert 'forecastModel' in response.get_json()['error']
+
+def test_trend_data_forecasts_with_the_requested_model(client):
+    response = client.post('/api/trend/data', json={
+        'subreddit': 'python', 'historyMonths': 6, 'forecastMonths': 3, 'forecastModel': 'holt_winters'
+    })
+    assert response.status_code == 200
+    predicted = [point['predictedValue'] for point in response.get_json() if point['predictedValue'] is not None]
+    assert len(predicted) == 3
+
+def test_activity_with_unknown_resolution_is_a_bad_request(client):
+    response = client.post('/api/trend/activity', json={'subreddit': 'python', 'resolution': 'year'})
+    assert response.status_code == 400
+    assert 'resolution' in response.get_json()['error']
+
+def test_ingest_requires_the_admin_token(client, monkeypatch):
+    monkeypatch.setenv('TRENDLENS_ADMIN_TOKEN', 'secret')
+    event = {'subreddit': 'ingesttest', 'posts': [{'id': 'p1', 'created_utc': 1790000000}]}
+    assert client.post('/api/trend/ingest', json=event).status_code == 403
+    assert client.post('/api/trend/ingest', json=event, headers={'X-Admin-Token': 'wrong'}).status_code == 403
+
+    response = client.post('/api/trend/ingest', json=event, headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    assert response.get_json() == {'posts': 1, 'comments': 0}
+
+@pytest.mark.parametrize('payload', [
+    {'subreddit': 'ingesttest', 'posts': [{'foo': 1}]},
+    {'subreddit': 'ingesttest', 'comments': [{'id': 'c1', 'created_utc': 'yesterday'}]},
+    {'subreddit': 'ingesttest', 'posts': 'p1'},
+    {'posts': [{'id': 'p1', 'created_utc': 1790000000}]},
+] + [
+    {'subreddit': 'ingesttest', 'posts': [{'id': 'p1', 'created_utc': created_utc}]}
+    for created_utc in (float('nan'), float('inf'), -1, 1e13, True)
+])
+def test_ingest_rejects_malformed_events(client, monkeypatch, payload):
+    monkeypatch.setenv('TRENDLENS_ADMIN_TOKEN', 'secret')
+    response = client.post('/api/trend/ingest', json=payload, headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 400
+
+@pytest.mark.parametrize('deadline_ms', ['abc', 0, -1, [100], True])
+def test_invalid_deadline_is_a_bad_request(client, deadline_ms):
+    response = client.post('/api/sentiment/subreddit', json={'subreddit': 'python', 'deadlineMs': deadline_ms})
+    assert response.status_code == 400
+    assert 'deadlineMs' in response.get_json()['error']
+
+def test_batch_with_invalid_deadline_is_a_bad_request(client):
+    response = client.post('/api/batch', json={'subreddits': ['python'], 'deadlineMs': 'abc'})
+    assert response.status_code == 400
+
+def test_request_without_a_json_body_is_a_bad_request(client):
+    assert client.post('/api/trend/data', data='not json').status_code == 400
+    assert client.post('/api/batch').status_code == 400
+
+@pytest.mark.parametrize('route, payload', [
+    ('/api/bot/subreddit', {'subreddit': 'python', 'topK': [10]}),
+    ('/api/bot/subreddit', {'subreddit': 'python', 'postLimit': 0}),
+    ('/api/influencer/subreddit', {'subreddit': 'python', 'topK': 'ten'}),
+    ('/api/influencer/subreddit', {'subreddit': 'python', 'postLimit': 5000}),
+    ('/api/trend/data', {'subreddit': 'python', 'historyMonths': 8.5}),
+    ('/api/trend/activity', {'subreddit': 'python', 'months': -1}),
+])
+def test_invalid_numeric_params_are_bad_requests(client, route, payload):
+    response = client.post(route, json=payload)
+    assert response.status_code == 400
+    assert 'must be an integer' in response.get_json()['error']
+
+def test_numeric_params_sent_as_strings_share_a_coalescing_key(monkeypatch):
+    import api_handlers
+
+    keys = []
+    monkeypatch.setattr(api_handlers, 'coalesce',
+                        lambda route, params, budget, compute, top_k=None: keys.append((params, top_k)))
+    for top_k in (10, '10'):
+        api_handlers.get_subreddit_influencers({'subreddit': 'Python', 'topK': top_k}, None)
+    assert keys[0] == keys[1]
+
+def test_subreddit_spellings_share_a_key_and_the_normalized_name_is_analyzed(monkeypatch):
+    import api_handlers
+
+    calls = []
+    monkeypatch.setattr(api_handlers, 'coalesce',
+                        lambda route, params, budget, compute, top_k=None: calls.append((params, compute())))
+    monkeypatch.setattr(api_handlers, 'get_model', lambda name: type('Model', (), {
+        'analyze_subreddit': staticmethod(lambda subreddit, budget: subreddit)
+    }))
+    for subreddit in (' Python ', 'python'):
+        api_handlers.analyze_subreddit_sentiment({'subreddit': subreddit}, None)
+    assert calls == [(('python',), 'python'), (('python',), 'python')]
+
+@pytest.mark.parametrize('route, payload, name', [
+    ('/api/sentiment/subreddit', {}, 'subreddit'),
+    ('/api/bot/subreddit', {'subreddit': '  '}, 'subreddit'),
+    ('/api/trend/data', {'subreddit': 42}, 'subreddit'),
+    ('/api/influencer/analyze', {}, 'username'),
+])
+def test_missing_names_are_bad_requests(client, route, payload, name):
+    response = client.post(route, json=payload)
+    assert response.status_code == 400
+    assert name in response.get_json()['error']
+
+def test_precomputed_rankings_serve_deadlines_and_smaller_top_k(fake_reddit):
+    import api_handlers
+    from models.latency import LatencyBudget
+    from models.precompute import refreshing
+
+    subreddit = fake_reddit.corpus.subreddit_name(0)
+    with refreshing():
+        stored = api_handlers.get_subreddit_bots({'subreddit': subreddit}, LatencyBudget())
+    calls = sum(fake_reddit.calls.values())
+
+    budget = LatencyBudget('deadline-ms', 5000)
+    served = api_handlers.get_subreddit_bots({'subreddit': subreddit, 'topK': 3, 'deadlineMs': 5000}, budget)
+    assert served == stored[:3]
+    assert budget.computed_at is not None
+    assert sum(fake_reddit.calls.values()) == calls
+
+    # More entries than were stored are computed on demand
+    budget = LatencyBudget()
+    assert len(api_handlers.get_subreddit_bots({'subreddit': subreddit, 'topK': 20}, budget)) > len(stored)
+    assert budget.computed_at is None
@@ -0,0 +1,24 @@
+import pytest
+from batch import plan_batch
+
+def _targets(tasks):
+    return sorted({(key, name) for key, name, _, _ in tasks})
+
+def test_a_single_subreddit_string_is_one_target():
+    tasks = plan_batch({'subreddits': 'py', 'analyses': ['sentiment']})
+    assert _targets(tasks) == [('subreddit', 'py')]
+
+def test_duplicate_and_empty_names_are_dropped():
+    tasks = plan_batch({'subreddits': ['Python', 'python', ' ', 'rust'], 'users': 'spez', 'analyses': 'bot'})
+    assert _targets(tasks) == [('subreddit', 'Python'), ('subreddit', 'rust'), ('username', 'spez')]
+
+@pytest.mark.parametrize('payload', [
+    {'subreddits': {'name': 'python'}},
+    {'subreddits': 42},
+    {'subreddits': ['python'], 'analyses': {'bot': True}},
+    {'subreddits': ['python'], 'analyses': ['bots']},
+    {},
+])
+def test_malformed_batches_are_rejected(payload):
+    with pytest.raises(ValueError):
+        plan_batch(payload)
@@ -0,0 +1,144 @@
+import json
+import math
+import os
+
+import numpy as np
+import pytest
+
+from models import bot_features
+from models.bot_detection import BotDetectionModel
+from models.bot_features import (
+    CRITERIA, MAX_CRITERION_SCORE, NEUTRAL_SCORE, RAW_FEATURES, build_feature_matrix, score_feature_matrix
+)
+from models.latency import LatencyBudget
+from models.near_duplicate import NearDuplicateIndex
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'bot_users.json')
+
+@pytest.fixture
+def recorded():
+    """Profiles and histories recorded from the Reddit API: a spam bot, a long-time user and a missing account"""
+    with open(FIXTURE) as f:
+        return json.load(f)
+
+def _matrix(recorded):
+    users = recorded['users']
+    return build_feature_matrix(
+        [user['profile'] for user in users],
+        [user['history'] for user in users],
+        now=recorded['recordedAt'],
+        usernames=[user['username'] for user in users],
+        index=NearDuplicateIndex()
+    )
+
+def test_feature_matrix_from_recorded_histories(recorded):
+    features = _matrix(recorded)
+    assert features.shape == (3, len(RAW_FEATURES))
+
+    bot, human, missing = (dict(zip(RAW_FEATURES, row)) for row in features)
+    assert bot['account_age_days'] == pytest.approx(10)
+    assert bot['comments'] == 4
+    # Five of six identical posts and three of four identical comments repeat an earlier one
+    assert bot['repeated_items'] == 8
+    assert bot['activities'] == 10
+    assert bot['active_span_days'] == pytest.approx(5 / 24)
+    assert bot['subreddit_evenness'] == pytest.approx(0)
+    assert bot['reply_comments'] == 0
+
+    assert human['account_age_days'] == pytest.approx(2000)
+    assert human['repeated_items'] == 0
+    assert human['activities'] == 7
+    assert human['active_span_days'] == pytest.approx(190)
+    assert human['subreddit_evenness'] == pytest.approx(0.6563, abs=1e-4)
+    assert human['reply_comments'] == 3
+
+    assert math.isnan(missing['account_age_days'])
+    assert math.isnan(missing['subreddit_evenness'])
+    assert missing['activities'] == 0
+
+def test_scores_separate_the_bot_from_the_long_time_user(recorded):
+    criteria, overall = score_feature_matrix(_matrix(recorded))
+    assert criteria.shape == (3, len(CRITERIA))
+    assert ((criteria >= 0) & (criteria <= MAX_CRITERION_SCORE)).all()
+
+    bot, human, missing = criteria
+    assert overall[0] >= 75
+    assert overall[1] <= 25
+    assert bot[CRITERIA.index("Comment Patterns")] == pytest.approx(8 / 10 * MAX_CRITERION_SCORE)
+    assert bot[CRITERIA.index("Content Diversity")] == pytest.approx(MAX_CRITERION_SCORE)
+    assert human[CRITERIA.index("Interaction Ratio")] == pytest.approx((1 - 3 / 4) * MAX_CRITERION_SCORE)
+    # No profile and no history give no evidence either way
+    for name in ("Account Age", "Comment Patterns", "Content Diversity", "Interaction Ratio"):
+        assert missing[CRITERIA.index(name)] == NEUTRAL_SCORE
+
+def test_batch_scoring_matches_scoring_each_user_alone(recorded):
+    features = _matrix(recorded)
+    criteria, overall = score_feature_matrix(features)
+    for row, (row_criteria, row_overall) in enumerate(zip(criteria, overall)):
+        alone_criteria, alone_overall = score_feature_matrix(features[row:row + 1])
+        np.testing.assert_allclose(alone_criteria[0], row_criteria)
+        assert alone_overall[0] == row_overall
+
+def test_score_users_on_recorded_fixtures(recorded, monkeypatch):
+    users = {user['username']: user for user in recorded['users']}
+    monkeypatch.setattr(bot_features, "get_default_index", NearDuplicateIndex)
+    monkeypatch.setattr(BotDetectionModel, "_fetch_history", staticmethod(lambda username: users[username]['history']))
+    monkeypatch.setattr("models.bot_detection.author_profiles.get_many",
+                        lambda usernames: {username: users[username]['profile'] for username in usernames})
+
+    results = BotDetectionModel.score_users(list(users) + [None, "longtime_gardener"], LatencyBudget())
+    assert [result['username'] for result in results] == list(users)
+    assert results[0]['score'] > results[1]['score']
+    assert [detail['criteriaName'] for detail in results[0]['details']] == CRITERIA
+
+def test_analyze_user_honours_the_latency_budget(fake_reddit):
+    budget = LatencyBudget('deadline-ms', 1e-6)
+    result = BotDetectionModel.analyze_user("AirdropAlerts_4412", budget)
+    assert budget.partial
+    assert result['score'] == 50
+    assert all(detail['score'] == NEUTRAL_SCORE for detail in result['details'])
+    assert sum(fake_reddit.calls.values()) == 0
+
+def test_streamed_authors_are_capped_and_scored_from_cached_features(fake_reddit, monkeypatch):
+    from models.ingestion import LiveAggregates
+
+    subreddit = fake_reddit.corpus.subreddit_name(0)
+    authors = [fake_reddit.corpus.author_name(index) for index in range(6)]
+    aggregates = LiveAggregates()
+    aggregates.apply(subreddit, [], [
+        {'id': f"c{index}", 'author': author, 'created_utc': 1790000000.0 + index}
+        for index, author in enumerate(authors)
+    ], [])
+    monkeypatch.setattr('models.bot_detection.live_aggregates', aggregates)
+    refreshed = []
+    monkeypatch.setattr(BotDetectionModel, "refresh_in_background", staticmethod(refreshed.extend))
+
+    # Nothing cached yet: the newest post_limit authors are fetched on the request
+    first = BotDetectionModel.get_subreddit_bots(subreddit, LatencyBudget(), top_k=10, post_limit=3)
+    assert sorted(result['username'] for result in first) == sorted(authors[-3:])
+    assert fake_reddit.calls['redditor.submissions'] == 3
+    assert refreshed == []
+
+    # Later reads score the cached authors without calling Reddit and refresh the rest in the background
+    calls = sum(fake_reddit.calls.values())
+    second = BotDetectionModel.get_subreddit_bots(subreddit, LatencyBudget(), top_k=10, post_limit=5)
+    assert sum(fake_reddit.calls.values()) == calls
+    assert second == first
+    assert refreshed == authors[2:0:-1]
+
+def test_background_refresh_caches_features(fake_reddit):
+    username = fake_reddit.corpus.author_name(1)
+    assert BotDetectionModel.score_cached([username]) == ([], [username])
+
+    BotDetectionModel.refresh_in_background([username])
+    BotDetectionModel._refresh_queue.join()
+    results, missing = BotDetectionModel.score_cached([username])
+    assert missing == []
+    assert results == BotDetectionModel.score_users([username], LatencyBudget())
+
+def test_users_without_comments_get_a_neutral_interaction_ratio():
+    history = {'posts': [{'id': f"p{i}", 'subreddit': 'python', 'title': f"post number {i} here today",
+                          'created_utc': 1790000000 + i} for i in range(3)], 'comments': []}
+    features = build_feature_matrix([None], [history], now=1790000100, usernames=['poster'], index=NearDuplicateIndex())
+    criteria, _ = score_feature_matrix(features)
+    assert criteria[0][CRITERIA.index("Interaction Ratio")] == NEUTRAL_SCORE
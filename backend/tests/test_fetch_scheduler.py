@@ -0,0 +1,134 @@
+import threading
+import time
+
+from benchmarks.fake_reddit import FakeReddit, install
+from models.fetch_scheduler import FetchScheduler, RateLimiter
+
+class ConcurrencyTrackingReddit(FakeReddit):
+    """Fake backend recording how many calls were in flight at once"""
+
+    def __init__(self, corpus, latency_ms=20.0):
+        super().__init__(corpus, latency_ms)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _call(self, endpoint):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            super()._call(endpoint)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+def test_map_keeps_input_order_and_runs_in_parallel():
+    scheduler = FetchScheduler(max_workers=4, requests_per_minute=0)
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def fetch(item):
+        with lock:
+            running.append(item)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.remove(item)
+        return item * 2
+
+    try:
+        assert scheduler.map(fetch, range(8)) == [item * 2 for item in range(8)]
+    finally:
+        scheduler.shutdown()
+    assert max(peak) > 1
+
+def test_map_of_one_item_runs_on_the_calling_thread():
+    scheduler = FetchScheduler(max_workers=2, requests_per_minute=0)
+    try:
+        assert scheduler.map(lambda item: threading.current_thread().name, ["a"]) == [threading.current_thread().name]
+    finally:
+        scheduler.shutdown()
+
+def test_rate_limiter_allows_a_burst_then_refuses():
+    limiter = RateLimiter(requests_per_minute=60, burst=3)
+    assert [limiter.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+def test_rate_limiter_spend_goes_into_debt():
+    limiter = RateLimiter(requests_per_minute=60, burst=2)
+    limiter.spend(5)
+    assert not limiter.try_acquire()
+
+def test_subreddit_influencers_fetch_karma_and_comments_in_parallel(fake_reddit, monkeypatch):
+    from models import influencer_detection
+    from models.influencer_detection import InfluencerDetectionModel
+
+    reddit = ConcurrencyTrackingReddit(fake_reddit.corpus)
+    install(reddit)
+    fallbacks = []
+    monkeypatch.setattr(influencer_detection, "mock_fallback", lambda source, amount=1: fallbacks.append(source))
+
+    subreddit = fake_reddit.corpus.subreddit_name(0)
+    posts = InfluencerDetectionModel.fetch_top_posts(subreddit, 50)
+    authors = {post['author'] for post in posts if post['author']}
+    results = InfluencerDetectionModel.get_subreddit_influencers(subreddit, top_k=5, post_limit=50)
+
+    assert fallbacks == []
+    assert 0 < len(results) <= 5
+    # One profile per unique author and one comment listing per influencer
+    assert reddit.calls["redditor"] == len(authors)
+    assert reddit.calls["submission.comments"] == len(results)
+    assert reddit.max_in_flight > 1
+
+def test_karma_lookups_are_cached_across_requests(fake_reddit):
+    from models.influencer_detection import InfluencerDetectionModel
+
+    subreddit = fake_reddit.corpus.subreddit_name(1)
+    InfluencerDetectionModel.get_subreddit_influencers(subreddit, top_k=3)
+    profiles = fake_reddit.calls["redditor"]
+    InfluencerDetectionModel.get_subreddit_influencers(subreddit, top_k=3)
+    assert profiles > 0
+    assert fake_reddit.calls["redditor"] == profiles
+
+def test_every_reddit_call_takes_a_token(fake_reddit, monkeypatch):
+    from models import fetch_scheduler
+    from models.bot_detection import BotDetectionModel
+    from models.latency import LatencyBudget
+    from models.reddit_client import RedditClient
+
+    scheduler = FetchScheduler(max_workers=2, requests_per_minute=60)
+    monkeypatch.setattr(fetch_scheduler, '_default_scheduler', scheduler)
+    try:
+        RedditClient.get_posts(fake_reddit.corpus.subreddit_name(0), 'new', 10)
+        BotDetectionModel.score_users([fake_reddit.corpus.author_name(0)], LatencyBudget())
+        # A listing, a profile and the submissions and comments halves of a history
+        assert fake_reddit.calls['subreddit.new'] == fake_reddit.calls['redditor.submissions'] == 1
+        assert fake_reddit.calls['redditor.comments'] == 1
+        assert 56 <= scheduler.rate_limiter._tokens < 56.5
+    finally:
+        scheduler.shutdown()
+
+def test_influencer_comment_fetches_stop_at_the_deadline(fake_reddit, monkeypatch):
+    from models import fetch_scheduler
+    from models.influencer_detection import InfluencerDetectionModel
+    from models.latency import LatencyBudget
+
+    scheduler = FetchScheduler(max_workers=2, requests_per_minute=0)
+    monkeypatch.setattr(fetch_scheduler, '_default_scheduler', scheduler)
+    budget = LatencyBudget('deadline-ms', 60000)
+    fetch_comments = InfluencerDetectionModel.fetch_comments
+
+    def fetch_then_expire(post_id, limit=10):
+        # The deadline passes while the first chunk is being fetched
+        budget.deadline_ms = 0
+        return fetch_comments(post_id, limit)
+
+    monkeypatch.setattr(InfluencerDetectionModel, 'fetch_comments', staticmethod(fetch_then_expire))
+    try:
+        subreddit = fake_reddit.corpus.subreddit_name(0)
+        results = InfluencerDetectionModel.get_subreddit_influencers(subreddit, budget, top_k=6)
+        assert len(results) == 2
+        assert fake_reddit.calls['submission.comments'] == 2
+        assert budget.partial
+    finally:
+        scheduler.shutdown()
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from models.forecasting import FORECAST_METHODS, forecast
+
+@pytest.mark.parametrize('method', FORECAST_METHODS)
+def test_forecasts_of_a_falling_series_are_never_negative(method):
+    falling = np.arange(40, 0, -1.0)
+    predicted = forecast(falling, 60, method, season_length=12)
+    assert predicted.shape == (1, 60)
+    assert (predicted >= 0).all()
+
+def test_linear_forecast_continues_a_rising_trend():
+    predicted = forecast([10, 20, 30, 40], 2, 'linear')[0]
+    assert predicted.tolist() == pytest.approx([50, 60])
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        forecast([1, 2, 3], 2, 'prophet')
+
+def _month_start(months_ago):
+    from datetime import datetime, timezone
+    from models.timeseries_store import shift_months
+    day = shift_months(datetime.now(timezone.utc).date(), -months_ago)
+    return datetime(day.year, day.month, 2, tzinfo=timezone.utc).timestamp()
+
+def test_trend_history_comes_from_the_activity_store(monkeypatch):
+    from models.timeseries_store import get_default_store
+    from models.trend_forecasting import TrendForecastingModel
+
+    fallbacks = []
+    monkeypatch.setattr('models.trend_forecasting.mock_fallback', fallbacks.append)
+    # 10, 20, 30 and 40 events in the last four months
+    events = [
+        (f"p{months_ago}-{i}", _month_start(months_ago))
+        for months_ago in range(4) for i in range((4 - months_ago) * 10)
+    ]
+    get_default_store().ingest('trendstore', (("post", event_id, created) for event_id, created in events))
+
+    data = TrendForecastingModel.get_trend_data('trendstore', months=4, forecast_months=2)
+    assert [point['value'] for point in data[:4]] == [10, 20, 30, 40]
+    assert [point['predictedValue'] for point in data[4:]] == [50, 60]
+    assert fallbacks == []
+
+def test_trend_data_without_activity_is_a_counted_mock_fallback(monkeypatch):
+    from models.trend_forecasting import TrendForecastingModel
+
+    fallbacks = []
+    monkeypatch.setattr('models.trend_forecasting.mock_fallback', fallbacks.append)
+    assert len(TrendForecastingModel.get_trend_data('nothingingested', months=3, forecast_months=1)) == 4
+    assert fallbacks == ['trend.data']
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from benchmarks.scorer import build_corpus, reference_scores
+from models.hybrid_scorer import COMPONENTS, HybridScorer
+from models.sentiment_analysis import SentimentAnalysisModel
+
+@pytest.fixture(scope='module')
+def models():
+    SentimentAnalysisModel._initialize_ml_model()
+    return SentimentAnalysisModel._vectorizer, SentimentAnalysisModel._ml_model, SentimentAnalysisModel._get_sid()
+
+@pytest.fixture(scope='module')
+def texts():
+    return build_corpus(300)
+
+def _assert_matches_reference(scorer, texts, models):
+    expected = reference_scores(texts, *models, scorer.components)
+    actual, ml_failed = scorer.score(texts)
+    assert not ml_failed
+    for name in expected:
+        assert np.array_equal(expected[name], actual[name]), name
+
+def test_single_pass_passes_its_self_check_on_the_pinned_versions(models, texts):
+    scorer = HybridScorer(*models, COMPONENTS)
+    assert (scorer._shared_tfidf, scorer._shared_vader) == (True, True)
+    _assert_matches_reference(scorer, texts, models)
+
+def test_changed_library_internals_fall_back_to_the_original_analyzers(models, texts, monkeypatch):
+    def removed(*args, **kwargs):
+        raise AttributeError("'TfidfVectorizer' object has no attribute '_tfidf'")
+
+    monkeypatch.setattr(HybridScorer, '_tfidf_matrix', removed)
+    monkeypatch.setattr(HybridScorer, '_vader_compound', lambda self, tokens: 0.123)
+    scorer = HybridScorer(*models, COMPONENTS)
+    assert (scorer._shared_tfidf, scorer._shared_vader) == (False, False)
+    _assert_matches_reference(scorer, texts, models)
@@ -0,0 +1,91 @@
+import os
+from datetime import date
+
+import pytest
+
+from models.ingestion import IngestionWorker, LiveAggregates, ReplaySource
+from models.timeseries_store import TimeSeriesStore
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'replay.ndjson')
+
+@pytest.fixture
+def store(tmp_path):
+    store = TimeSeriesStore(str(tmp_path / 'activity.sqlite3'))
+    yield store
+    store.close()
+
+def test_replay_source_filters_subreddits():
+    events = list(ReplaySource(FIXTURE, subreddits=['Books']))
+    assert [event['id'] for event in events] == ['b1', 'bc1']
+
+def test_worker_replays_the_fixture_into_the_aggregates(store):
+    aggregates = LiveAggregates()
+    worker = IngestionWorker(ReplaySource(FIXTURE), aggregates, store, batch_size=4, flush_interval=60)
+    worker.run()
+
+    assert (worker.events, worker.batches, worker.errors) == (8, 2, 0)
+    assert aggregates.has_subreddit('Gardening')
+
+    # One sentiment result per post title, newest first
+    sentiment = aggregates.recent_sentiment('gardening')
+    assert len(sentiment) == 3
+    herb_spiral, aphids, tomatoes = sentiment
+    assert tomatoes['sentimentScore'] > aphids['sentimentScore']
+
+    influencers = aggregates.influencer_aggregator('gardening')
+    assert [username for username, _ in influencers.top(2)] == ['alice', 'bob']
+    assert [post['id'] for post in influencers.posts_by('alice')] == ['g1', 'g3']
+
+    assert aggregates.recent_authors('gardening') == ['dave', 'alice', 'bob', 'carol']
+    assert aggregates.recent_authors('books') == ['frank', 'erin']
+    assert aggregates.recent_authors('python') is None
+
+    activity = store.activity('gardening', months=1, resolution='day', today=date(2026, 9, 21))
+    assert activity[-1] == {'date': '2026-09-21', 'posts': 3, 'comments': 3}
+
+def test_replaying_twice_does_not_double_count_activity(store):
+    for _ in range(2):
+        IngestionWorker(ReplaySource(FIXTURE), LiveAggregates(), store, flush_interval=60).run()
+    activity = store.activity('books', months=1, resolution='day', today=date(2026, 9, 21))
+    assert activity[-1]['posts'] == 1
+    assert activity[-1]['comments'] == 1
+
+def test_a_reconnecting_source_does_not_double_count(store):
+    events = list(ReplaySource(FIXTURE))
+    aggregates = LiveAggregates()
+    # A live source replays its recent backlog after reopening
+    IngestionWorker(events[:5] + events[:5] + events[5:], aggregates, store, batch_size=4, flush_interval=60).run()
+
+    assert aggregates.duplicates == 5
+    assert len(aggregates.recent_sentiment('gardening')) == 3
+    influencers = aggregates.influencer_aggregator('gardening')
+    assert [post['id'] for post in influencers.posts_by('alice')] == ['g1', 'g3']
+    assert aggregates.stats()['gardening']['windowPosts'] == 3
+
+def test_seen_ids_are_bounded():
+    aggregates = LiveAggregates(seen_ids=2)
+    comments = [{'id': f"c{index}", 'author': 'alice', 'created_utc': 1790000000 + index} for index in range(3)]
+    aggregates.apply('python', [], comments, [])
+    aggregates.apply('python', [], comments[1:], [])
+    assert aggregates.duplicates == 2
+    assert list(aggregates._seen) == ['t1_c1', 't1_c2']
+
+def test_malformed_replay_events_are_skipped_and_counted(tmp_path, store):
+    lines = open(FIXTURE).read().splitlines()
+    bad = [
+        'not json',
+        '{"kind": "post", "id": "x1", "subreddit": "gardening"}',
+        '{"kind": "comment", "id": "x2", "subreddit": "gardening", "author": "eve", "created_utc": NaN, "body": "hi"}',
+        '{"kind": "poll", "id": "x3", "subreddit": "gardening"}',
+        '[1, 2]',
+    ]
+    path = tmp_path / 'replay.ndjson'
+    path.write_text('\n'.join(lines[:2] + bad + lines[2:]) + '\n')
+
+    aggregates = LiveAggregates()
+    worker = IngestionWorker(ReplaySource(str(path)), aggregates, store, batch_size=4, flush_interval=60)
+    worker.run()
+
+    assert (worker.events, worker.skipped, worker.errors) == (8, 5, 0)
+    assert worker.stats()['skipped'] == 5
+    assert aggregates.recent_authors('books') == ['frank', 'erin']
@@ -0,0 +1,19 @@
+import pytest
+from models.latency import LatencyBudget, check_latency_config
+
+@pytest.mark.parametrize('deadline_ms', [0, -5, 'abc', float('nan'), float('inf')])
+def test_invalid_deadlines_are_rejected(deadline_ms):
+    with pytest.raises(ValueError):
+        LatencyBudget('deadline-ms', deadline_ms)
+
+def test_deadline_from_the_environment_is_parsed(monkeypatch):
+    monkeypatch.setenv('TRENDLENS_LATENCY_MODE', 'deadline-ms')
+    monkeypatch.setenv('TRENDLENS_DEADLINE_MS', '250')
+    assert LatencyBudget.from_config().deadline_ms == 250.0
+
+@pytest.mark.parametrize('mode, deadline_ms', [('fast', '1000'), ('deadline-ms', 'soon')])
+def test_bad_latency_config_fails_the_startup_check(monkeypatch, mode, deadline_ms):
+    monkeypatch.setenv('TRENDLENS_LATENCY_MODE', mode)
+    monkeypatch.setenv('TRENDLENS_DEADLINE_MS', deadline_ms)
+    with pytest.raises(ValueError):
+        check_latency_config()
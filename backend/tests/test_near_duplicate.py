@@ -0,0 +1,33 @@
+from models.near_duplicate import NearDuplicateIndex
+
+ORIGINAL = "Announcing our new open source library for parsing configuration files quickly"
+
+def _items(doc_id, created_utc, text=ORIGINAL, subreddit="python"):
+    return [(doc_id, text, subreddit, created_utc)]
+
+def test_copy_of_another_authors_earlier_text_is_repeated():
+    index = NearDuplicateIndex()
+    assert index.count_repeated("original_author", _items("t3_a", 1000.0)) == 0
+    assert index.count_repeated("copier", _items("t3_b", 2000.0)) == 1
+
+def test_original_author_scored_after_the_copier_is_not_repeated():
+    index = NearDuplicateIndex()
+    assert index.count_repeated("copier", _items("t3_b", 2000.0)) == 0
+    assert index.count_repeated("original_author", _items("t3_a", 1000.0)) == 0
+
+def test_repeats_of_own_text_are_counted_regardless_of_other_authors():
+    index = NearDuplicateIndex()
+    items = _items("t3_a", 1000.0) + _items("t3_b", 2000.0, subreddit="learnpython")
+    assert index.count_repeated("spammer", items) == 1
+
+def test_short_and_unrelated_texts_are_not_repeated():
+    index = NearDuplicateIndex()
+    index.add("t3_a", ORIGINAL, "original_author", "python", 1000.0)
+    assert index.count_repeated("someone", _items("t1_b", 2000.0, text="thanks!")) == 0
+    assert index.count_repeated("someone", _items("t1_c", 2000.0, text="Completely different words about gardening tomatoes")) == 0
+
+def test_add_returns_only_earlier_documents():
+    index = NearDuplicateIndex()
+    assert index.add("t3_b", ORIGINAL, "copier", "python", 2000.0) == []
+    assert index.add("t3_a", ORIGINAL, "original_author", "python", 1000.0) == []
+    assert sorted(index.add("t3_c", ORIGINAL, "another", "python", 3000.0)) == ["t3_a", "t3_b"]
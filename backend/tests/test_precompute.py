@@ -0,0 +1,104 @@
+import time
+from models.precompute import (
+    LeaderLock, PrecomputedResults, PrecomputeScheduler, SubredditPopularity, budget_capacity,
+    precomputed_results, start_precompute_from_config
+)
+from models.metrics import timed
+
+KEY = ('/api/sentiment/subreddit', ('python', None))
+
+def test_results_are_shared_through_the_sqlite_file(tmp_path):
+    path = str(tmp_path / 'precompute.sqlite3')
+    writer, reader = PrecomputedResults(max_age=60), PrecomputedResults(max_age=60)
+    writer.share(path)
+    reader.share(path)
+
+    assert reader.get(KEY) is None
+    writer.put(KEY, {'score': 1}, computed_at=time.time() - 5)
+    assert reader.get(KEY)[0] == {'score': 1}
+
+    writer.put(KEY, {'score': 2})
+    assert reader.get(KEY)[0] == {'score': 2}
+    assert reader.stats()['size'] == 1
+
+def test_results_older_than_max_age_are_not_served(tmp_path):
+    results = PrecomputedResults(max_age=60)
+    results.share(str(tmp_path / 'precompute.sqlite3'))
+    results.put(KEY, {'score': 1}, computed_at=time.time() - 120)
+    assert results.get(KEY) is None
+
+def test_only_one_process_holds_the_leader_lock(tmp_path):
+    path = str(tmp_path / 'precompute.lock')
+    first, second = LeaderLock(path), LeaderLock(path)
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+
+def _run_briefly(scheduler):
+    scheduler.start()
+    time.sleep(0.3)
+    scheduler.stop(timeout=5)
+
+def test_only_the_leader_refreshes(tmp_path):
+    path = str(tmp_path / 'precompute.lock')
+    refreshed = []
+    jobs = {'job': lambda data, budget: refreshed.append(data['subreddit'])}
+    options = dict(interval=0.05, requests_per_minute=0, jitter=0, popularity=SubredditPopularity())
+
+    holder = LeaderLock(path)
+    holder.acquire()
+    follower = PrecomputeScheduler(jobs, ['python'], leader_lock=LeaderLock(path), **options)
+    _run_briefly(follower)
+    assert refreshed == []
+    assert not follower.is_leader()
+
+    holder.release()
+    leader = PrecomputeScheduler(jobs, ['python'], leader_lock=LeaderLock(path), **options)
+    _run_briefly(leader)
+    assert 'python' in refreshed
+
+def test_budget_capacity():
+    assert budget_capacity(4, 50, 900) == 187
+    assert budget_capacity(120, 50, 900) == 6
+    assert budget_capacity(1000, 50, 900) == 1
+    assert budget_capacity(4, 0, 900) is None
+
+def test_the_budget_covers_the_most_requested_subreddits_at_the_measured_calls(monkeypatch):
+    monkeypatch.setattr(precomputed_results, 'max_age', 1)
+    popularity = SubredditPopularity()
+    subreddits = [f"sub{i}" for i in range(20)]
+
+    def job(data, budget):
+        for _ in range(10):
+            with timed('fetch'):
+                pass
+
+    scheduler = PrecomputeScheduler({'job': job}, subreddits, interval=0, requests_per_minute=6000, jitter=0,
+                                    popularity=popularity)
+    for _ in range(2):
+        popularity.record('sub19')
+    # Before any refresh is measured, each job counts as one call: all 20 fit the 100 calls allowed
+    scheduler.run_cycle()
+    assert scheduler.refreshes == 20
+    assert scheduler.unrefreshed == []
+    assert scheduler.calls_per_refresh == 10
+
+    # At the 10 calls a refresh measured, the budget covers the 10 most requested
+    scheduler.run_cycle()
+    assert scheduler.refreshes == 30
+    assert scheduler.unrefreshed == subreddits[9:19]
+    assert scheduler.stats()['unrefreshed'] == subreddits[9:19]
+
+def test_a_watchlist_larger_than_the_budget_is_still_precomputed(monkeypatch):
+    monkeypatch.setenv('TRENDLENS_PRECOMPUTE_SUBREDDITS', ','.join(f"sub{i}" for i in range(200)))
+    monkeypatch.setenv('TRENDLENS_PRECOMPUTE_RPM', '50')
+    jobs = {f"job{i}": lambda data, budget: None for i in range(4)}
+    scheduler = start_precompute_from_config(jobs)
+    try:
+        assert scheduler is not None
+        assert len(scheduler.covered(scheduler.subreddits)) == budget_capacity(4, 50, precomputed_results.max_age)
+    finally:
+        scheduler.stop(timeout=5)
+        precomputed_results.clear()
@@ -0,0 +1,63 @@
+import cProfile
+import json
+import re
+
+import pytest
+
+from models import profiling
+from models.profiling import ProfileStore
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ProfileStore(str(tmp_path / 'profiles'), retention=50)
+    monkeypatch.setattr(profiling, '_default_store', store)
+    return store
+
+@pytest.fixture
+def client(fake_reddit, monkeypatch):
+    from app import app
+    monkeypatch.setenv('TRENDLENS_ADMIN_TOKEN', 'secret')
+    return app.test_client()
+
+def test_profiling_requires_the_admin_token(client, store):
+    payload = {'subreddit': 'python'}
+    assert client.post('/api/trend/data?profile=1', json=payload).status_code == 403
+    response = client.post('/api/trend/data', json=payload, headers={'X-Profile': '1', 'X-Admin-Token': 'wrong'})
+    assert response.status_code == 403
+    assert store.list() == []
+
+    response = client.post('/api/trend/data?profile=1', json=payload, headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    summary = store.get(response.headers['X-Profile-Id'])
+    assert (summary['route'], summary['status']) == ('/api/trend/data', 200)
+    assert client.get('/api/admin/profiles').status_code == 403
+    assert client.get('/api/admin/profiles', headers={'X-Admin-Token': 'secret'}).get_json() == [summary]
+
+def test_a_streamed_batch_is_profiled_until_the_stream_ends(client, store, fake_reddit):
+    subreddit = fake_reddit.corpus.subreddit_name(0)
+    response = client.post('/api/batch?profile=1', json={'subreddits': [subreddit], 'analyses': ['sentiment']},
+                           headers={'X-Admin-Token': 'secret'})
+    profile_id = response.headers['X-Profile-Id']
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    response.close()
+    assert lines[-1]['done']
+
+    summary = store.get(profile_id)
+    assert summary['route'] == '/api/batch'
+    # The NDJSON generator ran under the profiler, not just the view that returned it
+    report = store.report(profile_id, limit=500)
+    assert re.search(r'batch\.py:\d+\(run_batch\)', report)
+
+def test_only_the_newest_profiles_are_kept(tmp_path):
+    store = ProfileStore(str(tmp_path / 'profiles'), retention=2)
+    ids = []
+    for route in ('/a', '/b', '/c'):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        sum(range(10))
+        profiler.disable()
+        ids.append(store.save(profiler, route, 1.0, 200))
+
+    assert [summary['route'] for summary in store.list()] == ['/c', '/b']
+    assert store.get(ids[0]) is None and store.path(ids[0]) is None
+    assert store.path(ids[2]) is not None
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from models.scoring_pool import ScoringPool
+from models.sentiment_analysis import SentimentAnalysisModel
+
+TEXTS = [
+    "I love this community, everyone is so helpful",
+    "This update is terrible and broke everything",
+    "The meeting is at noon on Tuesday",
+    "Absolutely fantastic work, thank you so much",
+    "Worst customer service I have ever had",
+] * 4
+
+@pytest.fixture(scope='module')
+def pool():
+    pool = ScoringPool(workers=2, chunk_size=4)
+    yield pool
+    pool.shutdown()
+
+def test_workers_are_spawned_not_forked(pool):
+    assert pool._executor._mp_context.get_start_method() == "spawn"
+
+def test_pool_scores_match_in_process_scores(pool):
+    expected = SentimentAnalysisModel.score_texts(TEXTS)
+    scored = pool.score_texts(TEXTS)
+    for name, column in expected.items():
+        np.testing.assert_allclose(scored[name], column)
+
+def test_pool_polarities_keep_input_order(pool):
+    from models.hybrid_scorer import polarity
+    assert pool.polarities(TEXTS) == pytest.approx([polarity(text) for text in TEXTS])
@@ -0,0 +1,87 @@
+import sqlite3
+
+from models.influencer_detection import CommentSentimentAggregate
+from models.ingestion import LiveAggregates
+from models.sentiment_aggregates import SentimentAggregateStore
+
+DAY = 86400
+NOW = 1790000000.0
+
+def _ids(store):
+    return [row[0] for row in store._conn.execute("SELECT item_id FROM sentiment_items ORDER BY item_id")]
+
+def test_rescored_items_are_counted_once(tmp_path):
+    store = SentimentAggregateStore(str(tmp_path / 'sentiment.sqlite3'))
+    items = [('p1', 0.8, NOW - 60), ('p2', -0.5, NOW - 120)]
+    assert store.record('Python', items, now=NOW) == 2
+    assert store.record('python', items, now=NOW) == 0
+    summary = store.summary('python', now=NOW)
+    assert summary['count'] == 2
+    assert summary['histogram'] == {'positive': 1, 'neutral': 0, 'negative': 1}
+    assert summary['windows']['1h']['count'] == 2
+
+def test_item_ids_and_rollups_past_the_retention_are_pruned(tmp_path):
+    store = SentimentAggregateStore(str(tmp_path / 'sentiment.sqlite3'), retention_days=30)
+    store.record('python', [('old', 0.5, NOW - 20 * DAY), ('new', 0.5, NOW - DAY)], now=NOW)
+    assert _ids(store) == ['new', 'old']
+
+    later = NOW + 15 * DAY
+    store.record('python', [('newer', 0.1, later), ('stale', 0.9, later - 31 * DAY)], now=later)
+    assert _ids(store) == ['new', 'newer']
+    days = [row[0] for row in store._conn.execute("SELECT bucket FROM sentiment_rollups WHERE resolution = 'day'")]
+    assert sorted(days) == ['2026-09-20', '2026-10-06']
+
+    # Items older than the retention can no longer be deduplicated, so they are not counted
+    assert store.summary('python', now=later)['count'] == 3
+
+def test_stores_written_before_pruning_are_migrated(tmp_path):
+    path = str(tmp_path / 'sentiment.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sentiment_items (subreddit TEXT NOT NULL, item_id TEXT NOT NULL, "
+                 "PRIMARY KEY (subreddit, item_id)) WITHOUT ROWID")
+    conn.execute("INSERT INTO sentiment_items VALUES ('python', 'legacy')")
+    conn.commit()
+    conn.close()
+
+    store = SentimentAggregateStore(path)
+    assert store.record('python', [('p1', 0.2, NOW)], now=NOW) == 1
+    assert _ids(store) == ['p1']
+
+def test_stores_sharing_a_file_do_not_lose_updates(tmp_path):
+    path = str(tmp_path / 'sentiment.sqlite3')
+    first, second = SentimentAggregateStore(path), SentimentAggregateStore(path)
+    first.record('python', [('p1', 0.8, NOW - 60)], now=NOW)
+    second.record('python', [('p2', -0.8, NOW - 30)], now=NOW)
+    first.record('python', [('p3', 0.0, NOW)], now=NOW)
+    assert second.record('python', [('p1', 0.8, NOW - 60)], now=NOW) == 0
+
+    for store in (first, second):
+        summary = store.summary('python', now=NOW)
+        assert summary['count'] == 3
+        assert summary['histogram'] == {'positive': 1, 'neutral': 1, 'negative': 1}
+        assert summary['lastItemAt'] == NOW
+
+def test_background_records_are_visible_after_flush(tmp_path):
+    store = SentimentAggregateStore(str(tmp_path / 'sentiment.sqlite3'))
+    store.record_in_background('python', [('p1', 0.5, NOW), ('p2', 0.0, NOW)])
+    store.flush()
+    assert store.summary('python', now=NOW)['count'] == 2
+
+def test_comment_sentiment_uses_its_own_thresholds():
+    aggregate = CommentSentimentAggregate()
+    for polarity in (0.2, 0.05, -0.2, -0.05):
+        aggregate.update(polarity)
+    assert aggregate.percentages() == {'positive': 25.0, 'neutral': 50.0, 'negative': 25.0}
+    assert CommentSentimentAggregate().percentages() == {'positive': 0, 'neutral': 0, 'negative': 0}
+
+def test_subreddit_with_only_streamed_comments_is_scored_live(fake_reddit, monkeypatch):
+    from models.sentiment_analysis import SentimentAnalysisModel
+
+    subreddit = fake_reddit.corpus.subreddit_name(0)
+    aggregates = LiveAggregates()
+    aggregates.apply(subreddit, [], [{'id': 'c1', 'author': 'alice', 'created_utc': NOW}], [])
+    monkeypatch.setattr('models.sentiment_analysis.live_aggregates', aggregates)
+
+    results = SentimentAnalysisModel.analyze_subreddit(subreddit)
+    assert results
+    assert fake_reddit.calls['subreddit.hot'] == 1
@@ -0,0 +1,41 @@
+import threading
+import time
+
+from models.sentiment_analysis import SentimentAnalysisModel
+
+def test_concurrent_first_requests_build_one_vader_analyzer(monkeypatch):
+    built = []
+
+    class SlowAnalyzer:
+        def __init__(self):
+            time.sleep(0.05)
+            built.append(self)
+
+    monkeypatch.setattr('models.sentiment_analysis.SentimentIntensityAnalyzer', SlowAnalyzer)
+    monkeypatch.setattr(SentimentAnalysisModel, '_sid', None)
+
+    analyzers = []
+    threads = [threading.Thread(target=lambda: analyzers.append(SentimentAnalysisModel._get_sid())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(built) == 1
+    assert all(analyzer is built[0] for analyzer in analyzers)
+
+def test_cleaning_continues_when_the_nltk_corpora_fail(monkeypatch):
+    from models.text_cleaning import TextCleaner
+
+    class BrokenCorpus:
+        def words(self, language):
+            raise OSError("stopwords corpus is corrupt")
+
+    class BrokenLemmatizer:
+        def lemmatize(self, word, pos=None):
+            raise AttributeError("'LazyCorpusLoader' object has no attribute '_morphy'")
+
+    monkeypatch.setattr('models.text_cleaning.stopwords', BrokenCorpus())
+    cleaner = TextCleaner()
+    cleaner._lemmatizer = BrokenLemmatizer()
+    assert cleaner.clean("The gardens were blooming!") == "the gardens were blooming"
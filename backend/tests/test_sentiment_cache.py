@@ -0,0 +1,29 @@
+from models.sentiment_cache import SentimentResultCache
+
+def _results(start, stop):
+    return {f"key{i}": (float(i),) for i in range(start, stop)}
+
+def test_disk_tier_is_bounded_across_processes_sharing_it(tmp_path):
+    path = str(tmp_path / 'sentiment_cache.sqlite3')
+    # Two caches on one file stand in for two worker processes
+    first = SentimentResultCache(maxsize=10, disk_path=path, disk_maxsize=100)
+    second = SentimentResultCache(maxsize=10, disk_path=path, disk_maxsize=100)
+
+    first.set_many(_results(0, 60))
+    second.set_many(_results(60, 120))
+    assert second.stats()['disk']['size'] == 90
+    assert first.stats()['disk']['size'] == 90
+
+    # The oldest results were pruned, the newest are still shared
+    assert first.get_many(['key0', 'key29']) == {}
+    assert first.get_many(['key30', 'key119']) == {'key30': (30.0,), 'key119': (119.0,)}
+
+def test_results_already_on_disk_are_not_counted_again(tmp_path):
+    cache = SentimentResultCache(maxsize=10, disk_path=str(tmp_path / 'sentiment_cache.sqlite3'), disk_maxsize=100)
+    for _ in range(3):
+        cache.set_many(_results(0, 50))
+    assert cache.stats()['disk']['size'] == 50
+    cache.clear()
+    assert cache.stats()['disk']['size'] == 0
+    cache.set_many(_results(0, 5))
+    assert cache.stats()['disk']['size'] == 5